@@ -1,9 +1,11 @@
 import streamlit as st
-from dotenv import load_dotenv
+from shared_resources import load_environment
 import os
+from lazy_imports import prefetch
+from font_bundle import check_bundle
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (once per process; reruns skip it)
+load_environment()
 
 # Verify API key is set
 if not os.getenv("OPENAI_API_KEY"):
@@ -95,3 +97,9 @@ st.markdown("""
 
 Each mode requires you to upload your resume first. Your resume will be securely stored and can be accessed across all modes.
 """)
+
+# Verify the offline font bundle once per process, so a broken image is logged at startup
+check_bundle()
+
+# Load what the modes need in the background, so switching to one doesn't wait on LangChain or PyPDF2
+prefetch("resume_agent", "pdf_text", "resume_pdf")
@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+import openai
+from resume_agent import atailor_resume, agenerate_tailored_resume_text, DEFAULT_TAILORING_OPTIONS
+from response_cache import normalize_text
+from pdf_text import extract_pdf_text
+from resume_storage import save_resume_run
+from resume_pdf import render_resume_pdf
+from resilient_transport import retry_after_seconds
+
+# Errors worth retrying: rate limits, timeouts, dropped connections and upstream 5xx.
+# Each API call is already retried by the transport; these job-level retries wait
+# out longer outages, e.g. an open circuit breaker.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BASE_DELAY = 2.0
+DEFAULT_MAX_DELAY = 60.0
+
+T = TypeVar("T")
+
+
+def load_resume_text(path: str) -> str:
+    """
+    Read the resume to tailor from a PDF or a plain text file.
+
+    Args:
+        path (str): Path to a .pdf, .txt or .md file
+
+    Returns:
+        str: The resume text
+    """
+    if path.lower().endswith(".pdf"):
+        return extract_pdf_text(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_jobs(path: str) -> List[Dict[str, str]]:
+    """
+    Load job descriptions from a directory of text files or from a JSONL file.
+
+    In a directory every .txt/.md file is one job and its file name is the job id.
+    In a JSONL file each line needs a "job_description" (or "description") field
+    and may carry an "id".
+
+    Args:
+        path (str): Directory or .jsonl file
+
+    Returns:
+        List[Dict[str, str]]: Jobs as {"id": ..., "job_description": ...}
+    """
+    jobs = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if not name.lower().endswith((".txt", ".md")):
+                continue
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                jobs.append({"id": os.path.splitext(name)[0], "job_description": f.read()})
+        return jobs
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            description = record.get("job_description") or record.get("description")
+            if not description:
+                raise ValueError(f"{path}:{line_number}: missing 'job_description'")
+            jobs.append({"id": str(record.get("id", line_number)), "job_description": description})
+    return jobs
+
+
+def _retry_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> float:
+    """Seconds to wait before the next attempt, honoring the server's Retry-After header if present."""
+    response = getattr(error, "response", None)
+    retry_after = retry_after_seconds(response) if response is not None else None
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    # Full jitter exponential backoff
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def _with_retries(call: Callable[[], Awaitable[T]], max_retries: int, base_delay: float, max_delay: float) -> T:
+    """Await call(), retrying transient API failures; the last failure is raised."""
+    for attempt in range(max_retries):
+        try:
+            return await call()
+        except RETRYABLE_ERRORS as e:
+            await asyncio.sleep(_retry_delay(e, attempt, base_delay, max_delay))
+    return await call()
+
+
+async def _tailor_one(resume_text: str, job: Dict[str, str], options: Dict[str, bool], user_name: str,
+                      max_retries: int, base_delay: float, max_delay: float) -> Dict[str, Any]:
+    """Analyze, generate and save one job, retrying transient API failures; any other error fails only this job."""
+    retry = (max_retries, base_delay, max_delay)
+    try:
+        # Each stage is retried on its own, so a failed generation reuses the finished analysis
+        analysis = await _with_retries(lambda: atailor_resume(resume_text, job["job_description"], options), *retry)
+        tailored_resume = await _with_retries(
+            lambda: agenerate_tailored_resume_text(resume_text, job["job_description"], analysis), *retry
+        )
+
+        pdf_bytes = await asyncio.to_thread(render_resume_pdf, tailored_resume) if tailored_resume else None
+        resume_folder = await asyncio.to_thread(
+            save_resume_run,
+            resume_text,
+            job["job_description"],
+            tailored_resume,
+            analysis,
+            user_name=user_name,
+            extra={"job_id": job["id"]},
+            pdf_bytes=pdf_bytes
+        )
+    except RETRYABLE_ERRORS as e:
+        return {"id": job["id"], "status": "failed", "error": str(e)}
+    except Exception as e:
+        return {"id": job["id"], "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    status = "error" if "error" in analysis else "ok"
+    return {"id": job["id"], "status": status, "folder": resume_folder}
+
+
+async def abatch_tailor(resume_text: str, jobs: List[Dict[str, str]], options: Optional[Dict[str, bool]] = None,
+                        user_name: str = "Anonymous", max_workers: int = 4, max_retries: int = DEFAULT_MAX_RETRIES,
+                        base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY) -> List[Dict[str, Any]]:
+    """
+    Tailor one resume to many job descriptions concurrently.
+
+    The resume is normalized once, so every prompt starts with the same
+    byte-identical resume-side prefix, and identical job descriptions are only
+    processed once. Each result is saved under Resume/<timestamp>_<user>.
+
+    Args:
+        resume_text (str): The resume to tailor
+        jobs (List[Dict[str, str]]): Jobs from load_jobs
+        options (Dict[str, bool]): Tailoring preferences shared by all jobs
+        user_name (str): Name used for the Resume/ folders
+        max_workers (int): Maximum number of jobs in flight at once
+        max_retries (int): Retries per job on rate limits and transient errors
+        base_delay (float): Initial backoff delay in seconds
+        max_delay (float): Upper bound for a single backoff delay in seconds
+
+    Returns:
+        List[Dict[str, Any]]: One result per input job, in input order, with
+        "id", "status" ("ok", "error" or "failed") and "folder" or "error"
+    """
+    if options is None:
+        options = dict(DEFAULT_TAILORING_OPTIONS)
+    resume_text = normalize_text(resume_text)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(job):
+        async with semaphore:
+            return await _tailor_one(resume_text, job, options, user_name, max_retries, base_delay, max_delay)
+
+    # Deduplicate identical postings (e.g. the same job listed on several boards)
+    unique_jobs = {}
+    for job in jobs:
+        digest = hashlib.sha256(normalize_text(job["job_description"]).encode("utf-8")).hexdigest()
+        unique_jobs.setdefault(digest, job)
+    digests = list(unique_jobs)
+    outcomes = await asyncio.gather(*(run(unique_jobs[digest]) for digest in digests))
+    by_digest = dict(zip(digests, outcomes))
+
+    results = []
+    for job in jobs:
+        digest = hashlib.sha256(normalize_text(job["job_description"]).encode("utf-8")).hexdigest()
+        results.append({**by_digest[digest], "id": job["id"]})
+    return results
+
+
+def batch_tailor(resume_text: str, jobs: List[Dict[str, str]], **kwargs) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around abatch_tailor.
+
+    Args:
+        resume_text (str): The resume to tailor
+        jobs (List[Dict[str, str]]): Jobs from load_jobs
+        **kwargs: Passed through to abatch_tailor
+
+    Returns:
+        List[Dict[str, Any]]: Same as abatch_tailor
+    """
+    return asyncio.run(abatch_tailor(resume_text, jobs, **kwargs))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tailor one resume to many job descriptions.")
+    parser.add_argument("resume", help="Resume as a .pdf or text file")
+    parser.add_argument("jobs", help="Directory of .txt/.md job descriptions, or a .jsonl file")
+    parser.add_argument("--user", default="Anonymous", help="User name for the Resume/ folders")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum jobs in flight at once")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries per job on rate limits")
+    parser.add_argument("--options", help="JSON object of tailoring options, e.g. '{\"optimize_for_ats\": false}'")
+    args = parser.parse_args(argv)
+
+    options = dict(DEFAULT_TAILORING_OPTIONS)
+    if args.options:
+        options.update(json.loads(args.options))
+
+    results = batch_tailor(
+        load_resume_text(args.resume),
+        load_jobs(args.jobs),
+        options=options,
+        user_name=args.user,
+        max_workers=args.workers,
+        max_retries=args.max_retries
+    )
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
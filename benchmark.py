@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import tracemalloc
+import concurrent.futures
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+from resume_storage import RESUME_FOLDER, iter_run_folders, load_run_folder
+
+# Stages measured by default, in pipeline order
+STAGES = ("extract_pdf", "tailor_resume", "generate_tailored_resume_text", "render_pdf")
+# Stages that call the LLM, and so go through the fake backend
+LLM_STAGES = {"tailor_resume", "generate_tailored_resume_text"}
+# Cases run under tracemalloc for the peak memory figure; tracing slows
+# allocation-heavy stages such as PDF extraction by an order of magnitude
+DEFAULT_MEMORY_SAMPLE = 3
+# Relative slowdown of p50 or throughput drop that counts as a regression against a baseline
+DEFAULT_MAX_REGRESSION = 0.2
+
+
+@dataclass
+class BenchmarkCase:
+    """One saved tailoring run used as benchmark input."""
+    run_id: str
+    original_resume: str
+    job_description: str
+    tailored_resume: str
+    analysis: Dict[str, Any]
+    pdf_bytes: Optional[bytes]
+
+
+@dataclass
+class StageResult:
+    """Timings and memory of one stage over the corpus."""
+    stage: str
+    operations: int
+    seconds: float
+    throughput: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    peak_memory_mb: float
+
+
+def load_corpus(root: str = RESUME_FOLDER) -> List[BenchmarkCase]:
+    """
+    Build the benchmark corpus from the runs saved under Resume/.
+
+    Runs without a resume, job description or tailored resume are skipped.
+    The run's PDF is used for extraction when it was saved, otherwise the
+    tailored resume is rendered once to get one.
+
+    Args:
+        root (str): The Resume/ folder
+
+    Returns:
+        List[BenchmarkCase]: One case per usable run, oldest first
+    """
+    from resume_pdf import render_resume_pdf
+
+    cases = []
+    for folder in iter_run_folders(root):
+        run = load_run_folder(folder)
+        if not (run.get("original_resume") and run.get("job_description") and run.get("tailored_resume")):
+            continue
+        pdf_path = os.path.join(folder, "tailored_resume.pdf")
+        if os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+        else:
+            pdf_bytes = render_resume_pdf(run["tailored_resume"])
+        analysis = run.get("analysis") if isinstance(run.get("analysis"), dict) else {}
+        cases.append(BenchmarkCase(
+            run_id=os.path.basename(folder),
+            original_resume=run["original_resume"],
+            job_description=run["job_description"],
+            tailored_resume=run["tailored_resume"],
+            analysis=analysis,
+            pdf_bytes=pdf_bytes
+        ))
+    return cases
+
+
+def use_fake_backend(latency: float) -> Any:
+    """
+    Start the fake OpenAI API and point the OpenAI client at it.
+
+    Must run before resume_agent is imported. Responses are canned and failures
+    are off, so LLM stages cost exactly the configured latency plus the client
+    overhead. The response cache is disabled so every call reaches the backend.
+
+    Args:
+        latency (float): Seconds the fake API waits before each reply
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    from fake_openai_server import FakeServerConfig, start_server
+
+    server = start_server(config=FakeServerConfig(latency=latency))
+    host, port = server.server_address[:2]
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = f"http://{host}:{port}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["RESPONSE_CACHE_DISABLED"] = "1"
+    return server
+
+
+def stage_operations(stage: str) -> Callable[[BenchmarkCase], Any]:
+    """The function that runs one case through a stage, bypassing every cache."""
+    if stage == "extract_pdf":
+        from pdf_text import extract_pages
+        return lambda case: extract_pages(case.pdf_bytes)
+    if stage == "tailor_resume":
+        from resume_agent import tailor_resume
+        return lambda case: tailor_resume(case.original_resume, case.job_description, use_cache=False)
+    if stage == "generate_tailored_resume_text":
+        from resume_agent import generate_tailored_resume_text
+        return lambda case: generate_tailored_resume_text(case.original_resume, case.job_description, case.analysis, use_cache=False)
+    if stage == "render_pdf":
+        from resume_pdf import render_resume_pdf
+        return lambda case: render_resume_pdf(case.tailored_resume)
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def run_stage(stage: str, cases: List[BenchmarkCase], iterations: int = 3, concurrency: int = 1,
+              memory_sample: int = DEFAULT_MEMORY_SAMPLE) -> StageResult:
+    """
+    Measure one stage over the corpus.
+
+    Latency and throughput come from `iterations` passes over the cases on
+    `concurrency` threads. Peak memory is measured separately, by running
+    the first `memory_sample` cases under tracemalloc, so tracing doesn't
+    skew the timings.
+
+    Args:
+        stage (str): One of STAGES
+        cases (List[BenchmarkCase]): The corpus
+        iterations (int): Passes over the corpus
+        concurrency (int): Cases run at once
+        memory_sample (int): Cases measured for peak memory, 0 to skip
+
+    Returns:
+        StageResult: The stage's numbers
+    """
+    operation = stage_operations(stage)
+    operation(cases[0])  # warm up clients, fonts and imports
+
+    def timed(case: BenchmarkCase) -> float:
+        start = time.perf_counter()
+        operation(case)
+        return (time.perf_counter() - start) * 1000
+
+    work = [case for _ in range(iterations) for case in cases]
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, work))
+    seconds = time.perf_counter() - start
+
+    peak = 0
+    if memory_sample > 0:
+        tracemalloc.start()
+        for case in cases[:memory_sample]:
+            operation(case)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return StageResult(
+        stage=stage,
+        operations=len(work),
+        seconds=round(seconds, 3),
+        throughput=round(len(work) / seconds, 2),
+        mean_ms=round(sum(latencies) / len(latencies), 2),
+        p50_ms=round(_percentile(latencies, 0.5), 2),
+        p95_ms=round(_percentile(latencies, 0.95), 2),
+        peak_memory_mb=round(peak / 1e6, 2)
+    )
+
+
+def compare_to_baseline(results: List[StageResult], baseline: Dict[str, Dict[str, Any]],
+                        max_regression: float = DEFAULT_MAX_REGRESSION) -> List[str]:
+    """
+    Stages whose p50 latency or throughput got worse than the baseline allows.
+
+    Args:
+        results (List[StageResult]): This run
+        baseline (Dict[str, Dict[str, Any]]): The "stages" of a previous --json report
+        max_regression (float): Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        List[str]: One message per regression, empty if none
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.stage)
+        if not previous:
+            continue
+        if result.p50_ms > previous["p50_ms"] * (1 + max_regression):
+            regressions.append(f"{result.stage}: p50 {previous['p50_ms']} -> {result.p50_ms} ms")
+        if result.throughput < previous["throughput"] * (1 - max_regression):
+            regressions.append(f"{result.stage}: throughput {previous['throughput']} -> {result.throughput} ops/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tailoring pipeline offline against a fake LLM backend.")
+    parser.add_argument("--root", default=RESUME_FOLDER, help="Folder of saved runs to build the corpus from")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Stages to measure")
+    parser.add_argument("--iterations", type=int, default=3, help="Passes over the corpus per stage")
+    parser.add_argument("--concurrency", type=int, default=1, help="Cases run at once")
+    parser.add_argument("--memory-sample", type=int, default=DEFAULT_MEMORY_SAMPLE, help="Cases measured for peak memory, 0 to skip")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the fake LLM takes per call")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Previous --json report; exit with status 1 on regressions")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if LLM_STAGES.intersection(args.stages):
+        use_fake_backend(args.llm_latency)
+
+    cases = load_corpus(args.root)
+    if not cases:
+        raise SystemExit(f"No usable runs found under {args.root}/")
+    print(f"Corpus: {len(cases)} runs from {args.root}/, {args.iterations} iterations, concurrency {args.concurrency}")
+
+    results = [run_stage(stage, cases, args.iterations, args.concurrency, args.memory_sample) for stage in args.stages]
+
+    print(f"{'stage':>30} {'ops/s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>9}")
+    for result in results:
+        print(f"{result.stage:>30} {result.throughput:>9.2f} {result.mean_ms:>9.1f} {result.p50_ms:>9.1f} "
+              f"{result.p95_ms:>9.1f} {result.peak_memory_mb:>9.2f}")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3)
+    print(f"Process peak RSS: {max_rss_mb:.1f} MB")
+
+    report = {
+        "corpus_runs": len(cases),
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "llm_latency": args.llm_latency,
+        "max_rss_mb": round(max_rss_mb, 1),
+        "stages": {result.stage: asdict(result) for result in results}
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+        regressions = compare_to_baseline(results, baseline, args.max_regression)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import re
+import logging
+import concurrent.futures
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from text_search import BM25Index, tokenize
+from resume_storage import get_catalog, load_run_folder
+from prompt_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Target chunk size, in words, when splitting resumes and past runs for retrieval
+CHUNK_WORDS = 120
+CHUNK_OVERLAP_WORDS = 20
+
+# Per-turn prompt budgets, in tokens
+RETRIEVAL_TOKEN_BUDGET = 900
+HISTORY_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 300
+
+# Turns always kept verbatim, however long they are
+MIN_RECENT_MESSAGES = 2
+
+
+def chunk_text(text: str, source: str, max_words: int = CHUNK_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> List[Dict[str, str]]:
+    """
+    Split text into retrieval chunks along paragraph boundaries.
+
+    Paragraphs (blank-line separated, as resume sections are) are packed into
+    chunks of up to `max_words`; longer paragraphs are cut into overlapping windows.
+
+    Args:
+        text (str): Text to split
+        source (str): Label stored with every chunk, e.g. "resume"
+        max_words (int): Maximum words per chunk
+        overlap_words (int): Words repeated between windows of a long paragraph
+
+    Returns:
+        List[Dict[str, str]]: Chunks as {"source": ..., "text": ...}
+    """
+    chunks, current, current_words = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and current_words + len(words) > max_words:
+            chunks.append("\n".join(current))
+            current, current_words = [], 0
+        if len(words) <= max_words:
+            current.append(paragraph.strip())
+            current_words += len(words)
+            continue
+        step = max(max_words - overlap_words, 1)
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start:start + max_words]))
+            if start + max_words >= len(words):
+                break
+    if current:
+        chunks.append("\n".join(current))
+    return [{"source": source, "text": chunk} for chunk in chunks]
+
+
+class ChunkIndex:
+    """BM25 retrieval over resume chunks."""
+
+    def __init__(self, chunks: List[Dict[str, str]]):
+        self.chunks = chunks
+        self._bm25 = BM25Index()
+        for chunk in chunks:
+            self._bm25.add(tokenize(chunk["text"]))
+        self._bm25.finalize()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def retrieve(self, query: str, token_budget: int = RETRIEVAL_TOKEN_BUDGET, top_k: int = 8) -> List[Dict[str, str]]:
+        """
+        Most relevant chunks for a query that fit in a token budget.
+
+        Args:
+            query (str): The user's message (optionally with recent context)
+            token_budget (int): Maximum tokens of the returned chunks
+            top_k (int): Maximum number of chunks
+
+        Returns:
+            List[Dict[str, str]]: Chunks, most relevant first
+        """
+        if not self.chunks:
+            return []
+        ranked = self._bm25.search(self._bm25.query_weights(tokenize(query)), top_k)
+        if not ranked:
+            # Nothing matched (e.g. "any advice?"): fall back to the start of the resume
+            ranked = [(doc_id, 0.0) for doc_id in range(min(top_k, len(self.chunks)))]
+        selected, used = [], 0
+        for doc_id, _ in ranked:
+            cost = count_tokens(self.chunks[doc_id]["text"])
+            if used + cost > token_budget and selected:
+                continue
+            selected.append(self.chunks[doc_id])
+            used += cost
+        return selected
+
+
+@dataclass
+class ChatMemory:
+    """
+    Conversation history with a rolling summary.
+
+    The newest messages are kept verbatim up to `history_budget` tokens; older
+    messages are moved by overflow() to `unsummarized` until they are folded
+    into `summary` in the background, so the history part of the prompt stays
+    near the two budgets without a summary call on the reply path.
+    """
+    history_budget: int = HISTORY_TOKEN_BUDGET
+    summary_budget: int = SUMMARY_TOKEN_BUDGET
+    summary: str = ""
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    # Evicted messages not yet in the summary; still sent as history meanwhile
+    unsummarized: List[Dict[str, str]] = field(default_factory=list)
+    # The background summary update, if one is running
+    summarizing: Optional[concurrent.futures.Future] = field(default=None, repr=False, compare=False)
+
+    def add(self, role: str, content: str) -> None:
+        self.messages.append({"role": role, "content": content})
+
+    def history(self) -> List[Dict[str, str]]:
+        """Messages to send verbatim: those awaiting the summary, then the recent ones."""
+        return self.unsummarized + self.messages
+
+    def history_tokens(self) -> int:
+        return sum(count_tokens(message["content"]) for message in self.messages)
+
+    def overflow(self) -> List[Dict[str, str]]:
+        """
+        Move the oldest messages that no longer fit in the history budget to `unsummarized`.
+
+        Returns:
+            List[Dict[str, str]]: The messages moved (empty if within budget)
+        """
+        evicted = []
+        while len(self.messages) > MIN_RECENT_MESSAGES and self.history_tokens() > self.history_budget:
+            evicted.append(self.messages.pop(0))
+        self.unsummarized.extend(evicted)
+        return evicted
+
+
+@dataclass
+class ChatSession:
+    """Everything the chat needs between turns: the retrieval index and the memory."""
+    index: ChunkIndex
+    memory: ChatMemory = field(default_factory=ChatMemory)
+
+
+def load_past_run_chunks(resume_text: str, limit: int = 5) -> List[Dict[str, str]]:
+    """
+    Chunks from earlier tailoring runs of the same resume in the Resume/ store.
+
+    Args:
+        resume_text (str): The resume the runs were made for
+        limit (int): Maximum number of runs, newest first
+
+    Returns:
+        List[Dict[str, str]]: Chunks of each run's job description and improvement suggestions
+    """
+    catalog = get_catalog()
+    chunks = []
+    for run in catalog.find_runs(resume_text=resume_text, limit=limit):
+        try:
+            resume_data = load_run_folder(run["path"], catalog.blobs)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Skipping unreadable run %s: %s", run.get("path"), e)
+            continue
+        source = f"tailoring run {run['timestamp']}"
+        chunks.extend(chunk_text(resume_data.get("job_description") or "", source + " (job description)"))
+        analysis = resume_data.get("analysis")
+        if isinstance(analysis, dict):
+            suggestions = analysis.get("improvement_suggestions") or []
+            if suggestions:
+                chunks.extend(chunk_text("\n\n".join(map(str, suggestions)), source + " (suggestions)"))
+    return chunks
+
+
+def format_chunks(chunks: List[Dict[str, str]]) -> str:
+    """Render retrieved chunks for the prompt, labelled with their source."""
+    return "\n\n".join(f"[{chunk['source']}]\n{chunk['text']}" for chunk in chunks)
+
+
+def format_messages(messages: List[Dict[str, str]]) -> str:
+    """Render chat messages as a plain transcript."""
+    return "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in messages)
@@ -0,0 +1,82 @@
+import os
+import json
+from datetime import datetime
+from typing import List
+import streamlit as st
+from tracing import Trace
+from shared_resources import registry
+
+# Traces kept per session for the panel
+SESSION_TRACE_LIMIT = 20
+
+
+def dev_panel_enabled() -> bool:
+    """The panel is shown with DEVELOPER_PANEL=1 in the environment or ?dev=1 in the URL."""
+    return os.getenv("DEVELOPER_PANEL", "").lower() in ("1", "true", "yes") or st.query_params.get("dev") == "1"
+
+
+def record_trace(finished: Trace) -> None:
+    """Keep a finished trace in the session for the panel, newest first."""
+    traces = st.session_state.setdefault("dev_traces", [])
+    traces.insert(0, finished)
+    del traces[SESSION_TRACE_LIMIT:]
+
+
+def render_trace_panel(traces: List[Trace]) -> None:
+    """
+    Show the waterfall, token counts and cache hits of a request.
+
+    Args:
+        traces (List[Trace]): Traces to choose from, newest first
+    """
+    # Charting libraries are only loaded when the panel is shown
+    import altair as alt
+    import pandas as pd
+
+    with st.expander("🛠️ Developer: request timings", expanded=False):
+        if not traces:
+            st.caption("No traced requests yet in this session.")
+            return
+        # Options are labels rather than the traces: Streamlit copies option values, and traces hold a lock
+        labels = [f"#{len(traces) - i} {t.root.name} · {t.root.duration * 1000:,.0f} ms · "
+                  f"{datetime.fromtimestamp(t.root.start).strftime('%H:%M:%S')}" for i, t in enumerate(traces)]
+        selected = traces[labels.index(st.selectbox("Request", labels))]
+
+        totals = selected.totals()
+        columns = st.columns(5)
+        columns[0].metric("Total", f"{selected.root.duration:.2f} s")
+        columns[1].metric("LLM calls", totals["llm_calls"])
+        columns[2].metric("Prompt tokens", f"{totals['prompt_tokens']:,}")
+        columns[3].metric("Completion tokens", f"{totals['completion_tokens']:,}")
+        columns[4].metric("Cache hits", f"{totals['cache_hits']}/{totals['cache_hits'] + totals['cache_misses']}")
+
+        rows = selected.waterfall()
+        frame = pd.DataFrame([{
+            "span": f"{i:02d} " + "· " * row["depth"] + row["name"],
+            "start_ms": row["offset_ms"],
+            "end_ms": row["offset_ms"] + row["duration_ms"],
+            "duration_ms": row["duration_ms"],
+            "status": row["status"],
+            "attributes": json.dumps(row["attributes"], default=str)
+        } for i, row in enumerate(rows)])
+
+        chart = alt.Chart(frame).mark_bar().encode(
+            x=alt.X("start_ms:Q", title="ms since request start"),
+            x2="end_ms:Q",
+            y=alt.Y("span:N", sort=None, title=None),
+            color=alt.Color("status:N", scale=alt.Scale(domain=["ok", "error"], range=["#4c78a8", "#e45756"]), legend=None),
+            tooltip=["span", "duration_ms", "attributes"]
+        ).properties(height=max(120, 24 * len(frame)))
+        st.altair_chart(chart, use_container_width=True)
+        st.dataframe(frame[["span", "start_ms", "duration_ms", "status", "attributes"]], hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "Download trace (JSON)",
+            data=json.dumps(selected.to_dict(), indent=2, default=str),
+            file_name=f"trace_{selected.trace_id}.json",
+            mime="application/json"
+        )
+
+        built = registry.report()
+        if built:
+            st.caption("Shared resources built in this process: " + ", ".join(f"{name} ({ms:,.0f} ms)" for name, ms in built.items()))
@@ -0,0 +1,242 @@
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Canned analysis returned for the JSON analysis prompts
+FAKE_ANALYSIS = {
+    "skills_analysis": {
+        "matching_skills": ["Python", "SQL"],
+        "missing_skills": ["Kubernetes"],
+        "match_score": 0.7,
+        "suggestions": ["Mention container orchestration experience"]
+    },
+    "experience_analysis": {
+        "relevant_experiences": ["Backend development"],
+        "irrelevant_experiences": [],
+        "match_score": 0.6,
+        "suggestions": ["Quantify the impact of backend work"]
+    },
+    "keyword_analysis": {
+        "found_keywords": ["python"],
+        "missing_keywords": ["kubernetes"],
+        "match_score": 0.5,
+        "suggestions": ["Add kubernetes to the skills section"]
+    },
+    "tailored_resume": {
+        "summary": "Backend engineer focused on Python services.",
+        "skills": ["Python", "SQL", "Kubernetes"],
+        "experience": [],
+        "formatting_suggestions": []
+    },
+    "overall_match_score": 0.6,
+    "improvement_suggestions": ["Lead with the most relevant project"]
+}
+
+FAKE_RESUME_TEXT = """JANE DOE
+jane@example.com
+
+SUMMARY
+Backend engineer focused on Python services.
+
+SKILLS
+Python, SQL, Kubernetes
+
+EXPERIENCE
+Software Engineer, Example Corp
+- Built and operated Python APIs serving 1M requests per day"""
+
+
+@dataclass
+class FakeServerConfig:
+    """Behaviour of the fake API: response latency and injected failures."""
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: Optional[float] = 1.0
+    stream_chunk_delay: float = 0.0
+
+
+def fake_completion_text(prompt: str) -> str:
+    """
+    The reply for a prompt, chosen by which of resume_agent's prompts it is.
+
+    Args:
+        prompt (str): The concatenated message contents
+
+    Returns:
+        str: Analysis JSON, fused JSON, an echoed fragment or section, or plain resume text
+    """
+    if '"tailored_resume_text"' in prompt:
+        return json.dumps({"analysis": FAKE_ANALYSIS, "tailored_resume_text": FAKE_RESUME_TEXT})
+    if "Fragment:\n" in prompt:
+        return prompt.split("Fragment:\n", 1)[1].strip()
+    if "Update only these sections of the analysis: " in prompt:
+        sections = prompt.split("Update only these sections of the analysis: ", 1)[1].split("\n", 1)[0].split(", ")
+        return json.dumps({name: FAKE_ANALYSIS[name] for name in sections if name in FAKE_ANALYSIS})
+    if "Revise one section of a tailored resume" in prompt:
+        return prompt.split("Section:\n", 1)[1].strip()
+    # The generation prompt embeds the analysis, so check for it before the analysis prompt
+    if "Analysis Results:" in prompt:
+        return FAKE_RESUME_TEXT
+    if '"skills_analysis"' in prompt:
+        return json.dumps(FAKE_ANALYSIS)
+    return FAKE_RESUME_TEXT
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/chat/completions, streaming (SSE) or not."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self) -> FakeServerConfig:
+        return self.server.config
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        failure = self._injected_failure()
+        if failure is not None:
+            status, headers = failure
+            self._send_json(status, {"error": {"message": "Injected failure", "type": "server_error"}}, headers)
+            return
+
+        time.sleep(max(self.config.latency + random.uniform(-self.config.jitter, self.config.jitter), 0.0))
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        text = fake_completion_text(prompt)
+        model = body.get("model", "fake-model")
+        if body.get("stream"):
+            self._send_stream(model, text)
+        else:
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(text) // 4,
+                    "total_tokens": (len(prompt) + len(text)) // 4
+                }
+            })
+
+    def _injected_failure(self) -> Optional[Tuple[int, Dict[str, str]]]:
+        roll = random.random()
+        if roll < self.config.rate_limit_rate:
+            headers = {"Retry-After": str(self.config.retry_after)} if self.config.retry_after is not None else {}
+            return 429, headers
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return 503, {}
+        return None
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model: str, text: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for chunk in _stream_chunks(model, text):
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.config.stream_chunk_delay:
+                time.sleep(self.config.stream_chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _stream_chunks(model: str, text: str) -> Iterator[Dict[str, Any]]:
+    """chat.completion.chunk events for a reply, a few words at a time."""
+    def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    words = text.split(" ")
+    for i in range(0, len(words), 4):
+        piece = " ".join(words[i:i + 4])
+        yield chunk({"content": piece if i == 0 else " " + piece})
+    yield chunk({}, "stop")
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, config: Optional[FakeServerConfig] = None) -> ThreadingHTTPServer:
+    """
+    Start the fake API in a daemon thread.
+
+    Point the app at it with OPENAI_BASE_URL=http://<host>:<port>/v1 and any OPENAI_API_KEY.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port, 0 for any free port (see server.server_address)
+        config (FakeServerConfig): Latency and failure injection; can be changed while running
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = config or FakeServerConfig()
+    threading.Thread(target=server.serve_forever, name="fake-openai-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible API with canned replies, latency and failure injection.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        stream_chunk_delay=args.stream_chunk_delay
+    )
+    server = ThreadingHTTPServer((args.host, args.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = config
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import logging
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from shared_resources import registry
+
+logger = logging.getLogger(__name__)
+
+FONT_DIR = "fonts"
+FONT_FAMILY = "Roboto"
+# fpdf style -> TTF file in FONT_DIR
+FONT_STYLES = {
+    "": "Roboto-Regular.ttf",
+    "B": "Roboto-Bold.ttf",
+    "I": "Roboto-Italic.ttf"
+}
+# Checksums of the TTFs and of the fpdf metric caches built from them
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_files(font_file: str) -> List[str]:
+    """
+    The metric caches fpdf keeps next to a TTF.
+
+    "<name>.pkl" holds the parsed metrics, read by add_font(); "<name>.cw127.pkl"
+    holds the width ranges of the first 128 characters, read when a document
+    is output.
+    """
+    stem = os.path.splitext(font_file)[0]
+    return [f"{stem}.pkl", f"{stem}.cw127.pkl"]
+
+
+def fix_ttf_paths(fonts: Dict[str, dict], font_files: Dict[str, dict]) -> None:
+    """
+    Point each font at the TTF file fpdf actually resolved.
+
+    The .pkl metric caches store the path of the TTF at the time they were built
+    (e.g. 'fonts\\Roboto-Regular.ttf' from a Windows machine), which fpdf then
+    reopens for subsetting; the resolved path works on every platform.
+    """
+    for fontkey, font in fonts.items():
+        if fontkey in font_files and "ttffile" in font_files[fontkey]:
+            font["ttffile"] = font_files[fontkey]["ttffile"]
+
+
+def _fpdf_version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+        return version("fpdf")
+    except Exception:
+        return None
+
+
+@dataclass
+class BundleStatus:
+    """What verify_bundle found in a font directory."""
+    font_dir: str
+    manifest: bool = False
+    missing: List[str] = field(default_factory=list)
+    corrupt: List[str] = field(default_factory=list)
+    stale_caches: List[str] = field(default_factory=list)
+
+    @property
+    def usable(self) -> bool:
+        """Every TTF is present and, if there is a manifest, matches its checksum."""
+        return not self.missing and not self.corrupt
+
+    @property
+    def caches_valid(self) -> bool:
+        """The metric caches can be handed to fpdf: all present and built from these TTFs."""
+        return self.usable and self.manifest and not self.stale_caches
+
+    def problems(self) -> List[str]:
+        problems = [f"missing {name}" for name in self.missing]
+        problems += [f"checksum mismatch for {name}" for name in self.corrupt]
+        problems += [f"stale or missing cache {name}" for name in self.stale_caches]
+        if not self.manifest:
+            problems.append(f"no {MANIFEST_FILE}")
+        return problems
+
+
+def load_manifest(font_dir: str = FONT_DIR) -> Optional[Dict[str, Any]]:
+    """The bundle manifest, or None if there is none or it can't be read."""
+    try:
+        with open(os.path.join(font_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def verify_bundle(font_dir: str = FONT_DIR) -> BundleStatus:
+    """
+    Check the fonts and their metric caches against the manifest.
+
+    Only reads and hashes files: nothing is downloaded, written or unpickled.
+
+    Args:
+        font_dir (str): The font directory
+
+    Returns:
+        BundleStatus: Missing and corrupt TTFs, and caches that can't be trusted
+    """
+    manifest = load_manifest(font_dir)
+    status = BundleStatus(font_dir=font_dir, manifest=manifest is not None)
+    entries = manifest["fonts"] if manifest else {}
+    fpdf_changed = manifest is not None and manifest.get("fpdf") != _fpdf_version()
+
+    for font_file in FONT_STYLES.values():
+        path = os.path.join(font_dir, font_file)
+        if not os.path.exists(path):
+            status.missing.append(font_file)
+            continue
+        entry = entries.get(font_file)
+        if manifest is None:
+            continue
+        if entry is None or _sha256(path) != entry["sha256"]:
+            status.corrupt.append(font_file)
+            continue
+        for cache_file in cache_files(font_file):
+            cache_path = os.path.join(font_dir, cache_file)
+            expected = entry.get("caches", {}).get(cache_file)
+            if fpdf_changed or expected is None or not os.path.exists(cache_path) or _sha256(cache_path) != expected:
+                status.stale_caches.append(cache_file)
+    return status
+
+
+def check_bundle(font_dir: str = FONT_DIR) -> BundleStatus:
+    """
+    verify_bundle, run once per process and logged.
+
+    Args:
+        font_dir (str): The font directory
+
+    Returns:
+        BundleStatus: The shared result
+    """
+    def verify() -> BundleStatus:
+        status = verify_bundle(font_dir)
+        if not status.usable:
+            logger.error("Font bundle in %s is unusable (%s); PDFs will use a core font. "
+                         "Restore the fonts and run `python font_bundle.py build`.", font_dir, "; ".join(status.problems()))
+        elif not status.caches_valid:
+            logger.warning("Font caches in %s can't be used (%s); metrics will be parsed from the TTFs. "
+                           "Run `python font_bundle.py build` to rebuild them.", font_dir, "; ".join(status.problems()))
+        return status
+
+    return registry.get(f"font_bundle:{font_dir}", verify)
+
+
+def _cache_matches(font_dir: str, font_file: str) -> bool:
+    """Whether an existing metrics .pkl was built from this TTF."""
+    try:
+        with open(os.path.join(font_dir, cache_files(font_file)[0]), "rb") as f:
+            metrics = pickle.load(f)
+        return metrics.get("originalsize") == os.path.getsize(os.path.join(font_dir, font_file)) and bool(metrics.get("cw"))
+    except Exception:
+        return False
+
+
+def build_bundle(font_dir: str = FONT_DIR, force: bool = False) -> BundleStatus:
+    """
+    Prebuild the fpdf metric caches and write the manifest, e.g. at image build time.
+
+    Existing .pkl caches built from the same TTFs are kept unless force is set.
+    The .cw127.pkl caches are produced by rendering one document in every style.
+    Needs fpdf and write access to font_dir; the app itself only reads the bundle.
+
+    Args:
+        font_dir (str): The font directory, which must hold every TTF in FONT_STYLES
+        force (bool): Rebuild every cache from the TTFs
+
+    Returns:
+        BundleStatus: The verified result
+
+    Raises:
+        FileNotFoundError: A TTF is missing
+    """
+    from fpdf import FPDF
+
+    missing = [name for name in FONT_STYLES.values() if not os.path.exists(os.path.join(font_dir, name))]
+    if missing:
+        raise FileNotFoundError(f"Missing fonts in {font_dir}: {', '.join(missing)}")
+
+    for font_file in FONT_STYLES.values():
+        if force or not _cache_matches(font_dir, font_file):
+            for cache_file in cache_files(font_file):
+                if os.path.exists(os.path.join(font_dir, cache_file)):
+                    os.remove(os.path.join(font_dir, cache_file))
+
+    # add_font writes missing .pkl caches and output() the missing .cw127.pkl ones
+    pdf = FPDF()
+    pdf.add_page()
+    for style, font_file in FONT_STYLES.items():
+        pdf.add_font(FONT_FAMILY, style, os.path.join(font_dir, font_file), uni=True)
+    fix_ttf_paths(pdf.fonts, pdf.font_files)
+    for style in FONT_STYLES:
+        pdf.set_font(FONT_FAMILY, style, 12)
+        # fpdf only writes the .cw127.pkl cache once a document uses a character past U+007F
+        pdf.cell(0, 10, "Font bundle \u00e9 " + (style or "R"), ln=1)
+    pdf.output(dest="S")
+
+    manifest = {"version": MANIFEST_VERSION, "fpdf": _fpdf_version(), "fonts": {}}
+    for font_file in FONT_STYLES.values():
+        manifest["fonts"][font_file] = {
+            "sha256": _sha256(os.path.join(font_dir, font_file)),
+            "caches": {name: _sha256(os.path.join(font_dir, name)) for name in cache_files(font_file)
+                       if os.path.exists(os.path.join(font_dir, name))}
+        }
+    with open(os.path.join(font_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return verify_bundle(font_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or check the offline font bundle used for resume PDFs.")
+    parser.add_argument("action", choices=["build", "check"], help="build: prebuild caches and write the manifest; check: verify only")
+    parser.add_argument("--font-dir", default=FONT_DIR, help="Font directory")
+    parser.add_argument("--force", action="store_true", help="Rebuild every cache from the TTFs")
+    args = parser.parse_args()
+
+    try:
+        status = build_bundle(args.font_dir, args.force) if args.action == "build" else verify_bundle(args.font_dir)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    for problem in status.problems():
+        print(f"{args.font_dir}: {problem}")
+    if not status.caches_valid:
+        sys.exit(1)
+    print(f"{args.font_dir}: {len(FONT_STYLES)} fonts and their caches verified")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import os
+import sys
+import csv
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from text_search import BM25Index, tokenize
+
+# Where the Job Hunting page looks for a built index, and for postings to build one from
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "job_index")
+JOB_POSTINGS_PATH = os.getenv("JOB_POSTINGS_PATH", "jobs")
+
+# Choices offered by the Job Hunting page
+EXPERIENCE_LEVELS = ["Entry Level", "Mid Level", "Senior Level", "Executive"]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Education", "Manufacturing", "Other"]
+
+# Title words used to infer the experience level when a posting doesn't state it
+_LEVEL_KEYWORDS = [
+    ("Executive", {"chief", "vp", "vice", "director", "head", "cto", "ceo", "cfo", "president"}),
+    ("Senior Level", {"senior", "sr", "sr.", "lead", "principal", "staff", "manager", "architect"}),
+    ("Entry Level", {"junior", "jr", "jr.", "entry", "intern", "internship", "graduate", "associate", "trainee"})
+]
+
+# How many resume terms are used as the query, and how much title matches count
+MAX_QUERY_TERMS = 64
+TITLE_BOOST = 3.0
+
+# Field prefixes for title and location terms in the shared inverted index
+TITLE_PREFIX = "t:"
+LOCATION_PREFIX = "l:"
+
+
+def _normalize_level(value: Optional[str], title: str) -> str:
+    """Map a posting's stated or implied seniority onto EXPERIENCE_LEVELS."""
+    if value:
+        lowered = value.lower()
+        for level in EXPERIENCE_LEVELS:
+            if level.split()[0].lower() in lowered:
+                return level
+        if "junior" in lowered or "intern" in lowered:
+            return "Entry Level"
+    title_tokens = set(tokenize(title, keep_stopwords=True))
+    for level, keywords in _LEVEL_KEYWORDS:
+        if title_tokens & keywords:
+            return level
+    return "Mid Level"
+
+
+def _normalize_industry(value: Optional[str]) -> str:
+    """Map a posting's industry onto INDUSTRIES."""
+    if value:
+        for industry in INDUSTRIES:
+            if industry.lower() in value.lower():
+                return industry
+    return "Other"
+
+
+def _normalize_posting(record: Dict[str, Any], fallback_id: str) -> Dict[str, Any]:
+    """Bring a JSONL/CSV record into the shape stored in the index."""
+    skills = record.get("skills") or []
+    if isinstance(skills, str):
+        skills = [skill.strip() for skill in skills.split(",") if skill.strip()]
+    title = record.get("title") or record.get("job_title") or ""
+    return {
+        "job_id": str(record.get("id") or record.get("job_id") or fallback_id),
+        "title": title,
+        "company": record.get("company") or "",
+        "location": record.get("location") or "",
+        "description": record.get("description") or record.get("job_description") or "",
+        "skills": skills,
+        "experience_level": _normalize_level(record.get("experience_level"), title),
+        "industry": _normalize_industry(record.get("industry")),
+        "url": record.get("url") or ""
+    }
+
+
+def read_postings(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream job postings from JSONL and CSV files, or directories of them.
+
+    Recognized fields: id, title, company, location, description (or
+    job_description), skills (list or comma-separated), experience_level,
+    industry and url.
+
+    Args:
+        paths (Iterable[str]): Files or directories
+
+    Yields:
+        Dict[str, Any]: Normalized postings
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith((".jsonl", ".csv")))
+            yield from read_postings(files)
+            continue
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                for row_number, record in enumerate(csv.DictReader(f), 1):
+                    yield _normalize_posting(record, f"{os.path.basename(path)}:{row_number}")
+            else:
+                for line_number, line in enumerate(f, 1):
+                    if line.strip():
+                        yield _normalize_posting(json.loads(line), f"{os.path.basename(path)}:{line_number}")
+
+
+class JobIndex:
+    """
+    Local job-matching engine: BM25 over job titles, skills, descriptions and locations.
+
+    The inverted index and the filter columns live in NumPy arrays; the postings
+    themselves are kept in an SQLite table and only the top results are read back,
+    so memory stays proportional to the index rather than to the posting texts.
+    """
+
+    def __init__(self, path: str, bm25: BM25Index, levels: np.ndarray, industries: np.ndarray):
+        self.path = path
+        self.bm25 = bm25
+        self.levels = levels
+        self.industries = industries
+        self._conn = sqlite3.connect(os.path.join(path, "jobs.sqlite3"), check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.bm25.doc_count
+
+    @staticmethod
+    def _posting_tokens(posting: Dict[str, Any]) -> List[str]:
+        title_tokens = tokenize(posting["title"])
+        tokens = title_tokens + tokenize(" ".join(posting["skills"])) + tokenize(posting["description"])
+        tokens += [TITLE_PREFIX + token for token in title_tokens]
+        tokens += [LOCATION_PREFIX + token for token in tokenize(posting["location"])]
+        return tokens
+
+    @classmethod
+    def build(cls, postings: Iterable[Dict[str, Any]], path: str = JOB_INDEX_PATH) -> "JobIndex":
+        """
+        Build an index from postings and save it to a directory.
+
+        Args:
+            postings (Iterable[Dict[str, Any]]): Postings, e.g. from read_postings()
+            path (str): Directory to write the index to
+
+        Returns:
+            JobIndex: The built index
+        """
+        os.makedirs(path, exist_ok=True)
+        db_path = os.path.join(path, "jobs.sqlite3")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE jobs (doc_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+
+        bm25 = BM25Index()
+        levels, industries, batch = [], [], []
+        for posting in postings:
+            doc_id = bm25.add(cls._posting_tokens(posting))
+            levels.append(EXPERIENCE_LEVELS.index(posting["experience_level"]))
+            industries.append(INDUSTRIES.index(posting["industry"]))
+            batch.append((doc_id, json.dumps(posting, ensure_ascii=False)))
+            if len(batch) >= 10000:
+                conn.executemany("INSERT INTO jobs VALUES (?, ?)", batch)
+                batch = []
+        conn.executemany("INSERT INTO jobs VALUES (?, ?)", batch)
+        conn.commit()
+        conn.close()
+        bm25.finalize()
+
+        levels = np.array(levels, dtype=np.uint8)
+        industries = np.array(industries, dtype=np.uint8)
+        np.savez(os.path.join(path, "index.npz"), levels=levels, industries=industries, **bm25.to_arrays())
+        with open(os.path.join(path, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(bm25.vocabulary, f, ensure_ascii=False)
+        return cls(path, bm25, levels, industries)
+
+    @classmethod
+    def load(cls, path: str = JOB_INDEX_PATH) -> "JobIndex":
+        """
+        Load an index saved by build().
+
+        Args:
+            path (str): Index directory
+
+        Returns:
+            JobIndex: The loaded index
+        """
+        with open(os.path.join(path, "vocabulary.json"), "r", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        arrays = dict(np.load(os.path.join(path, "index.npz")))
+        bm25 = BM25Index.from_arrays(vocabulary, arrays)
+        return cls(path, bm25, arrays["levels"], arrays["industries"])
+
+    def _filter_mask(self, location: str, experience_level: Optional[str], industries: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Boolean mask of postings passing every filter, or None when nothing is filtered."""
+        mask = None
+        if experience_level:
+            mask = self.levels == EXPERIENCE_LEVELS.index(experience_level)
+        if industries:
+            codes = [INDUSTRIES.index(industry) for industry in industries]
+            industry_mask = np.isin(self.industries, codes)
+            mask = industry_mask if mask is None else mask & industry_mask
+        location_tokens = tokenize(location)
+        if location_tokens:
+            location_mask = np.zeros(len(self), dtype=bool)
+            location_mask[self.bm25.postings(LOCATION_PREFIX + location_tokens[0])] = True
+            for token in location_tokens[1:]:
+                token_mask = np.zeros(len(self), dtype=bool)
+                token_mask[self.bm25.postings(LOCATION_PREFIX + token)] = True
+                location_mask &= token_mask
+            mask = location_mask if mask is None else mask & location_mask
+        return mask
+
+    def _fetch(self, doc_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not doc_ids:
+            return {}
+        placeholders = ",".join("?" * len(doc_ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT doc_id, data FROM jobs WHERE doc_id IN ({placeholders})", doc_ids).fetchall()
+        return {doc_id: json.loads(data) for doc_id, data in rows}
+
+    def search(self, resume_text: str, job_title: str = "", location: str = "", experience_level: Optional[str] = None,
+               industries: Optional[List[str]] = None, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Rank postings against a resume.
+
+        Args:
+            resume_text (str): The resume text, used as the query
+            job_title (str): Desired job title; matches against posting titles are boosted
+            location (str): Only postings whose location contains all of these words
+            experience_level (str): Only postings at this level (one of EXPERIENCE_LEVELS)
+            industries (List[str]): Only postings in these industries (from INDUSTRIES)
+            top_k (int): Number of results
+
+        Returns:
+            List[Dict[str, Any]]: Postings, best first, each with "score", "match_score"
+            (share of the posting's title and skill terms found in the resume, 0-1)
+            and "matched_terms"
+        """
+        weights = self.bm25.query_weights(tokenize(resume_text), MAX_QUERY_TERMS)
+        for token in tokenize(job_title):
+            weights[TITLE_PREFIX + token] = weights.get(TITLE_PREFIX + token, 0) + TITLE_BOOST
+            weights[token] = weights.get(token, 0) + 1
+
+        ranked = self.bm25.search(weights, top_k, self._filter_mask(location, experience_level, industries))
+        postings = self._fetch([doc_id for doc_id, _ in ranked])
+        resume_tokens = set(tokenize(resume_text))
+
+        results = []
+        for doc_id, score in ranked:
+            posting = postings[doc_id]
+            key_terms = set(tokenize(posting["title"] + " " + " ".join(posting["skills"])))
+            matched = sorted(key_terms & resume_tokens)
+            posting["score"] = round(score, 4)
+            posting["match_score"] = round(len(matched) / len(key_terms), 3) if key_terms else 0.0
+            posting["matched_terms"] = matched
+            results.append(posting)
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build and query the local job index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Index JSONL/CSV job postings")
+    build_parser.add_argument("sources", nargs="+", help="JSONL/CSV files or directories of them")
+    build_parser.add_argument("--out", default=JOB_INDEX_PATH, help="Index directory")
+    search_parser = subparsers.add_parser("search", help="Rank postings against a resume")
+    search_parser.add_argument("resume", help="Resume as a .pdf or text file")
+    search_parser.add_argument("--index", default=JOB_INDEX_PATH, help="Index directory")
+    search_parser.add_argument("--title", default="", help="Desired job title")
+    search_parser.add_argument("--location", default="", help="Preferred location")
+    search_parser.add_argument("--level", choices=EXPERIENCE_LEVELS, help="Experience level")
+    search_parser.add_argument("--industry", action="append", choices=INDUSTRIES, help="Industry (repeatable)")
+    search_parser.add_argument("--top", type=int, default=10, help="Number of results")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = JobIndex.build(read_postings(args.sources), args.out)
+        print(f"Indexed {len(index)} postings in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    if args.resume.lower().endswith(".pdf"):
+        from pdf_text import extract_pdf_text
+        resume_text = extract_pdf_text(args.resume)
+    else:
+        with open(args.resume, "r", encoding="utf-8") as f:
+            resume_text = f.read()
+    index = JobIndex.load(args.index)
+    start = time.perf_counter()
+    results = index.search(resume_text, args.title, args.location, args.level, args.industry, args.top)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for result in results:
+        result.pop("description", None)
+        print(json.dumps(result, ensure_ascii=False))
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,534 @@
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+import subprocess
+from typing import Any, Dict, List, Optional
+from resume_storage import RESUME_FOLDER, RESUME_PERSIST_MODE
+from shared_resources import registry, load_environment
+from tracing import trace
+
+logger = logging.getLogger(__name__)
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# SQLite file holding the queued, running and finished tailoring jobs
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(RESUME_FOLDER, "jobs.sqlite3"))
+# "embedded": the app starts its own worker processes; "external": run `python job_queue.py worker` separately
+JOB_QUEUE_MODE = os.getenv("JOB_QUEUE_MODE", "embedded").lower()
+# Worker processes started by the app in embedded mode
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", 2))
+# How often idle workers look for jobs and pages poll for progress
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 0.5))
+# A running job whose worker hasn't reported for this long is assumed lost and requeued.
+# Several heartbeat intervals, so a few missed heartbeats don't requeue a running job.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 600))
+# How often a worker refreshes a running job's heartbeat, independent of its stages
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+# Attempts before a job that keeps losing its worker is failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 2))
+# Finished jobs are deleted after this long; their results stay in Resume/
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 24 * 3600))
+# Minimum seconds between partial resume updates while a resume is generated
+PARTIAL_UPDATE_SECONDS = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Pipeline stages a job reports, with the progress shown when the stage starts
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "analyzing": 0.1,
+    "updating": 0.1,
+    "tailoring": 0.1,
+    "generating": 0.4,
+    "rendering": 0.8,
+    "saving": 0.9,
+    "done": 1.0
+}
+
+# Columns holding JSON
+_JSON_COLUMNS = ("options", "previous", "analysis", "trace")
+
+
+class LostClaimError(RuntimeError):
+    """Raised when a worker's claim on a job was taken away, e.g. the job was requeued as stale."""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of tailoring jobs, shared by the app and the worker processes.
+
+    Each job row carries its inputs, the stage it has reached, the resume text
+    generated so far and, once done, the analysis, the tailored resume and the
+    Resume/ folder it was saved to. Every process opens its own connection;
+    WAL mode lets pages read progress while a worker writes.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    user_name TEXT NOT NULL,
+                    resume_text TEXT NOT NULL,
+                    job_description TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    fast_mode INTEGER NOT NULL DEFAULT 0,
+                    incremental INTEGER NOT NULL DEFAULT 0,
+                    previous TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat REAL,
+                    finished_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    partial_resume TEXT,
+                    analysis TEXT,
+                    tailored_resume TEXT,
+                    folder TEXT,
+                    error TEXT,
+                    trace TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status_time ON jobs (status, created_at);
+            """)
+            # Queues created before incremental re-tailoring lack its columns
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "incremental" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN incremental INTEGER NOT NULL DEFAULT 0")
+            if "previous" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN previous TEXT")
+            self._conn.commit()
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        job["fast_mode"] = bool(job["fast_mode"])
+        job["incremental"] = bool(job["incremental"])
+        return job
+
+    def submit(self, resume_text: str, job_description: str, options: Dict[str, bool],
+               fast_mode: bool = False, user_name: str = "Anonymous", incremental: bool = False,
+               previous: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Queue a tailoring job.
+
+        Args:
+            resume_text (str): The resume to tailor
+            job_description (str): The job description to tailor it for
+            options (Dict[str, bool]): Tailoring preferences
+            fast_mode (bool): Use the single-call pipeline (tailor_and_generate_resume)
+            user_name (str): Name used for the Resume/ folder
+            incremental (bool): Update the closest previous run of this resume instead
+                of tailoring from scratch, when the change is small enough
+            previous (Dict[str, Any]): The session's last run, tried before the runs in Resume/
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO jobs (id, status, stage, user_name, resume_text, job_description, options, fast_mode,
+                                  incremental, previous, created_at)
+                VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, QUEUED, user_name, resume_text, job_description, json.dumps(options), int(fast_mode),
+                  int(incremental), json.dumps(previous) if previous is not None else None, time.time()))
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's row with JSON columns decoded, or None if the id is unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+
+    def position(self, job_id: str) -> int:
+        """Number of queued jobs that will be picked up before this one."""
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT COUNT(*) FROM jobs
+                WHERE status = ? AND created_at < (SELECT created_at FROM jobs WHERE id = ?)
+            """, (QUEUED, job_id)).fetchone()
+        return row[0]
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job.
+
+        A single UPDATE marks the job running with a claim token, so two workers
+        can never take the same job.
+
+        Args:
+            worker (str): Name of the claiming worker, e.g. "host:pid"
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed job, or None if the queue is empty
+        """
+        token = f"{worker}/{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat = ?, attempts = attempts + 1
+                WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) AND status = ?
+            """, (RUNNING, token, now, now, QUEUED, QUEUED))
+            self._conn.commit()
+            row = self._conn.execute("SELECT * FROM jobs WHERE worker = ? AND status = ?", (token, RUNNING)).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+
+    def update(self, job_id: str, worker: str, **fields: Any) -> bool:
+        """
+        Record a running job's progress; also refreshes its heartbeat.
+
+        Args:
+            job_id (str): The job
+            worker (str): The claim token the job was claimed with (the job's "worker")
+            **fields: Columns to set, e.g. stage="generating" or partial_resume=text.
+                Setting stage also sets the stage's progress.
+
+        Returns:
+            bool: False if the job is no longer running under this claim and nothing was written
+        """
+        if "stage" in fields and "progress" not in fields:
+            fields["progress"] = STAGE_PROGRESS.get(fields["stage"], 0.0)
+        fields["heartbeat"] = time.time()
+        for column in _JSON_COLUMNS:
+            if column in fields and fields[column] is not None:
+                fields[column] = json.dumps(fields[column], default=str)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            updated = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = ?",
+                list(fields.values()) + [job_id, worker, RUNNING]
+            ).rowcount
+            self._conn.commit()
+        return updated > 0
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Refresh a running job's heartbeat; False if the claim no longer holds."""
+        return self.update(job_id, worker)
+
+    def finish(self, job_id: str, worker: str, analysis: Dict[str, Any], tailored_resume: str, folder: Optional[str],
+               job_trace: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a job done with its results; False if the claim no longer holds."""
+        return self.update(job_id, worker, status=DONE, stage="done", analysis=analysis, tailored_resume=tailored_resume,
+                           partial_resume=None, folder=folder, trace=job_trace, finished_at=time.time())
+
+    def fail(self, job_id: str, worker: str, error: str, job_trace: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a job failed; False if the claim no longer holds."""
+        return self.update(job_id, worker, status=FAILED, error=error, trace=job_trace, finished_at=time.time())
+
+    def requeue_stale(self, stale_seconds: float = JOB_STALE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Requeue running jobs whose worker stopped reporting, e.g. because it was killed.
+
+        Jobs that already used max_attempts are failed instead.
+
+        Returns:
+            int: Number of jobs requeued or failed
+        """
+        cutoff = time.time() - stale_seconds
+        with self._lock:
+            failed = self._conn.execute("""
+                UPDATE jobs SET status = ?, error = 'Worker stopped responding', finished_at = ?
+                WHERE status = ? AND heartbeat < ? AND attempts >= ?
+            """, (FAILED, time.time(), RUNNING, cutoff, max_attempts)).rowcount
+            requeued = self._conn.execute("""
+                UPDATE jobs SET status = ?, stage = 'queued', progress = 0, worker = NULL, partial_resume = NULL
+                WHERE status = ? AND heartbeat < ?
+            """, (QUEUED, RUNNING, cutoff)).rowcount
+            self._conn.commit()
+        return failed + requeued
+
+    def prune(self, retention_seconds: float = JOB_RETENTION_SECONDS) -> int:
+        """Delete finished jobs older than the retention period; returns how many."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - retention_seconds)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+def get_queue() -> JobQueue:
+    """Return this process's connection to the job queue, opening it on first use."""
+    return registry.get(f"job_queue:{JOB_QUEUE_PATH}", lambda: JobQueue(JOB_QUEUE_PATH))
+
+
+class _HeartbeatTimer:
+    """
+    Background thread refreshing a running job's heartbeat.
+
+    Keeps a job that spends longer than JOB_STALE_SECONDS in one stage (a slow
+    generation plus retries) from being requeued while its worker still runs it.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: str, worker: str, interval: float = JOB_HEARTBEAT_SECONDS):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id[:8]}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.job_id, self.worker):
+                    self.lost.set()
+                    return
+            except sqlite3.Error:
+                logger.warning("Heartbeat for job %s failed", self.job_id, exc_info=True)
+
+    def __enter__(self) -> "_HeartbeatTimer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(queue: JobQueue, job: Dict[str, Any]) -> None:
+    """
+    Run one claimed job through analyze, generate, render and save, reporting each stage.
+
+    An incremental job whose inputs are close to the session's last run or a
+    recent run of the same resume in Resume/ updates that run instead
+    (resume_agent.retailor_resume); otherwise the full pipeline runs.
+
+    The generated resume is written to the job row as it streams in, so a page
+    polling the job can show it live. The run is saved to Resume/ like an
+    interactive one (unless RESUME_PERSIST_MODE is "off").
+
+    Every write is made under the job's claim token. If the claim is lost (the
+    job was requeued as stale and possibly claimed by another worker), the job
+    stops at its next write without saving or reporting anything.
+
+    Args:
+        queue (JobQueue): The queue the job was claimed from
+        job (Dict[str, Any]): The claimed job
+    """
+    from resume_agent import tailor_resume, stream_tailored_resume_text, tailor_and_generate_resume, retailor_resume
+    from tailoring_diff import choose_previous_run, find_previous_runs
+    from resume_pdf import render_resume_pdf
+    from resume_storage import persist_resume_run
+
+    job_id, worker = job["id"], job["worker"]
+    resume_text, job_description, options = job["resume_text"], job["job_description"], job["options"]
+    job_trace = None
+    heartbeat = _HeartbeatTimer(queue, job_id, worker)
+
+    def report(**fields: Any) -> None:
+        if heartbeat.lost.is_set() or not queue.update(job_id, worker, **fields):
+            raise LostClaimError(f"Job {job_id} is no longer claimed by {worker}")
+
+    try:
+        with heartbeat, trace("tailor_job", job_id=job_id, fast_mode=job["fast_mode"], attempt=job["attempts"]) as job_trace:
+            previous = delta = None
+            if job["incremental"]:
+                candidates = ([job["previous"]] if job["previous"] else []) + find_previous_runs(resume_text, job["user_name"])
+                previous, delta = choose_previous_run(candidates, resume_text, job_description, options)
+                job_trace.root.set(candidate_runs=len(candidates), reused_run=previous is not None,
+                                   incremental_reason=delta.reason if delta is not None else "no previous run")
+
+            if previous is not None:
+                report(stage="updating")
+                analysis, tailored_resume = retailor_resume(previous, resume_text, job_description, options, delta)
+            elif job["fast_mode"]:
+                report(stage="tailoring")
+                analysis, tailored_resume = tailor_and_generate_resume(resume_text, job_description, options)
+            else:
+                report(stage="analyzing")
+                analysis = tailor_resume(resume_text, job_description, options)
+                report(stage="generating", analysis=analysis)
+                chunks: List[str] = []
+                last_update = time.monotonic()
+                for chunk in stream_tailored_resume_text(resume_text, job_description, analysis):
+                    chunks.append(chunk)
+                    if time.monotonic() - last_update >= PARTIAL_UPDATE_SECONDS:
+                        report(partial_resume="".join(chunks))
+                        last_update = time.monotonic()
+                tailored_resume = "".join(chunks)
+
+            report(stage="rendering", analysis=analysis, partial_resume=tailored_resume)
+            pdf_bytes = render_resume_pdf(tailored_resume) if tailored_resume else None
+
+            report(stage="saving")
+            # The worker is already off the request path, so the run is written before the job is marked done
+            saved = persist_resume_run(
+                resume_text, job_description, tailored_resume, analysis,
+                user_name=job["user_name"], extra={"options": options}, pdf_bytes=pdf_bytes,
+                mode="off" if RESUME_PERSIST_MODE == "off" else "sync"
+            )
+            folder = saved.result() if saved is not None else None
+    except LostClaimError:
+        logger.warning("Tailoring job %s was requeued while %s ran it; abandoning it", job_id, worker)
+        return
+    except Exception as e:
+        logger.exception("Tailoring job %s failed", job_id)
+        queue.fail(job_id, worker, f"{type(e).__name__}: {e}", job_trace.to_dict() if job_trace is not None else None)
+        return
+    if not queue.finish(job_id, worker, analysis, tailored_resume, folder, job_trace.to_dict()):
+        logger.warning("Tailoring job %s was requeued while %s ran it; its result was not recorded", job_id, worker)
+
+
+def worker_loop(path: str = JOB_QUEUE_PATH, poll_seconds: float = JOB_POLL_SECONDS, parent_pid: Optional[int] = None) -> None:
+    """
+    Take and run jobs until the parent process goes away; the body of every worker process.
+
+    Args:
+        path (str): The job queue file
+        poll_seconds (float): Sleep between looks at an empty queue
+        parent_pid (int): Exit once this process is no longer the parent, e.g. the app stopped
+    """
+    load_environment()
+    queue = JobQueue(path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Tailoring worker %s started", worker)
+    last_maintenance = 0.0
+    while parent_pid is None or os.getppid() == parent_pid:
+        if time.monotonic() - last_maintenance >= 60:
+            queue.requeue_stale()
+            queue.prune()
+            last_maintenance = time.monotonic()
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(poll_seconds)
+            continue
+        run_job(queue, job)
+
+
+class WorkerPool:
+    """
+    Worker processes, each running `python job_queue.py worker --single`.
+
+    Workers are fresh interpreters rather than forks or multiprocessing
+    children: a fork would inherit the app's threads, event loop and open
+    HTTP connections, and multiprocessing's spawn would re-run the Streamlit
+    page, which Streamlit installs as __main__. Each worker exits on its own
+    when the process that started it does.
+    """
+
+    def __init__(self, workers: int = JOB_QUEUE_WORKERS, path: str = JOB_QUEUE_PATH):
+        self.workers = workers
+        self.path = path
+        self._lock = threading.Lock()
+        self.processes: List[subprocess.Popen] = []
+
+    def ensure_running(self) -> None:
+        """Start missing workers and replace any that exited."""
+        with self._lock:
+            self.processes = [process for process in self.processes if process.poll() is None]
+            while len(self.processes) < self.workers:
+                self.processes.append(subprocess.Popen([
+                    sys.executable, os.path.abspath(__file__), "worker", "--single",
+                    "--path", self.path, "--parent-pid", str(os.getpid())
+                ]))
+
+    def stop(self) -> None:
+        with self._lock:
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                process.wait()
+            self.processes = []
+
+
+def ensure_workers() -> Optional[WorkerPool]:
+    """
+    Make sure this process's worker pool is running, in embedded mode.
+
+    Called before submitting or polling a job; cheap when the workers are up.
+
+    Returns:
+        Optional[WorkerPool]: The pool, or None when workers run externally
+    """
+    if JOB_QUEUE_MODE != "embedded" or JOB_QUEUE_WORKERS <= 0:
+        return None
+    def start() -> WorkerPool:
+        pool = WorkerPool(JOB_QUEUE_WORKERS, JOB_QUEUE_PATH)
+        atexit.register(pool.stop)
+        return pool
+
+    pool = registry.get("job_workers", start)
+    pool.ensure_running()
+    return pool
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run tailoring workers or inspect the job queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Run worker processes until interrupted")
+    worker_parser.add_argument("--workers", type=int, default=JOB_QUEUE_WORKERS, help="Worker processes")
+    worker_parser.add_argument("--single", action="store_true", help="Run one worker in this process")
+    worker_parser.add_argument("--path", default=JOB_QUEUE_PATH, help="Job queue file")
+    worker_parser.add_argument("--parent-pid", type=int, help="Exit when this process is no longer the parent")
+    status_parser = subparsers.add_parser("status", help="Show job counts, or one job")
+    status_parser.add_argument("job_id", nargs="?", help="Job to show")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        logging.basicConfig(level=logging.INFO)
+        if args.single:
+            try:
+                worker_loop(args.path, parent_pid=args.parent_pid)
+            except KeyboardInterrupt:
+                pass
+            return 0
+        pool = WorkerPool(args.workers, args.path)
+        pool.ensure_running()
+        print(f"{args.workers} tailoring workers on {args.path}")
+        try:
+            while True:
+                time.sleep(5)
+                pool.ensure_running()
+        except KeyboardInterrupt:
+            pool.stop()
+        return 0
+
+    queue = JobQueue(JOB_QUEUE_PATH)
+    if args.job_id:
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"Unknown job {args.job_id}")
+            return 1
+        summary = {key: value for key, value in job.items() if key not in ("resume_text", "job_description", "partial_resume", "previous", "trace")}
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(queue.counts()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
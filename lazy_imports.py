@@ -0,0 +1,224 @@
+import os
+import re
+import ast
+import sys
+import json
+import logging
+import argparse
+import importlib
+import threading
+import statistics
+import subprocess
+from types import ModuleType
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entry points profiled by default
+ENTRY_POINTS = ["app.py", "pages/1_Tailor_Resume.py", "pages/2_Job_Hunting.py", "pages/3_Resume_Chat.py"]
+
+_prefetched: Set[str] = set()
+_prefetch_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Pages use it for modules that pull in LangChain, PyPDF2 or fpdf, so the
+    page renders before those are loaded. importlib's own import locks make
+    concurrent first use from several sessions safe.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attribute: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None or self._name in sys.modules else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    A module that is imported when first used, e.g. `resume_agent = lazy_module("resume_agent")`.
+
+    Args:
+        name (str): Module name
+
+    Returns:
+        LazyModule: Proxy forwarding attribute access to the module
+    """
+    return LazyModule(name)
+
+
+def prefetch(*names: str) -> None:
+    """
+    Import modules in a background thread, once per process.
+
+    Called once a page has rendered, so the heavy modules are usually loaded
+    by the time the user first needs them.
+
+    Args:
+        *names (str): Module names
+    """
+    with _prefetch_lock:
+        pending = [name for name in names if name not in _prefetched and name not in sys.modules]
+        _prefetched.update(pending)
+    if not pending:
+        return
+
+    def load():
+        for name in pending:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning("Prefetching %s failed: %s", name, e)
+
+    threading.Thread(target=load, name="module-prefetch", daemon=True).start()
+
+
+def script_imports(path: str) -> Tuple[List[str], List[str]]:
+    """
+    The modules an entry script imports at startup, and those it loads lazily.
+
+    Args:
+        path (str): A Streamlit script, e.g. "pages/1_Tailor_Resume.py"
+
+    Returns:
+        Tuple[List[str], List[str]]: Module-level imports, and the names passed to lazy_module()
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    eager, deferred = [], []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            eager.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            eager.append(node.module)
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "lazy_module"
+                and node.args and isinstance(node.args[0], ast.Constant)):
+            deferred.append(node.args[0].value)
+    return list(dict.fromkeys(eager)), list(dict.fromkeys(deferred))
+
+
+# Runs in a fresh interpreter: time the startup imports, then the deferred ones on top
+_TIMING_SCRIPT = """
+import sys, json, time, importlib
+eager, deferred = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+start = time.perf_counter()
+for name in eager:
+    importlib.import_module(name)
+startup = time.perf_counter() - start
+loaded = len(sys.modules)
+start = time.perf_counter()
+for name in deferred:
+    importlib.import_module(name)
+print(json.dumps({"startup": startup, "deferred": time.perf_counter() - start,
+                  "startup_modules": loaded, "total_modules": len(sys.modules)}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _measure(eager: List[str], deferred: List[str]) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-c", _TIMING_SCRIPT, json.dumps(eager), json.dumps(deferred)],
+        capture_output=True, text=True, check=True, env=env
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(modules: List[str], top: int = 10) -> List[Tuple[str, float]]:
+    """
+    The top-level packages that take longest to import, from `python -X importtime`.
+
+    Args:
+        modules (List[str]): Modules imported together
+        top (int): Number of packages to return
+
+    Returns:
+        List[Tuple[str, float]]: Package name and cumulative milliseconds, slowest first
+    """
+    if not modules:
+        return []
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True
+    )
+    requested = {name.split(".")[0] for name in modules}
+    totals: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Depth 1 entries carry the cumulative cost of everything they pulled in;
+        # the interpreter's own startup modules (site, encodings) are left out
+        if match and len(match.group(3)) == 1 and match.group(4).split(".")[0] in requested:
+            package = match.group(4).split(".")[0]
+            totals[package] = totals.get(package, 0.0) + int(match.group(2)) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def profile_entry_point(path: str, repeat: int = 3) -> Dict[str, object]:
+    """
+    Measure the import cost of an entry script in fresh interpreters.
+
+    Args:
+        path (str): Streamlit script
+        repeat (int): Runs to take the median of
+
+    Returns:
+        Dict[str, object]: Median "startup_ms" (module-level imports), "deferred_ms"
+        (lazy modules, paid on first use or by prefetch), "eager_ms" (both, as
+        if everything were imported up front) and the module counts
+    """
+    eager, deferred = script_imports(path)
+    runs = [_measure(eager, deferred) for _ in range(repeat)]
+    startup = statistics.median(run["startup"] for run in runs) * 1000
+    deferred_ms = statistics.median(run["deferred"] for run in runs) * 1000
+    return {
+        "entry_point": path,
+        "startup_imports": eager,
+        "deferred_imports": deferred,
+        "startup_ms": round(startup, 1),
+        "deferred_ms": round(deferred_ms, 1),
+        "eager_ms": round(startup + deferred_ms, 1),
+        "startup_modules": runs[0]["startup_modules"],
+        "total_modules": runs[0]["total_modules"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import-time cost of the Streamlit entry points.")
+    parser.add_argument("scripts", nargs="*", default=ENTRY_POINTS, help="Entry scripts to profile")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per script (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest startup packages to list per script")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = []
+    print(f"{'entry point':>28} {'startup ms':>11} {'deferred ms':>12} {'all-eager ms':>13} {'modules':>9}")
+    for path in args.scripts:
+        profile = profile_entry_point(path, args.repeat)
+        profile["heaviest_startup_imports"] = heaviest_imports(profile["startup_imports"], args.top)
+        report.append(profile)
+        print(f"{path:>28} {profile['startup_ms']:>11.1f} {profile['deferred_ms']:>12.1f} {profile['eager_ms']:>13.1f} "
+              f"{profile['startup_modules']:>4}/{profile['total_modules']:<4}")
+    for profile in report:
+        heaviest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in profile["heaviest_startup_imports"])
+        print(f"\n{profile['entry_point']}\n  deferred: {', '.join(profile['deferred_imports']) or '-'}\n  heaviest at startup: {heaviest}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
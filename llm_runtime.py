@@ -0,0 +1,143 @@
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+import concurrent.futures
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
+import httpx
+from resilient_transport import ResilientTransport, AsyncResilientTransport
+from shared_resources import registry, load_environment
+
+T = TypeVar("T")
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# Connection pool and concurrency settings for async LLM calls
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 120))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 10))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+
+# Create a custom HTTP client that handles the proxies issue
+class CustomHTTPClient(httpx.Client):
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("proxies", None)  # Remove the 'proxies' argument if present
+        super().__init__(*args, **kwargs)
+
+# Async counterpart of CustomHTTPClient
+class CustomAsyncHTTPClient(httpx.AsyncClient):
+    def __init__(self, *args, **kwargs):
+        kwargs.pop("proxies", None)  # Remove the 'proxies' argument if present
+        super().__init__(*args, **kwargs)
+
+# The pooled client and the semaphore are bound to a single event loop, which runs
+# in a daemon thread so every Streamlit session (each on its own thread) can share them.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_llm_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop that runs async LLM calls, starting it on first use.
+
+    Returns:
+        asyncio.AbstractEventLoop: A loop running forever in a daemon thread
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True)
+            thread.start()
+    return _loop
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS)
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the shared pooled HTTP client used by every synchronous LLM call.
+
+    Requests go through ResilientTransport, which owns retries, deadlines and
+    the circuit breaker. The client is held in the process-wide registry, so
+    every session reuses the same connection pool.
+
+    Returns:
+        httpx.Client: Client configured from the LLM_* connection settings
+    """
+    # Pool limits belong to the wrapped transport; the client ignores them once a transport is given
+    return registry.get("http_client", lambda: CustomHTTPClient(
+        transport=ResilientTransport(httpx.HTTPTransport(limits=_pool_limits())),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+    ))
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared pooled HTTP client used by every async LLM call.
+
+    Returns:
+        httpx.AsyncClient: Client configured from the LLM_* connection settings
+    """
+    return registry.get("async_http_client", lambda: CustomAsyncHTTPClient(
+        transport=AsyncResilientTransport(httpx.AsyncHTTPTransport(limits=_pool_limits())),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+    ))
+
+
+@asynccontextmanager
+async def llm_slot():
+    """Hold one of the LLM_MAX_CONCURRENCY slots for the duration of an API call."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    async with _semaphore:
+        yield
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """
+    Schedule a coroutine on the shared LLM loop from synchronous code.
+
+    Args:
+        coro: The coroutine to run, e.g. atailor_resume(...)
+
+    Returns:
+        concurrent.futures.Future: Future resolving to the coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_llm_loop())
+
+
+def on_llm_loop(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Decorate a coroutine function so it always executes on the shared LLM loop.
+
+    Callers can await the result from any event loop; the pooled client and the
+    semaphore are only ever touched from the loop they belong to. The caller's
+    context variables (e.g. the current trace) are carried over to the loop.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = get_llm_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await func(*args, **kwargs)
+        return await asyncio.wrap_future(submit(_in_context(contextvars.copy_context(), func(*args, **kwargs))))
+    return wrapper
+
+
+async def _in_context(context: contextvars.Context, coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine with the given context's variables set; the task's own context is a copy, so this doesn't leak."""
+    for variable, value in context.items():
+        variable.set(value)
+    return await coro
@@ -0,0 +1,340 @@
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from text_search import tokenize
+from tracing import traced
+
+# Canonical skill -> spellings that count as that skill. Multi-word aliases are
+# matched as token n-grams, so "machine learning" and "ml" both map to one skill.
+# Words that are also ordinary English or name something else ("rest", "spring",
+# "lambda", "shell") only count next to a qualifying word ("rest api", "spring boot").
+SKILL_TAXONOMY = {
+    # Languages
+    "Python": ["python"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript"],
+    "C": ["c programming", "ansi c"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Swift": ["swift programming", "swift developer", "swiftui", "ios swift"],
+    "Kotlin": ["kotlin"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstudio", "tidyverse"],
+    "MATLAB": ["matlab"],
+    "SQL": ["sql", "t-sql", "pl/sql"],
+    "Bash": ["bash", "shell scripting", "shell scripts", "shell script"],
+    # Web and backend
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3", "sass", "scss"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue": ["vue", "vue.js", "vuejs"],
+    "Node.js": ["node.js", "nodejs", "node js"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "spring framework", "spring mvc"],
+    ".NET": ["asp.net", "dotnet", "vb.net"],
+    "REST APIs": ["restful", "rest api", "rest apis", "rest services"],
+    "GraphQL": ["graphql"],
+    "Microservices": ["microservices", "microservice"],
+    # Data
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "NoSQL": ["nosql"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Spark": ["spark", "pyspark", "apache spark"],
+    "Hadoop": ["hadoop"],
+    "Kafka": ["kafka"],
+    "Airflow": ["airflow"],
+    "ETL": ["etl", "elt"],
+    "Data Analysis": ["data analysis", "data analytics", "analytics"],
+    "Data Visualization": ["data visualization", "visualization"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["excel", "microsoft excel", "spreadsheets"],
+    "Statistics": ["statistics", "statistical analysis", "statistical modeling"],
+    # Machine learning
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch", "torch"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit"],
+    "LLMs": ["llm", "llms", "large language models", "generative ai", "genai"],
+    # Cloud and infrastructure
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker", "containers", "containerization"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Linux": ["linux", "unix"],
+    "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git", "github", "gitlab", "version control"],
+    "DevOps": ["devops"],
+    "Serverless": ["serverless", "aws lambda", "lambda functions"],
+    # Practices
+    "Agile": ["agile", "scrum", "kanban"],
+    "Testing": ["testing", "unit testing", "test automation", "tdd", "pytest", "junit", "qa"],
+    "System Design": ["system design", "distributed systems", "software architecture", "system architecture"],
+    "Security": ["security", "cybersecurity", "information security"],
+    "Mobile Development": ["ios", "android", "mobile development"],
+    "UI/UX": ["ui/ux", "ux", "ui design", "user interface", "user experience", "figma"],
+    # Business and soft skills
+    "Project Management": ["project management", "pmp"],
+    "Product Management": ["product management", "product roadmap"],
+    "Leadership": ["leadership", "mentoring", "mentorship", "team lead"],
+    "Communication": ["communication", "presentation", "presentations"],
+    "Collaboration": ["collaboration", "teamwork", "cross-functional"],
+    "Problem Solving": ["problem solving", "problem-solving", "troubleshooting"],
+    "Stakeholder Management": ["stakeholder management", "stakeholders"],
+    "Customer Service": ["customer service", "customer support"],
+    "Sales": ["sales", "business development"],
+    "Marketing": ["marketing", "digital marketing", "seo", "sem"],
+    "Accounting": ["accounting", "bookkeeping", "gaap"],
+    "Financial Analysis": ["financial analysis", "financial modeling", "forecasting", "budgeting"],
+    "Healthcare": ["patient care", "clinical", "ehr", "hipaa"],
+    "Salesforce": ["salesforce", "crm"],
+    "SAP": ["sap"],
+    "Jira": ["jira", "confluence"]
+}
+
+# Job-ad boilerplate that says nothing about the role's requirements
+KEYWORD_STOPWORDS = frozenset("""
+ability able apply applicant applicants benefits candidate candidates company description employer equal
+excellent experience experienced including job looking must new opportunity plus position preferred required
+requirements responsibilities role salary skills strong team teams understanding using work working year years
+join well knowledge related field degree bachelor bachelors etc e.g i.e across within help make ensure based
+""".split())
+
+# Keywords reported per job, ranked by TF-IDF weight
+MAX_KEYWORDS = 15
+
+# Weights of the section scores in overall_match_score
+SKILLS_WEIGHT = 0.5
+KEYWORDS_WEIGHT = 0.3
+EXPERIENCE_WEIGHT = 0.2
+
+_SKILL_NAMES = list(SKILL_TAXONOMY)
+_ALIAS_TO_SKILL = {
+    tuple(tokenize(alias, keep_stopwords=True)): index
+    for index, aliases in enumerate(SKILL_TAXONOMY.values())
+    for alias in aliases
+}
+# Longest alias starting with each token, so most tokens need a single lookup
+_ALIAS_LENGTHS: Dict[str, int] = {}
+for _alias in _ALIAS_TO_SKILL:
+    _ALIAS_LENGTHS[_alias[0]] = max(_ALIAS_LENGTHS.get(_alias[0], 0), len(_alias))
+
+
+def extract_skill_ids(text: str) -> List[int]:
+    """
+    Find the taxonomy skills mentioned in a text.
+
+    Args:
+        text (str): Resume or job description
+
+    Returns:
+        List[int]: Sorted indexes into SKILL_TAXONOMY
+    """
+    tokens = tokenize(text, keep_stopwords=True)
+    found = set()
+    for start, token in enumerate(tokens):
+        for length in range(1, min(_ALIAS_LENGTHS.get(token, 0), len(tokens) - start) + 1):
+            skill = _ALIAS_TO_SKILL.get(tuple(tokens[start:start + length]))
+            if skill is not None:
+                found.add(skill)
+    return sorted(found)
+
+
+def extract_skills(text: str) -> List[str]:
+    """
+    Find the taxonomy skills mentioned in a text.
+
+    Args:
+        text (str): Resume or job description
+
+    Returns:
+        List[str]: Canonical skill names
+    """
+    return [_SKILL_NAMES[index] for index in extract_skill_ids(text)]
+
+
+def _keyword_tokens(text: str) -> List[str]:
+    return [token for token in tokenize(text) if token not in KEYWORD_STOPWORDS and not token.isdigit() and len(token) > 1]
+
+
+def score_batch(resume_text: str, job_descriptions: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Score one resume against many job descriptions in a single vectorized pass.
+
+    Skills: the taxonomy skills each job mentions form a jobs x skills indicator
+    matrix; the share of them also found in the resume is the skills score.
+    Keywords: job terms form a sparse jobs x terms TF-IDF matrix (in COO arrays,
+    with idf taken over the batch); the share of each job's keyword weight the
+    resume covers is the keyword score.
+
+    Args:
+        resume_text (str): The resume
+        job_descriptions (Sequence[str]): Job descriptions
+
+    Returns:
+        List[Dict[str, Any]]: Per job, "skills_analysis" and "keyword_analysis"
+        with matching/missing lists and a 0-1 "match_score", plus "overall_match_score"
+    """
+    job_count = len(job_descriptions)
+    if job_count == 0:
+        return []
+
+    # Skills: dense indicator matrix, the taxonomy is small
+    resume_skills = np.zeros(len(_SKILL_NAMES), dtype=bool)
+    resume_skills[extract_skill_ids(resume_text)] = True
+    job_skills = np.zeros((job_count, len(_SKILL_NAMES)), dtype=bool)
+    for row, description in enumerate(job_descriptions):
+        job_skills[row, extract_skill_ids(description)] = True
+    matched_skills = job_skills & resume_skills
+    required_counts = job_skills.sum(axis=1)
+    skill_scores = np.divide(matched_skills.sum(axis=1), required_counts,
+                             out=np.zeros(job_count), where=required_counts > 0)
+
+    # Keywords: sparse term-frequency matrix in COO form
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for row, description in enumerate(job_descriptions):
+        term_counts: Dict[int, int] = {}
+        for token in _keyword_tokens(description):
+            term_id = vocabulary.setdefault(token, len(vocabulary))
+            term_counts[term_id] = term_counts.get(term_id, 0) + 1
+        rows.extend([row] * len(term_counts))
+        cols.extend(term_counts)
+        counts.extend(term_counts.values())
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    document_freqs = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + job_count) / (1 + document_freqs)) + 1
+    weights = (1 + np.log(np.array(counts, dtype=np.float64))) * idf[cols]
+
+    resume_terms = np.zeros(len(vocabulary), dtype=bool)
+    resume_terms[[vocabulary[token] for token in set(tokenize(resume_text)) if token in vocabulary]] = True
+    found = resume_terms[cols]
+    total_weight = np.bincount(rows, weights=weights, minlength=job_count)
+    found_weight = np.bincount(rows, weights=weights * found, minlength=job_count)
+    keyword_scores = np.divide(found_weight, total_weight, out=np.zeros(job_count), where=total_weight > 0)
+
+    # Jobs that mention no taxonomy skill are scored on keywords alone
+    skill_scores = np.where(required_counts > 0, skill_scores, keyword_scores)
+    overall_scores = (SKILLS_WEIGHT * skill_scores + KEYWORDS_WEIGHT * keyword_scores) / (SKILLS_WEIGHT + KEYWORDS_WEIGHT)
+
+    # Top keywords per job: order the COO entries by job, then by descending weight
+    terms = np.array(list(vocabulary), dtype=object) if vocabulary else np.empty(0, dtype=object)
+    order = np.lexsort((-weights, rows))
+    boundaries = np.searchsorted(rows[order], np.arange(job_count + 1))
+
+    results = []
+    for row in range(job_count):
+        top = order[boundaries[row]:boundaries[row + 1]][:MAX_KEYWORDS]
+        results.append({
+            "skills_analysis": {
+                "matching_skills": [_SKILL_NAMES[i] for i in np.flatnonzero(matched_skills[row])],
+                "missing_skills": [_SKILL_NAMES[i] for i in np.flatnonzero(job_skills[row] & ~resume_skills)],
+                "match_score": round(float(skill_scores[row]), 3)
+            },
+            "keyword_analysis": {
+                "found_keywords": [str(term) for term in terms[cols[top[found[top]]]]],
+                "missing_keywords": [str(term) for term in terms[cols[top[~found[top]]]]],
+                "match_score": round(float(keyword_scores[row]), 3)
+            },
+            "overall_match_score": round(float(overall_scores[row]), 3)
+        })
+    return results
+
+
+def score_match(resume_text: str, job_description: str) -> Dict[str, Any]:
+    """
+    Score a resume against one job description without calling the LLM.
+
+    Args:
+        resume_text (str): The resume
+        job_description (str): The job description
+
+    Returns:
+        Dict[str, Any]: Same structure as one score_batch() result
+    """
+    return score_batch(resume_text, [job_description])[0]
+
+
+@traced("match_scoring")
+def apply_match_scores(analysis: Dict[str, Any], resume_text: str, job_description: str) -> Dict[str, Any]:
+    """
+    Replace the LLM's skill and keyword scores in an analysis with deterministic ones.
+
+    The matching/missing lists and match scores of skills_analysis and
+    keyword_analysis are overwritten; the LLM's suggestions are kept. The
+    overall score blends in the LLM's experience_analysis score when present.
+
+    Args:
+        analysis (Dict[str, Any]): Analysis from tailor_resume (modified in place)
+        resume_text (str): The resume
+        job_description (str): The job description
+
+    Returns:
+        Dict[str, Any]: The same analysis
+    """
+    if not isinstance(analysis, dict) or "error" in analysis:
+        return analysis
+    scores = score_match(resume_text, job_description)
+    for section in ("skills_analysis", "keyword_analysis"):
+        existing = analysis.get(section)
+        analysis[section] = {**existing, **scores[section]} if isinstance(existing, dict) else {**scores[section], "suggestions": []}
+
+    overall = scores["overall_match_score"]
+    experience = analysis.get("experience_analysis")
+    experience_score = experience.get("match_score") if isinstance(experience, dict) else None
+    if isinstance(experience_score, (int, float)) and 0 <= experience_score <= 1:
+        overall = (overall * (SKILLS_WEIGHT + KEYWORDS_WEIGHT) + EXPERIENCE_WEIGHT * experience_score) / (SKILLS_WEIGHT + KEYWORDS_WEIGHT + EXPERIENCE_WEIGHT)
+    analysis["overall_match_score"] = round(overall, 3)
+    return analysis
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a resume against job descriptions without the LLM.")
+    parser.add_argument("resume", help="Resume as a .pdf or text file")
+    parser.add_argument("postings", nargs="+", help="JSONL/CSV job postings, or directories of them")
+    args = parser.parse_args(argv)
+    from pdf_text import extract_pdf_text
+    from job_index import read_postings
+
+    if args.resume.lower().endswith(".pdf"):
+        resume_text = extract_pdf_text(args.resume)
+    else:
+        with open(args.resume, "r", encoding="utf-8") as f:
+            resume_text = f.read()
+    jobs = list(read_postings(args.postings))
+    start = time.perf_counter()
+    results = score_batch(resume_text, [job["title"] + "\n" + job["description"] for job in jobs])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for job, result in zip(jobs, results):
+        print(json.dumps({"id": job["job_id"], "title": job["title"], **result}, ensure_ascii=False))
+    print(f"Scored {len(jobs)} jobs in {elapsed_ms:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+from uuid import UUID
+import openai
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+from llm_runtime import LLM_TIMEOUT_SECONDS, get_http_client, get_async_http_client
+from prompt_budget import count_tokens
+from tracing import Span, current_trace, current_span
+from shared_resources import load_environment
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# Model tiers; override per deployment
+LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gpt-4")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-3.5-turbo")
+FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "gpt-3.5-turbo")
+
+# Errors after which a stage retries on its fallback model
+FALLBACK_ERRORS = (openai.APITimeoutError,)
+
+# Latency samples kept per stage for the percentiles
+LATENCY_WINDOW = 1000
+
+
+@dataclass(frozen=True)
+class StageRoute:
+    """Model settings for one pipeline stage."""
+    model: str
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+    timeout: float = LLM_TIMEOUT_SECONDS
+    fallback_model: Optional[str] = FALLBACK_MODEL
+
+
+# JSON analysis and chat go to the fast tier; only resume writing uses the large model
+DEFAULT_ROUTES = {
+    "process_resume_input": StageRoute(FAST_MODEL, temperature=0.7, max_tokens=1200, timeout=60),
+    "tailor_resume": StageRoute(FAST_MODEL, temperature=0.2, max_tokens=1500, timeout=60),
+    "generate_tailored_resume_text": StageRoute(LARGE_MODEL, temperature=0.7, max_tokens=2000, timeout=120),
+    "generate_resume": StageRoute(LARGE_MODEL, temperature=0.7, max_tokens=2000, timeout=120),
+    "tailor_and_generate_resume": StageRoute(LARGE_MODEL, temperature=0.5, max_tokens=3500, timeout=180),
+    "update_analysis": StageRoute(FAST_MODEL, temperature=0.2, max_tokens=1000, timeout=60),
+    "revise_resume_section": StageRoute(LARGE_MODEL, temperature=0.7, max_tokens=700, timeout=60),
+    "chat": StageRoute(FAST_MODEL, temperature=0.7, max_tokens=800, timeout=60),
+    "chat_summary": StageRoute(FAST_MODEL, temperature=0.2, max_tokens=400, timeout=30),
+    "json_repair": StageRoute(FAST_MODEL, temperature=0.0, max_tokens=1000, timeout=30)
+}
+
+
+def load_route_overrides(value: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Read per-stage overrides from LLM_ROUTES.
+
+    LLM_ROUTES is either a JSON object or the path to a .json file, mapping
+    stage names to StageRoute fields, e.g. '{"tailor_resume": {"model": "gpt-4"}}'.
+
+    Args:
+        value (str): JSON or file path; defaults to the LLM_ROUTES environment variable
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Overrides per stage
+    """
+    value = value if value is not None else os.getenv("LLM_ROUTES", "")
+    if not value.strip():
+        return {}
+    if value.strip().endswith(".json") and os.path.exists(value.strip()):
+        with open(value.strip(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+class StageLatencyStats(BaseCallbackHandler):
+    """
+    Callback handler that times every chat model call by pipeline stage.
+
+    Stages are read from the "llm_stage" run metadata set by ModelRouter, so
+    sync, async and streaming calls are all covered without touching call sites.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def _stage(self, name: str) -> Dict[str, Any]:
+        return self._stages.setdefault(name, {
+            "calls": 0,
+            "errors": 0,
+            "fallbacks": 0,
+            "latencies": deque(maxlen=self._window),
+            "first_token_latencies": deque(maxlen=self._window)
+        })
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        stage = metadata.get("llm_stage")
+        if stage is None:
+            return
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        with self._lock:
+            self._runs[run_id] = {
+                "stage": stage,
+                "fallback": model is not None and model != metadata.get("llm_model"),
+                "start": time.perf_counter(),
+                "first_token": None
+            }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["first_token"] is None:
+                run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=False)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=True)
+
+    def _finish(self, run_id: UUID, error: bool) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            stats = self._stage(run["stage"])
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["fallbacks"] += int(run["fallback"])
+            if not error:
+                stats["latencies"].append(time.perf_counter() - run["start"])
+                if run["first_token"] is not None:
+                    stats["first_token_latencies"].append(run["first_token"] - run["start"])
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latency summary per stage.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per stage "calls", "errors", "fallbacks",
+            and mean/p50/p95 latency in seconds ("first_token_p50" for streamed calls)
+        """
+        def percentile(values: List[float], q: float) -> Optional[float]:
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+        with self._lock:
+            report = {}
+            for stage, stats in self._stages.items():
+                latencies = list(stats["latencies"])
+                report[stage] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "fallbacks": stats["fallbacks"],
+                    "mean_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                    "p50_seconds": percentile(latencies, 0.5),
+                    "p95_seconds": percentile(latencies, 0.95),
+                    "first_token_p50": percentile(list(stats["first_token_latencies"]), 0.5)
+                }
+            return report
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler that records every chat model call as a span of the current trace.
+
+    Spans carry the stage and model (from ModelRouter's run metadata), the
+    token usage reported by the API (counted locally for streamed calls, which
+    don't report it) and the time to the first streamed token.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[UUID, Span] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        current = current_trace()
+        if current is None:
+            return
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        stage = metadata.get("llm_stage", "llm")
+        model = params.get("model") or params.get("model_name") or metadata.get("llm_model")
+        child = current.start_span(f"llm:{stage}", current_span(), {"llm_stage": stage, "llm_model": model})
+        child.set(prompt_tokens=sum(count_tokens(str(message.content), model or "gpt-4") for batch in messages for message in batch))
+        with self._lock:
+            self._runs[run_id] = child
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            child = self._runs.get(run_id)
+        if child is not None and "first_token_ms" not in child.attributes:
+            child.set(first_token_ms=round((time.time() - child.start) * 1000, 2))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            child = self._runs.pop(run_id, None)
+        if child is None:
+            return
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if usage:
+            child.set(prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0))
+        else:
+            text = "".join(generation.text for batch in response.generations for generation in batch)
+            child.set(completion_tokens=count_tokens(text, child.attributes["llm_model"] or "gpt-4"), tokens_estimated=True)
+        child.finish()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            child = self._runs.pop(run_id, None)
+        if child is not None:
+            child.finish(error)
+
+
+class ModelRouter:
+    """
+    Picks the model, temperature and token limit for each pipeline stage.
+
+    Every stage gets its own chat model runnable (built once and reused), which
+    falls back to the stage's cheaper fallback model when the primary times out,
+    and reports its timings to `stats` and to the current trace.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, StageRoute]] = None, overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.routes = dict(routes or DEFAULT_ROUTES)
+        for stage, fields in (overrides if overrides is not None else load_route_overrides()).items():
+            base = self.routes.get(stage, StageRoute(LARGE_MODEL))
+            self.routes[stage] = replace(base, **fields)
+        self.stats = StageLatencyStats()
+        self.tracer = TraceCallbackHandler()
+        self._lock = threading.Lock()
+        self._runnables: Dict[str, Runnable] = {}
+
+    def route(self, stage: str) -> StageRoute:
+        """
+        Settings for a stage.
+
+        Args:
+            stage (str): Pipeline stage, e.g. "tailor_resume"
+
+        Returns:
+            StageRoute: The stage's route (unknown stages use the large model)
+        """
+        return self.routes.get(stage) or StageRoute(LARGE_MODEL)
+
+    @staticmethod
+    def _chat_model(model: str, route: StageRoute) -> "ChatOpenAI":
+        # Imported here: langchain_openai (and tiktoken) take longer to import than everything else in this module
+        from langchain_openai import ChatOpenAI
+
+        # The shared HTTP clients retry with backoff; the OpenAI client retrying too would multiply attempts
+        return ChatOpenAI(
+            model_name=model,
+            temperature=route.temperature,
+            max_tokens=route.max_tokens,
+            request_timeout=route.timeout,
+            max_retries=0,
+            http_client=get_http_client(),
+            async_client=openai.AsyncOpenAI(
+                http_client=get_async_http_client(),
+                timeout=route.timeout,
+                max_retries=0
+            ).chat.completions
+        )
+
+    def llm(self, stage: str) -> Runnable:
+        """
+        The chat model runnable for a stage, for use in chains like `prompt | router.llm(stage)`.
+
+        Args:
+            stage (str): Pipeline stage
+
+        Returns:
+            Runnable: Chat model with timeout fallback and latency tracking
+        """
+        with self._lock:
+            runnable = self._runnables.get(stage)
+            if runnable is None:
+                route = self.route(stage)
+                runnable = self._chat_model(route.model, route)
+                if route.fallback_model and route.fallback_model != route.model:
+                    runnable = runnable.with_fallbacks(
+                        [self._chat_model(route.fallback_model, route)],
+                        exceptions_to_handle=FALLBACK_ERRORS
+                    )
+                runnable = runnable.with_config(
+                    callbacks=[self.stats, self.tracer],
+                    metadata={"llm_stage": stage, "llm_model": route.model}
+                )
+                self._runnables[stage] = runnable
+            return runnable
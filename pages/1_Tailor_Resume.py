@@ -1,103 +1,36 @@
 import streamlit as st
-from dotenv import load_dotenv
-import PyPDF2
+from shared_resources import load_environment
+
+# Load environment variables (once per process; reruns skip it) before the modules
+# below read their settings
+load_environment()
+
 import io
-import json
 import os
-from datetime import datetime
-from fpdf import FPDF
-from resume_agent import tailor_resume, generate_tailored_resume_text
-import requests
-from pathlib import Path
+import time
+from resume_storage import RESUME_FOLDER
+from tracing import Trace, trace
+from job_queue import DONE, FAILED, JOB_POLL_SECONDS, QUEUED, RUNNING, ensure_workers, get_queue
+from dev_panel import dev_panel_enabled, record_trace, render_trace_panel
+from lazy_imports import lazy_module, prefetch
 import unicodedata
 
-# Load environment variables
-load_dotenv()
+# LangChain, PyPDF2 and fpdf are loaded on first use, so the page renders without waiting for them
+resume_agent = lazy_module("resume_agent")
+pdf_text = lazy_module("pdf_text")
+resume_pdf = lazy_module("resume_pdf")
 
-def ensure_font_exists():
-    """Ensure the font exists in the fonts directory."""
-    font_dir = Path("fonts")
-    font_dir.mkdir(exist_ok=True)
-    
-    # Roboto font files
-    font_files = {
-        "Roboto-Regular.ttf": "https://fonts.googleapis.com/css2?family=Roboto:wght@400&display=swap",
-        "Roboto-Bold.ttf": "https://fonts.googleapis.com/css2?family=Roboto:wght@700&display=swap",
-        "Roboto-Italic.ttf": "https://fonts.googleapis.com/css2?family=Roboto:ital,wght@1,400&display=swap"
-    }
-    
-    for font_file, url in font_files.items():
-        font_path = font_dir / font_file
-        if not font_path.exists():
-            try:
-                # Download the font from Google Fonts
-                response = requests.get(url)
-                response.raise_for_status()
-                
-                # Extract the actual font URL from the CSS
-                font_url = response.text.split('url(')[1].split(')')[0].strip('"\'')
-                font_response = requests.get(font_url)
-                font_response.raise_for_status()
-                
-                with open(font_path, "wb") as f:
-                    f.write(font_response.content)
-            except Exception as e:
-                st.error(f"Failed to download font {font_file}: {str(e)}")
-                return None
-    
-    return str(font_dir)
-
-def sanitize_text(text):
-    """Sanitize text to handle problematic characters."""
-    # Replace problematic characters with their ASCII equivalents
-    replacements = {
-        '\u2013': '-',  # en-dash
-        '\u2014': '--', # em-dash
-        '\u2018': "'",  # left single quote
-        '\u2019': "'",  # right single quote
-        '\u201C': '"',  # left double quote
-        '\u201D': '"',  # right double quote
-        '\u2026': '...' # ellipsis
-    }
-    
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    
-    return text
-
-def process_experience_entry(pdf, entry, primary_color, secondary_color):
-    """Helper function to process and format an experience entry"""
-    if not entry:
-        return
-    
-    # Extract title and company
-    title_company = entry[0].split("|")
-    title = title_company[0].strip()
-    company = title_company[1].strip() if len(title_company) > 1 else ""
-    
-    # Print title and company
-    pdf.set_font('Roboto', 'B', 11)
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(0, 8, txt=f"{title} | {company}", ln=True)
-    
-    # Print dates and location if available
-    if len(entry) > 1:
-        pdf.set_font('Roboto', 'I', 10)
-        pdf.set_text_color(*secondary_color)
-        pdf.cell(0, 6, txt=entry[1], ln=True)
-    
-    # Print bullet points
-    pdf.set_font('Roboto', '', 11)
-    pdf.set_text_color(0, 0, 0)
-    for bullet in entry[2:]:
-        pdf.cell(5)
-        pdf.cell(5, 8, txt="•", ln=0)
-        pdf.multi_cell(0, 8, txt=bullet.lstrip("-•*").strip())
-    
-    pdf.ln(5)
+# Progress text for each stage a tailoring job reports
+JOB_STAGE_LABELS = {
+    "analyzing": "Analyzing your resume against the job description...",
+    "updating": "Updating your last tailored resume for the changes...",
+    "tailoring": "Analyzing and tailoring your resume...",
+    "generating": "Writing your tailored resume...",
+    "rendering": "Creating the PDF...",
+    "saving": "Saving your tailored resume..."
+}
 
 # Create Resume folder if it doesn't exist
-RESUME_FOLDER = "Resume"
 if not os.path.exists(RESUME_FOLDER):
     os.makedirs(RESUME_FOLDER)
 
@@ -162,11 +95,13 @@ with col1:
     
     if uploaded_file is not None:
         with st.spinner("Extracting text from PDF..."):
-            # Extract text from PDF
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            resume_text = ""
-            for page in pdf_reader.pages:
-                resume_text += page.extract_text()
+            # Extract text from PDF (cached by file contents, so reruns are instant)
+            with trace("extract_resume", file_name=uploaded_file.name) as extract_trace:
+                resume_text = pdf_text.extract_pdf_text(uploaded_file)
+            # Only the first extraction of a file is worth showing in the developer panel
+            if st.session_state.get("traced_file_id") != uploaded_file.file_id:
+                st.session_state.traced_file_id = uploaded_file.file_id
+                record_trace(extract_trace)
             
             st.session_state.resume_text = resume_text
             st.markdown("### Extracted Resume Text")
@@ -193,158 +128,108 @@ with col2:
             st.session_state.prioritize_experience = st.checkbox("Prioritize relevant experience", value=True)
             st.session_state.add_keywords = st.checkbox("Add missing keywords", value=True)
             st.session_state.optimize_ats = st.checkbox("Optimize for ATS", value=True)
+            st.session_state.fast_mode = st.checkbox(
+                "Fast mode (single AI call)",
+                value=False,
+                help="Analyze and tailor in one request instead of two. Faster and cheaper, slightly less thorough."
+            )
+            st.session_state.incremental = st.checkbox(
+                "Reuse my last run when possible",
+                value=True,
+                help="After toggling an option or making a small edit to the job description, "
+                     "only the affected parts of the analysis and resume are regenerated."
+            )
 
 # Analysis and tailoring section (only show if both resume and job description are provided)
 if st.session_state.resume_text and st.session_state.job_description:
     st.markdown("---")
     
     if st.button("Generate Tailored Resume", type="primary"):
-        with st.spinner("Analyzing and tailoring your resume..."):
-            # Get the analysis
-            analysis = tailor_resume(
-                st.session_state.resume_text,
-                st.session_state.job_description,
-                {
-                    "emphasize_matching_skills": st.session_state.get("emphasize_skills", True),
-                    "prioritize_relevant_experience": st.session_state.get("prioritize_experience", True),
-                    "add_missing_keywords": st.session_state.get("add_keywords", True),
-                    "optimize_for_ats": st.session_state.get("optimize_ats", True)
+        tailoring_options = {
+            "emphasize_matching_skills": st.session_state.get("emphasize_skills", True),
+            "prioritize_relevant_experience": st.session_state.get("prioritize_experience", True),
+            "add_missing_keywords": st.session_state.get("add_keywords", True),
+            "optimize_for_ats": st.session_state.get("optimize_ats", True)
+        }
+        # The pipeline runs in a worker process; this session only follows the job, so
+        # navigating away doesn't lose the work and coming back picks the job up again
+        ensure_workers()
+        st.session_state.tailor_job_id = get_queue().submit(
+            st.session_state.resume_text,
+            st.session_state.job_description,
+            tailoring_options,
+            fast_mode=st.session_state.get("fast_mode", False),
+            user_name=st.session_state.get("user_name", "Anonymous"),
+            incremental=st.session_state.get("incremental", True),
+            previous=st.session_state.get("last_run") if st.session_state.get("incremental", True) else None
+        )
+        st.session_state.tailored_pdf = None
+
+    job_id = st.session_state.get("tailor_job_id")
+    if job_id:
+        ensure_workers()
+        queue = get_queue()
+        job = queue.get(job_id)
+        live_status = st.empty()
+        while job is not None and job["status"] in (QUEUED, RUNNING):
+            with live_status.container():
+                if job["status"] == QUEUED:
+                    ahead = queue.position(job_id)
+                    st.progress(0.0, text=f"Waiting for a worker ({ahead} jobs ahead)..." if ahead else "Waiting for a worker...")
+                else:
+                    st.progress(job["progress"], text=JOB_STAGE_LABELS.get(job["stage"], job["stage"]))
+                # The resume is shown as the worker generates it
+                if job["partial_resume"]:
+                    st.markdown("### Your Tailored Resume")
+                    st.markdown(job["partial_resume"])
+            time.sleep(JOB_POLL_SECONDS)
+            job = queue.get(job_id)
+        live_status.empty()
+
+        if job is None:
+            st.error("This tailoring job is no longer available. Please generate the resume again.")
+            st.session_state.tailor_job_id = None
+        elif job["status"] == FAILED:
+            st.error(f"Tailoring failed: {job['error']}")
+            st.session_state.tailor_job_id = None
+        elif st.session_state.get("applied_job_id") != job_id:
+            # First look at the finished job: take over its results
+            st.session_state.applied_job_id = job_id
+            st.session_state.analysis_result = job["analysis"]
+            st.session_state.tailored_resume = job["tailored_resume"]
+            job_trace = Trace.from_dict(job["trace"]) if job["trace"] else None
+            if job_trace is not None:
+                record_trace(job_trace)
+            if job["tailored_resume"] and "error" not in (job["analysis"] or {}):
+                # The base for an incremental run after the next edit
+                st.session_state.last_run = {
+                    "resume_text": job["resume_text"],
+                    "job_description": job["job_description"],
+                    "options": job["options"],
+                    "analysis": job["analysis"],
+                    "tailored_resume": job["tailored_resume"]
                 }
-            )
-            
-            # Generate the tailored resume
-            tailored_resume = generate_tailored_resume_text(
-                st.session_state.resume_text,
-                st.session_state.job_description,
-                analysis
-            )
-            
-            # Store results in session state
-            st.session_state.analysis_result = analysis
-            st.session_state.tailored_resume = tailored_resume
-            
-            # Create timestamped folder
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            user_name = st.session_state.get("user_name", "Anonymous")
-            resume_folder = os.path.join(RESUME_FOLDER, f"{timestamp}_{user_name}")
-            os.makedirs(resume_folder, exist_ok=True)
-            
-            # Save JSON version
-            resume_data = {
-                "original_resume": st.session_state.resume_text,
-                "job_description": st.session_state.job_description,
-                "tailored_resume": tailored_resume,
-                "analysis": analysis,
-                "timestamp": timestamp,
-                "user_name": user_name
-            }
-            
-            json_path = os.path.join(resume_folder, "resume_data.json")
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(resume_data, f, indent=4, ensure_ascii=False)
-            
-            # Generate PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Set professional colors
-            primary_color = (0, 51, 102)  # Dark blue
-            secondary_color = (102, 102, 102)  # Gray
-            accent_color = (0, 102, 153)  # Light blue
-            
-            # Add Google Fonts
-            font_dir = ensure_font_exists()
-            if font_dir:
-                try:
-                    pdf.add_font('Roboto', '', str(Path(font_dir) / 'Roboto-Regular.ttf'), uni=True)
-                    pdf.add_font('Roboto', 'B', str(Path(font_dir) / 'Roboto-Bold.ttf'), uni=True)
-                    pdf.add_font('Roboto', 'I', str(Path(font_dir) / 'Roboto-Italic.ttf'), uni=True)
-                    pdf.set_font('Roboto', '', 12)
-                except Exception as e:
-                    st.error(f"Failed to load font: {str(e)}")
-                    pdf.set_font("Arial", size=12)
-            else:
-                pdf.set_font("Arial", size=12)
-            
-            # Get the resume text from the analysis result
-            resume_text = st.session_state.tailored_resume
-            
-            if resume_text:
-                # Split into sections
-                sections = [s.strip() for s in resume_text.split("\n\n") if s.strip()]
-                
-                # Process each section
-                for section in sections:
-                    if not section.strip():
-                        continue
-                    
-                    # Extract section header and content
-                    lines = section.split("\n")
-                    header = lines[0].strip()
-                    content = "\n".join(lines[1:]).strip()
-                    
-                    # Skip Skills section
-                    if any(skill_keyword in header.upper() for skill_keyword in ["SKILLS", "TECHNICAL SKILLS", "PROFESSIONAL SKILLS", "CORE SKILLS"]):
-                        continue
-                    
-                    # Format section header
-                    pdf.set_font('Roboto', 'B', 14)
-                    pdf.set_text_color(*primary_color)
-                    pdf.cell(0, 10, txt=header, ln=True)
-                    pdf.ln(2)
-                    
-                    # Process content based on section type
-                    if "EXPERIENCE" in header.upper() or "WORK EXPERIENCE" in header.upper():
-                        # Process experience entries
-                        entries = content.split("\n")
-                        current_entry = []
-                        
-                        for line in entries:
-                            if line.strip():
-                                if line.strip().startswith(("-", "•", "*")):
-                                    # Process previous entry if exists
-                                    if current_entry:
-                                        process_experience_entry(pdf, current_entry, primary_color, secondary_color)
-                                        current_entry = []
-                                    current_entry.append(line)
-                                else:
-                                    current_entry.append(line)
-                        
-                        # Process last entry
-                        if current_entry:
-                            process_experience_entry(pdf, current_entry, primary_color, secondary_color)
-                    
-                    else:
-                        # Process other sections
-                        pdf.set_font('Roboto', '', 11)
-                        pdf.set_text_color(0, 0, 0)
-                        for line in content.split("\n"):
-                            if line.strip():
-                                pdf.multi_cell(0, 8, txt=line.strip())
-                        pdf.ln(5)
-                
-                # Add subtle footer
-                pdf.ln(10)
-                pdf.set_font('Roboto', 'I', 8)
-                pdf.set_text_color(*secondary_color)
-                pdf.cell(0, 5, txt=f"Generated on {datetime.now().strftime('%B %d, %Y')}", ln=True, align="C")
-            else:
+            if not job["tailored_resume"]:
                 st.error("No resume content available to generate PDF")
-            
-            # Save PDF
-            pdf_path = os.path.join(resume_folder, "tailored_resume.pdf")
-            pdf.output(pdf_path)
-            
-            st.success("Resume tailored successfully and saved!")
-            
-            # Add download button for PDF
-            with open(pdf_path, "rb") as f:
-                st.download_button(
-                    label="Download Tailored Resume (PDF)",
-                    data=f,
-                    file_name="tailored_resume.pdf",
-                    mime="application/pdf"
-                )
+            st.success("Resume tailored successfully and saved!" if job["folder"] else "Resume tailored successfully!")
+            if job_trace is not None and job_trace.root.attributes.get("reused_run"):
+                st.caption("Updated your previous run: only the parts affected by your changes were regenerated.")
+
+        if job is not None and job["status"] == DONE and job["tailored_resume"]:
+            if not st.session_state.get("tailored_pdf"):
+                # The worker saved the PDF with the run; render it here only if it wasn't saved
+                pdf_path = os.path.join(job["folder"], "tailored_resume.pdf") if job["folder"] else None
+                if pdf_path and os.path.exists(pdf_path):
+                    with open(pdf_path, "rb") as f:
+                        st.session_state.tailored_pdf = f.read()
+                else:
+                    st.session_state.tailored_pdf = resume_pdf.render_resume_pdf(job["tailored_resume"])
+            st.download_button(
+                label="Download Tailored Resume (PDF)",
+                data=st.session_state.tailored_pdf,
+                file_name="tailored_resume.pdf",
+                mime="application/pdf"
+            )
     
     # Display results if available
     if st.session_state.analysis_result and st.session_state.tailored_resume:
@@ -365,38 +250,55 @@ if st.session_state.resume_text and st.session_state.job_description:
             # Display analysis results
             analysis = st.session_state.analysis_result
             
-            # Key Skills Matching
-            st.markdown("#### Key Skills Matching")
-            st.progress(analysis["skills_analysis"]["match_score"])
-            st.markdown(f"""
-            - Strong matches: {', '.join(analysis["skills_analysis"]["matching_skills"])}
-            - Missing skills: {', '.join(analysis["skills_analysis"]["missing_skills"])}
-            """)
-            
-            # Experience Alignment
-            st.markdown("#### Experience Alignment")
-            st.progress(analysis["experience_analysis"]["match_score"])
-            st.markdown(f"""
-            - Relevant experiences: {', '.join(analysis["experience_analysis"]["relevant_experiences"])}
-            - Less relevant: {', '.join(analysis["experience_analysis"]["irrelevant_experiences"])}
-            """)
-            
-            # Keyword Optimization
-            st.markdown("#### Keyword Optimization")
-            st.progress(analysis["keyword_analysis"]["match_score"])
-            st.markdown(f"""
-            - Found keywords: {', '.join(analysis["keyword_analysis"]["found_keywords"])}
-            - Missing keywords: {', '.join(analysis["keyword_analysis"]["missing_keywords"])}
-            """)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Improvement Suggestions
-            st.markdown("### Suggested Improvements")
-            st.markdown('<div class="section-box">', unsafe_allow_html=True)
-            for i, suggestion in enumerate(analysis["improvement_suggestions"], 1):
-                st.markdown(f"{i}. {suggestion}")
-            st.markdown('</div>', unsafe_allow_html=True)
+            if "error" in analysis:
+                st.warning("The analysis couldn't be read, so only the tailored resume is shown.")
+                with st.expander("Raw analysis response"):
+                    st.text(analysis.get("raw_response", ""))
+                st.markdown('</div>', unsafe_allow_html=True)
+            else:
+                skills = analysis.get("skills_analysis", {})
+                experience = analysis.get("experience_analysis", {})
+                keywords = analysis.get("keyword_analysis", {})
+                
+                # Key Skills Matching
+                st.markdown("#### Key Skills Matching")
+                st.progress(skills.get("match_score", 0.0))
+                st.markdown(f"""
+                - Strong matches: {', '.join(skills.get("matching_skills", []))}
+                - Missing skills: {', '.join(skills.get("missing_skills", []))}
+                """)
+                
+                # Experience Alignment
+                st.markdown("#### Experience Alignment")
+                st.progress(experience.get("match_score", 0.0))
+                st.markdown(f"""
+                - Relevant experiences: {', '.join(experience.get("relevant_experiences", []))}
+                - Less relevant: {', '.join(experience.get("irrelevant_experiences", []))}
+                """)
+                
+                # Keyword Optimization
+                st.markdown("#### Keyword Optimization")
+                st.progress(keywords.get("match_score", 0.0))
+                st.markdown(f"""
+                - Found keywords: {', '.join(keywords.get("found_keywords", []))}
+                - Missing keywords: {', '.join(keywords.get("missing_keywords", []))}
+                """)
+                
+                st.markdown('</div>', unsafe_allow_html=True)
+                
+                # Improvement Suggestions
+                st.markdown("### Suggested Improvements")
+                st.markdown('<div class="section-box">', unsafe_allow_html=True)
+                for i, suggestion in enumerate(analysis.get("improvement_suggestions", []), 1):
+                    st.markdown(f"{i}. {suggestion}")
+                st.markdown('</div>', unsafe_allow_html=True)
+
+# Per-request waterfall, token counts and cache hits (DEVELOPER_PANEL=1 or ?dev=1)
+if dev_panel_enabled():
+    render_trace_panel(st.session_state.get("dev_traces", []))
+
+# Load the heavy modules in the background while the user fills in the form
+prefetch("resume_agent", "pdf_text", "resume_pdf")
 
 # Add a back button
 if st.button("← Back to Main Menu"):
@@ -1,10 +1,17 @@
 import streamlit as st
-from dotenv import load_dotenv
-import PyPDF2
+from shared_resources import load_environment
+
+# Load environment variables (once per process; reruns skip it) before the modules
+# below read their settings
+load_environment()
+
 import io
+import os
+from lazy_imports import lazy_module
+from job_index import JobIndex, JOB_INDEX_PATH, JOB_POSTINGS_PATH, EXPERIENCE_LEVELS, INDUSTRIES, read_postings
 
-# Load environment variables
-load_dotenv()
+# PyPDF2 is loaded on first upload
+pdf_text = lazy_module("pdf_text")
 
 # Set page configuration
 st.set_page_config(
@@ -13,6 +20,15 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource(show_spinner="Loading job index...")
+def get_job_index():
+    """Load the local job index once per process, building it from JOB_POSTINGS_PATH if needed."""
+    if os.path.exists(os.path.join(JOB_INDEX_PATH, "index.npz")):
+        return JobIndex.load(JOB_INDEX_PATH)
+    if os.path.exists(JOB_POSTINGS_PATH):
+        return JobIndex.build(read_postings([JOB_POSTINGS_PATH]), JOB_INDEX_PATH)
+    return None
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -62,56 +78,65 @@ with col1:
     st.markdown('</div>', unsafe_allow_html=True)
     
     if uploaded_file is not None:
+        # Shared with the other modes; cached by file contents, so reruns are instant
+        st.session_state.resume_text = pdf_text.extract_pdf_text(uploaded_file)
+        
         st.markdown("### Step 2: Job Search Preferences")
         with st.expander("Search Criteria", expanded=True):
             job_title = st.text_input("Desired Job Title")
             location = st.text_input("Preferred Location")
             experience_level = st.selectbox(
                 "Experience Level",
-                ["Entry Level", "Mid Level", "Senior Level", "Executive"]
+                EXPERIENCE_LEVELS
             )
             industry = st.multiselect(
                 "Industry",
-                ["Technology", "Finance", "Healthcare", "Education", "Manufacturing", "Other"]
+                INDUSTRIES
             )
         
         if st.button("Find Jobs", type="primary"):
-            with st.spinner("Analyzing your profile and finding matching jobs..."):
-                # Here you would call your job search function
-                st.success("Found matching jobs!")
+            job_index = get_job_index()
+            if job_index is None:
+                st.error(f"No job index found. Build one with: python job_index.py build {JOB_POSTINGS_PATH}")
+            else:
+                with st.spinner("Analyzing your profile and finding matching jobs..."):
+                    st.session_state.job_results = job_index.search(
+                        st.session_state.resume_text,
+                        job_title=job_title,
+                        location=location,
+                        experience_level=experience_level,
+                        industries=industry
+                    )
+                if st.session_state.job_results:
+                    st.success(f"Found {len(st.session_state.job_results)} matching jobs!")
+                else:
+                    st.warning("No jobs match these criteria. Try a broader location or fewer filters.")
 
 with col2:
     if uploaded_file is not None:
         st.markdown("### Recommended Jobs")
         
-        # Sample job cards (replace with actual job data)
-        st.markdown('<div class="job-card">', unsafe_allow_html=True)
-        st.markdown("""
-        #### Senior Software Engineer
-        **Company:** TechCorp Inc.
-        **Location:** Remote
-        **Match Score:** 92%
-        
-        - Strong match with your Python and Machine Learning experience
-        - Aligns with your 5+ years of experience
-        - Matches your preferred remote work setup
-        """)
-        st.button("View Details", key="job1")
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.markdown('<div class="job-card">', unsafe_allow_html=True)
-        st.markdown("""
-        #### Data Science Lead
-        **Company:** DataFlow Solutions
-        **Location:** New York, NY
-        **Match Score:** 88%
-        
-        - Excellent match with your data analysis skills
-        - Leadership experience preferred
-        - Competitive salary and benefits
-        """)
-        st.button("View Details", key="job2")
-        st.markdown('</div>', unsafe_allow_html=True)
+        job_results = st.session_state.get("job_results")
+        if not job_results:
+            st.info("Set your search criteria and click Find Jobs to see matching postings.")
+        for job in job_results or []:
+            st.markdown('<div class="job-card">', unsafe_allow_html=True)
+            st.markdown(f"""
+            #### {job['title']}
+            **Company:** {job['company'] or 'N/A'}
+            **Location:** {job['location'] or 'N/A'}
+            **Match Score:** {job['match_score'] * 100:.0f}%
+            """)
+            if job["matched_terms"]:
+                st.markdown("Matches your resume on: " + ", ".join(job["matched_terms"]))
+            with st.expander("View Details"):
+                st.markdown(f"**Experience Level:** {job['experience_level']} | **Industry:** {job['industry']}")
+                if job["skills"]:
+                    st.markdown("**Skills:** " + ", ".join(job["skills"]))
+                st.write(job["description"])
+                if job["url"]:
+                    st.markdown(f"[Open posting]({job['url']})")
+            st.markdown('</div>', unsafe_allow_html=True)
         
         # Interview Preparation Section
         st.markdown("### Interview Preparation")
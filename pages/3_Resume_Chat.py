@@ -1,10 +1,17 @@
 import streamlit as st
-from dotenv import load_dotenv
-import PyPDF2
+from shared_resources import load_environment
+
+# Load environment variables (once per process; reruns skip it) before the modules
+# below read their settings
+load_environment()
+
 import io
+import hashlib
+from lazy_imports import lazy_module, prefetch
 
-# Load environment variables
-load_dotenv()
+# LangChain and PyPDF2 are loaded on first use, so the page renders without waiting for them
+pdf_text = lazy_module("pdf_text")
+resume_agent = lazy_module("resume_agent")
 
 # Set page configuration
 st.set_page_config(
@@ -24,29 +31,6 @@ st.markdown("""
         margin: 10px 0;
         background-color: #f8f9fa;
     }
-    .chat-container {
-        height: 500px;
-        overflow-y: auto;
-        padding: 20px;
-        border-radius: 5px;
-        background-color: #f8f9fa;
-        margin-bottom: 20px;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        padding: 10px;
-        border-radius: 10px;
-        margin: 5px 0;
-        max-width: 80%;
-        margin-left: auto;
-    }
-    .assistant-message {
-        background-color: #f5f5f5;
-        padding: 10px;
-        border-radius: 10px;
-        margin: 5px 0;
-        max-width: 80%;
-    }
     .suggestion-chip {
         display: inline-block;
         padding: 5px 10px;
@@ -82,6 +66,17 @@ with col1:
     st.markdown('</div>', unsafe_allow_html=True)
     
     if uploaded_file is not None:
+        # Shared with the other modes; cached by file contents, so reruns are instant
+        st.session_state.resume_text = pdf_text.extract_pdf_text(uploaded_file)
+        include_past_runs = st.checkbox("Use my past tailoring runs as context", value=False)
+        
+        # Index the resume once per upload; a new resume starts a new conversation
+        chat_key = (hashlib.sha256(st.session_state.resume_text.encode("utf-8")).hexdigest(), include_past_runs)
+        if st.session_state.get("chat_key") != chat_key:
+            st.session_state.chat_session = resume_agent.create_chat_session(st.session_state.resume_text, include_past_runs)
+            st.session_state.chat_key = chat_key
+            st.session_state.messages = []
+        
         st.markdown("### Step 2: Start Chatting")
         st.markdown("""
         Ask questions about:
@@ -104,33 +99,33 @@ with col1:
 with col2:
     if uploaded_file is not None:
         st.markdown("### Chat History")
-        st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+        chat_history = st.container(height=500)
         
         # Display chat messages
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="assistant-message">{message["content"]}</div>', unsafe_allow_html=True)
+        with chat_history:
+            for message in st.session_state.messages:
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Chat input; the form clears the box after sending
+        with st.form("chat_form", clear_on_submit=True):
+            user_input = st.text_input("Type your message here...")
+            submitted = st.form_submit_button("Send", type="primary")
         
-        # Chat input
-        user_input = st.text_input("Type your message here...", key="chat_input")
-        if st.button("Send", type="primary"):
-            if user_input:
-                # Add user message to chat
-                st.session_state.messages.append({"role": "user", "content": user_input})
-                
-                # Here you would call your chat function
-                # For now, we'll add a sample response
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": "Based on your resume, I can see you have strong experience in Python and Machine Learning. Here are some suggestions..."
-                })
-                
-                # Clear the input
-                st.experimental_rerun()
+        if submitted and user_input:
+            # Add user message to chat
+            st.session_state.messages.append({"role": "user", "content": user_input})
+            
+            # Only the new messages are drawn; the reply streams into its bubble
+            with chat_history:
+                with st.chat_message("user"):
+                    st.markdown(user_input)
+                with st.chat_message("assistant"):
+                    reply = st.write_stream(resume_agent.stream_chat(st.session_state.chat_session, user_input))
+            st.session_state.messages.append({"role": "assistant", "content": reply})
+
+# Load the heavy modules in the background while the user uploads
+prefetch("pdf_text", "resume_agent")
 
 # Add a back button
 if st.button("← Back to Main Menu"):
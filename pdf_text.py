@@ -0,0 +1,105 @@
+import io
+import os
+import hashlib
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import List, Optional, Union
+import PyPDF2
+from tracing import traced, annotate
+
+# Documents with at least this many pages are split across worker processes
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", 16))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+# Number of extracted documents kept in memory, keyed by content hash
+TEXT_CACHE_MAX_ENTRIES = int(os.getenv("PDF_TEXT_CACHE_MAX_ENTRIES", 128))
+
+# Line between the pages of extracted text; prompt_budget uses it to find running headers
+PAGE_BREAK = "\f"
+
+_text_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _read_bytes(source: Union[bytes, str, io.IOBase]) -> bytes:
+    """Return the raw PDF bytes from bytes, a file path, or a file-like object such as a Streamlit upload."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop). Runs inside worker processes for large documents."""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _process_pool
+
+
+def extract_pages(data: bytes) -> List[str]:
+    """
+    Extract the text of every page of a PDF, in parallel for large documents.
+
+    Args:
+        data (bytes): The PDF file contents
+
+    Returns:
+        List[str]: Text of each page, in page order
+    """
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    if page_count < PARALLEL_PAGE_THRESHOLD or PDF_EXTRACT_WORKERS < 2:
+        return _extract_page_range(data, 0, page_count)
+
+    # One contiguous chunk of pages per worker keeps the per-process parse overhead low
+    chunk_size = -(-page_count // PDF_EXTRACT_WORKERS)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+    pool = _get_process_pool()
+    futures = [pool.submit(_extract_page_range, data, start, stop) for start, stop in ranges]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+@traced()
+def extract_pdf_text(source: Union[bytes, str, io.IOBase]) -> str:
+    """
+    Extract the text of a PDF, reusing the result for identical file contents.
+
+    Args:
+        source: PDF bytes, a file path, or a file-like object (e.g. st.file_uploader's result)
+
+    Returns:
+        str: Text of all pages, separated by PAGE_BREAK lines
+    """
+    data = _read_bytes(source)
+    key = hashlib.sha256(data).hexdigest()
+
+    with _cache_lock:
+        if key in _text_cache:
+            _text_cache.move_to_end(key)
+            annotate(cache_hit=True)
+            return _text_cache[key]
+
+    annotate(cache_hit=False, pdf_bytes=len(data))
+    text = f"\n{PAGE_BREAK}\n".join(extract_pages(data))
+
+    with _cache_lock:
+        _text_cache[key] = text
+        while len(_text_cache) > TEXT_CACHE_MAX_ENTRIES:
+            _text_cache.popitem(last=False)
+    return text
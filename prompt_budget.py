@@ -0,0 +1,271 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+from tracing import traced, annotate
+
+logger = logging.getLogger(__name__)
+
+# Token budgets for the texts sent to the LLM (0 disables trimming)
+RESUME_TOKEN_BUDGET = int(os.getenv("PROMPT_RESUME_TOKEN_BUDGET", "2500"))
+JOB_TOKEN_BUDGET = int(os.getenv("PROMPT_JOB_TOKEN_BUDGET", "1500"))
+
+# Tokenizer used when the model has no tiktoken encoding of its own
+DEFAULT_ENCODING = "cl100k_base"
+
+# Separator pdf_text.extract_pdf_text puts between pages (not imported, to keep PyPDF2 out of this module)
+PAGE_BREAK = "\f"
+# "3", "Page 3", "Page 3 of 4", "3/4", "- 3 -"
+_PAGE_NUMBER = re.compile(r"^[-\s]*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?[-\s]*$", re.IGNORECASE)
+# A short line at the top or bottom of this many pages is a running header/footer
+HEADER_REPEAT_THRESHOLD = 2
+HEADER_MAX_CHARS = 80
+
+# Analysis fields the resume generation prompt doesn't use: scores and what already matches
+_ANALYSIS_FIELDS_TO_DROP = {
+    "skills_analysis": ("match_score", "matching_skills"),
+    "experience_analysis": ("match_score",),
+    "keyword_analysis": ("match_score", "found_keywords")
+}
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """The tiktoken encoding for a model, or None when tiktoken can't provide one (e.g. offline)."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning("tiktoken unavailable, estimating token counts: %s", e)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens of a text for a model.
+
+    Uses tiktoken when available, otherwise estimates about four characters per token.
+
+    Args:
+        text (str): Any text
+        model (str): OpenAI model name, selects the tokenizer
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _page_edges(page: List[str]) -> set:
+    """Indexes of a page's header/footer positions: its first and last text lines, and lines next to a page number."""
+    text_lines = [i for i, line in enumerate(page) if line and not _PAGE_NUMBER.match(line)]
+    if not text_lines:
+        return set()
+    edges = {text_lines[0], text_lines[-1]}
+    for position, i in enumerate(text_lines):
+        before = text_lines[position - 1] if position > 0 else -1
+        after = text_lines[position + 1] if position + 1 < len(text_lines) else len(page)
+        if any(_PAGE_NUMBER.match(line) for line in page[before + 1:i] + page[i + 1:after]):
+            edges.add(i)
+    return edges
+
+
+def clean_extracted_text(text: str) -> str:
+    """
+    Remove PDF extraction noise from resume or job text.
+
+    Collapses layout whitespace, drops page-number lines, running headers and
+    footers, and consecutive duplicate lines. A header or footer is a short
+    line found at the top or bottom of several pages (pages are split at
+    pdf_text.PAGE_BREAK, or at page-number lines), or a repeat of the first
+    line, usually the candidate's name, at a page edge. Its first occurrence is
+    kept; repeated lines in the body of a page are never removed.
+
+    Args:
+        text (str): Text from pdf_text.extract_pdf_text or pasted by the user
+
+    Returns:
+        str: Cleaned text, with paragraphs separated by single blank lines
+    """
+    pages = [
+        [re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in page.split("\n")]
+        for page in re.split(rf"\n?{PAGE_BREAK}\n?", text.replace("\r", "\n"))
+    ]
+    edges = [_page_edges(page) for page in pages]
+    first_line = next((line for page in pages for line in page if line), "")
+    edge_counts = Counter(line for page, page_edges in zip(pages, edges) for line in {page[i] for i in page_edges})
+    running_headers = {
+        line for line, count in edge_counts.items()
+        if len(line) <= HEADER_MAX_CHARS and (count >= HEADER_REPEAT_THRESHOLD or line == first_line)
+    }
+
+    cleaned, seen_headers = [], set()
+    for page, page_edges in zip(pages, edges):
+        for i, line in enumerate(page):
+            if not line:
+                if cleaned and cleaned[-1]:
+                    cleaned.append("")
+                continue
+            if _PAGE_NUMBER.match(line):
+                continue
+            if i in page_edges and line in running_headers:
+                if line in seen_headers:
+                    continue
+                seen_headers.add(line)
+            if cleaned and cleaned[-1] == line:
+                continue
+            cleaned.append(line)
+    return "\n".join(cleaned).strip()
+
+
+def trim_to_budget(text: str, budget: int, model: str = "gpt-4") -> str:
+    """
+    Shorten text to a token budget, section by section.
+
+    Sections are blank-line separated. Lines are removed from the end of the
+    longest section first, so every section keeps its header and first lines.
+    The number of lines cut is logged and added to the current trace span.
+
+    Args:
+        text (str): Cleaned text
+        budget (int): Maximum tokens, 0 for no limit
+        model (str): OpenAI model name, selects the tokenizer
+
+    Returns:
+        str: Text within the budget (unchanged if it already fits)
+    """
+    if budget <= 0 or count_tokens(text, model) <= budget:
+        return text
+    sections = [section.split("\n") for section in text.split("\n\n")]
+    line_tokens = [[count_tokens(line, model) + 1 for line in section] for section in sections]
+    total = sum(map(sum, line_tokens))
+    dropped = 0
+    while total > budget:
+        longest = max(range(len(sections)), key=lambda i: sum(line_tokens[i]) if len(sections[i]) > 1 else -1)
+        if len(sections[longest]) <= 1:
+            break
+        sections[longest].pop()
+        total -= line_tokens[longest].pop()
+        dropped += 1
+    if dropped:
+        logger.info("Trimmed %d lines to fit a %d-token budget", dropped, budget)
+        annotate(trimmed_lines=dropped)
+    return "\n\n".join("\n".join(section) for section in sections)
+
+
+def compact_analysis_json(analysis: Dict[str, Any]) -> str:
+    """
+    Serialize an analysis for the resume generation prompt.
+
+    Drops the scores and the lists of what already matches, which the model
+    doesn't need to rewrite the resume, and writes JSON without whitespace.
+
+    Args:
+        analysis (Dict[str, Any]): Analysis from tailor_resume
+
+    Returns:
+        str: Compact JSON
+    """
+    compact = dict(analysis)
+    compact.pop("overall_match_score", None)
+    for section, fields in _ANALYSIS_FIELDS_TO_DROP.items():
+        if isinstance(compact.get(section), dict):
+            compact[section] = {key: value for key, value in compact[section].items() if key not in fields}
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+
+class TokenSavings:
+    """Running totals of input tokens before and after budgeting, per pipeline stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: str, original_tokens: int, sent_tokens: int) -> None:
+        with self._lock:
+            totals = self._stages.setdefault(stage, {"calls": 0, "original_tokens": 0, "sent_tokens": 0})
+            totals["calls"] += 1
+            totals["original_tokens"] += original_tokens
+            totals["sent_tokens"] += sent_tokens
+        logger.info("%s: %d input tokens sent, %d saved", stage, sent_tokens, original_tokens - sent_tokens)
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """
+        Totals per stage.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Per stage "calls", "original_tokens",
+            "sent_tokens" and "saved_tokens"
+        """
+        with self._lock:
+            return {
+                stage: {**totals, "saved_tokens": totals["original_tokens"] - totals["sent_tokens"]}
+                for stage, totals in self._stages.items()
+            }
+
+
+# Process-wide savings, reported by the callers in resume_agent
+token_savings = TokenSavings()
+
+
+class PreparedInputs(NamedTuple):
+    """Prompt inputs after cleaning and budgeting, with their token counts before and after."""
+    resume_text: str
+    job_description: str
+    analysis_json: Optional[str]
+    original_tokens: int
+    sent_tokens: int
+
+    def record(self, stage: str) -> None:
+        """Add this call's savings to the process-wide report."""
+        token_savings.record(stage, self.original_tokens, self.sent_tokens)
+
+
+@traced()
+def prepare_inputs(resume_text: str, job_description: str, analysis: Optional[Dict[str, Any]] = None,
+                   model: str = "gpt-4", trim_resume: bool = True) -> PreparedInputs:
+    """
+    Clean and budget the variable parts of a prompt.
+
+    Args:
+        resume_text (str): Raw resume text
+        job_description (str): Raw job description
+        analysis (Dict[str, Any]): Analysis to include, if the stage sends one
+        model (str): OpenAI model name, selects the tokenizer
+        trim_resume (bool): Budget the resume too. Stages that write the tailored
+            resume pass False, since lines cut here would be missing from it
+
+    Returns:
+        PreparedInputs: The texts to put in the prompt (analysis_json is None
+        if no analysis was given) and the token counts
+    """
+    resume = clean_extracted_text(resume_text)
+    if trim_resume:
+        resume = trim_to_budget(resume, RESUME_TOKEN_BUDGET, model)
+    job = trim_to_budget(clean_extracted_text(job_description), JOB_TOKEN_BUDGET, model)
+    analysis_json = compact_analysis_json(analysis) if analysis is not None else None
+
+    original: List[str] = [resume_text, job_description]
+    sent: List[str] = [resume, job]
+    if analysis is not None:
+        original.append(json.dumps(analysis))
+        sent.append(analysis_json)
+    prepared = PreparedInputs(
+        resume_text=resume,
+        job_description=job,
+        analysis_json=analysis_json,
+        original_tokens=sum(count_tokens(text, model) for text in original),
+        sent_tokens=sum(count_tokens(text, model) for text in sent)
+    )
+    annotate(original_tokens=prepared.original_tokens, sent_tokens=prepared.sent_tokens)
+    return prepared
@@ -0,0 +1,366 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import httpx
+from shared_resources import load_environment
+
+logger = logging.getLogger(__name__)
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# Retry and deadline settings for every call to the LLM API
+LLM_RETRY_MAX_RETRIES = int(os.getenv("LLM_RETRY_MAX_RETRIES", 4))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 20))
+LLM_CALL_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", 300))
+
+# Circuit breaker: open after this many consecutive upstream failures, probe again after the cooldown
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+
+# Rate limits and transient upstream errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Status codes that mean the upstream itself is degraded (a 429 only means slow down)
+BREAKER_STATUS_CODES = {500, 502, 503, 504}
+# Failures before the request reached the model. Read timeouts are not retried
+# here: a slow model stays slow, and the model router falls back instead.
+RETRYABLE_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by the sync and async transports.
+
+    closed: requests flow. open: requests fail fast with CircuitOpenError until
+    the cooldown passes. half-open: a single probe request is let through; its
+    outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD, reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe: Optional[object] = None
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def before_request(self) -> Optional[object]:
+        """
+        Raise CircuitOpenError if the request must not be sent now.
+
+        Returns:
+            Optional[object]: A probe token if this request is the half-open probe, else None.
+                The caller must hand it back to release_probe() once the call is over.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "open" or (state == "half-open" and self._probe is not None):
+                raise CircuitOpenError("LLM API circuit breaker is open; failing fast")
+            if state == "half-open":
+                self._probe = object()
+                return self._probe
+            return None
+
+    def release_probe(self, probe: object) -> None:
+        """Let the next half-open probe through; called when the probing call ends, however it ends."""
+        with self._lock:
+            if self._probe is probe:
+                self._probe = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe = None
+
+    def record_alive(self) -> None:
+        """The upstream answered but asked us to slow down: close the circuit if it was probing."""
+        with self._lock:
+            if self._probe is not None:
+                self._failures = 0
+                self._opened_at = None
+                self._probe = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._state()
+            opening = state == "half-open" or (state == "closed" and self._failures >= self.failure_threshold)
+            if opening:
+                self.opened_count += 1
+                logger.warning("LLM API circuit breaker opened after %d consecutive failures", self._failures)
+            # A failed retry of the probe restarts the cooldown too
+            if opening or self._probe is not None:
+                self._opened_at = time.monotonic()
+
+
+class TransportMetrics:
+    """Counters of requests, retries (by reason) and failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.retries_by_reason: Dict[str, int] = {}
+        self.failures = 0
+        self.short_circuited = 0
+
+    def record(self, field: str, reason: Optional[str] = None) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            if reason is not None:
+                self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def report(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "retries_by_reason": dict(self.retries_by_reason),
+                "failures": self.failures,
+                "short_circuited": self.short_circuited
+            }
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    The delay the server asked for, from retry-after-ms or Retry-After (seconds or HTTP date).
+
+    Args:
+        response (httpx.Response): A 429/5xx response
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the server didn't say
+    """
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _RetryPolicy:
+    """Retry decisions shared by the sync and async transports."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float, deadline_seconds: float,
+                 breaker: CircuitBreaker, metrics: TransportMetrics):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker
+        self.metrics = metrics
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Server-requested delay if given, otherwise full-jitter exponential backoff."""
+        if response is not None:
+            requested = retry_after_seconds(response)
+            if requested is not None:
+                return requested
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def can_retry(self, attempt: int, delay: float, deadline: float) -> bool:
+        return attempt < self.max_retries and time.monotonic() + delay < deadline
+
+    @staticmethod
+    def cap_timeout(request: httpx.Request, deadline: float) -> None:
+        """Shrink the request's timeouts so this attempt can't outlive the call's deadline."""
+        remaining = max(deadline - time.monotonic(), 0.001)
+        timeout = dict(request.extensions.get("timeout") or {})
+        for key in ("connect", "read", "write", "pool"):
+            value = timeout.get(key)
+            timeout[key] = remaining if value is None else min(value, remaining)
+        request.extensions["timeout"] = timeout
+
+    def start(self, request: httpx.Request) -> float:
+        """Count the request and return its deadline."""
+        self.metrics.record("requests")
+        return time.monotonic() + self.deadline_seconds
+
+    def check_breaker(self) -> Optional[object]:
+        """Ask the breaker to let an attempt through; returns its probe token, if any."""
+        try:
+            return self.breaker.before_request()
+        except CircuitOpenError:
+            self.metrics.record("short_circuited")
+            raise
+
+    def on_response(self, response: httpx.Response, attempt: int, deadline: float) -> Optional[float]:
+        """Update the breaker for a response; return the delay before a retry, or None to return it."""
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            self.breaker.record_success()
+            return None
+        if response.status_code in BREAKER_STATUS_CODES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_alive()
+        delay = min(self.backoff(attempt, response), self.max_delay)
+        if not self.can_retry(attempt, delay, deadline):
+            self.metrics.record("failures")
+            return None
+        self.metrics.record("retries", f"http_{response.status_code}")
+        return delay
+
+    def on_exception(self, error: Exception, attempt: int, deadline: float) -> Optional[float]:
+        """Update the breaker for a transport error; return the delay before a retry, or None to raise."""
+        if not isinstance(error, RETRYABLE_EXCEPTIONS):
+            self.metrics.record("failures")
+            return None
+        self.breaker.record_failure()
+        delay = self.backoff(attempt)
+        if not self.can_retry(attempt, delay, deadline):
+            self.metrics.record("failures")
+            return None
+        self.metrics.record("retries", type(error).__name__)
+        return delay
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    httpx transport that retries rate limits and transient failures.
+
+    Retries use jittered exponential backoff, or the server's Retry-After when
+    given, within a per-call deadline. A shared circuit breaker fails requests
+    fast while the upstream keeps erroring.
+    """
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None, policy: Optional[_RetryPolicy] = None):
+        self._transport = transport or httpx.HTTPTransport()
+        self._policy = policy or default_policy()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self._policy
+        deadline = policy.start(request)
+        attempt = 0
+        # The half-open probe keeps its token through its own retries
+        probe = None
+        try:
+            while True:
+                if probe is None:
+                    probe = policy.check_breaker()
+                policy.cap_timeout(request, deadline)
+                try:
+                    response = self._transport.handle_request(request)
+                except httpx.TransportError as e:
+                    delay = policy.on_exception(e, attempt, deadline)
+                    if delay is None:
+                        raise
+                else:
+                    delay = policy.on_response(response, attempt, deadline)
+                    if delay is None:
+                        return response
+                    response.close()
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            if probe is not None:
+                policy.breaker.release_probe(probe)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    """Async version of ResilientTransport, sharing its policy and circuit breaker."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None, policy: Optional[_RetryPolicy] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._policy = policy or default_policy()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self._policy
+        deadline = policy.start(request)
+        attempt = 0
+        # The half-open probe keeps its token through its own retries
+        probe = None
+        try:
+            while True:
+                if probe is None:
+                    probe = policy.check_breaker()
+                policy.cap_timeout(request, deadline)
+                try:
+                    response = await self._transport.handle_async_request(request)
+                except httpx.TransportError as e:
+                    delay = policy.on_exception(e, attempt, deadline)
+                    if delay is None:
+                        raise
+                else:
+                    delay = policy.on_response(response, attempt, deadline)
+                    if delay is None:
+                        return response
+                    await response.aclose()
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            if probe is not None:
+                policy.breaker.release_probe(probe)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Process-wide breaker and metrics: every LLM client talks to the same upstream
+breaker = CircuitBreaker()
+transport_metrics = TransportMetrics()
+_policy: Optional[_RetryPolicy] = None
+
+
+def default_policy() -> _RetryPolicy:
+    """The retry policy configured from the LLM_RETRY_* settings, shared by all transports."""
+    global _policy
+    if _policy is None:
+        _policy = _RetryPolicy(
+            LLM_RETRY_MAX_RETRIES,
+            LLM_RETRY_BASE_DELAY,
+            LLM_RETRY_MAX_DELAY,
+            LLM_CALL_DEADLINE_SECONDS,
+            breaker,
+            transport_metrics
+        )
+    return _policy
+
+
+def transport_report() -> Dict[str, object]:
+    """
+    Retry metrics and circuit breaker state.
+
+    Returns:
+        Dict[str, object]: Request, retry and failure counts plus "breaker_state" and "breaker_opened"
+    """
+    return {**transport_metrics.report(), "breaker_state": breaker.state, "breaker_opened": breaker.opened_count}
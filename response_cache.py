@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Optional
+
+# Default location of the on-disk cache, next to the app so it survives restarts
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # one week
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text so cosmetic differences don't produce different cache keys.
+
+    Args:
+        text (str): Raw text, e.g. extracted from a PDF or pasted by the user
+
+    Returns:
+        str: The text with line endings unified and runs of whitespace collapsed
+    """
+    if not text:
+        return ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(" ".join(line.split()) for line in lines).strip()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a content-addressed cache key from any JSON-serializable parts.
+
+    Args:
+        *parts: Values that together identify a request (inputs, options, model, prompt version)
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical JSON encoding of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent key/value cache for LLM responses backed by SQLite.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted once the cache holds more than `max_entries` rows.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        # Streamlit serves each session from its own thread, so share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """
+        Create a cache configured from environment variables.
+
+        Reads RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES and RESPONSE_CACHE_TTL_SECONDS.
+        Setting RESPONSE_CACHE_DISABLED=1 turns caching off.
+
+        Returns:
+            Optional[ResponseCache]: The cache, or None if caching is disabled
+        """
+        if os.getenv("RESPONSE_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+            return None
+        return cls(
+            path=os.getenv("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a JSON-serializable value and evict old entries if needed.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value (Any): The value to cache
+        """
+        now = time.time()
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
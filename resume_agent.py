@@ -1,29 +1,33 @@
 import os
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from dotenv import load_dotenv
+import logging
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 import json
-import httpx
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Create a custom HTTP client that handles the proxies issue
-class CustomHTTPClient(httpx.Client):
-    def __init__(self, *args, **kwargs):
-        kwargs.pop("proxies", None)  # Remove the 'proxies' argument if present
-        super().__init__(*args, **kwargs)
-
-# Initialize the LLM with the custom HTTP client
-llm = ChatOpenAI(
-    model_name="gpt-4",
-    temperature=0.7,
-    http_client=CustomHTTPClient()
-)
+import time
+import hashlib
+from shared_resources import registry, load_environment
+
+# Load environment variables from .env file (once per process), before the modules
+# below read their settings from it
+load_environment()
+
+from llm_runtime import llm_slot, on_llm_loop, submit
+from model_router import ModelRouter
+from response_cache import ResponseCache, make_cache_key, normalize_text
+from match_scoring import apply_match_scores
+from prompt_budget import prepare_inputs, clean_extracted_text, compact_analysis_json, token_savings
+from tolerant_json import JSONRepairError, parse_json, error_fragment, splice_fragment
+from chat_context import ChatSession, ChatMemory, ChunkIndex, chunk_text, load_past_run_chunks, format_chunks, format_messages
+from tracing import traced, annotate
+from tailoring_diff import TailoringDelta, diff_inputs, split_resume_sections, affected_resume_sections
+
+logger = logging.getLogger(__name__)
+
+# Each pipeline stage gets its own model settings (see model_router); async calls
+# go through the shared pooled client
+router = ModelRouter()
 
 # Define data models for resume sections
 class PersonalInfo(BaseModel):
@@ -73,6 +77,84 @@ class Resume(BaseModel):
     skills: List[Skill] = Field(description="Skills organized by category")
     certifications: Optional[List[Certification]] = Field(description="Professional certifications", default=None)
 
+def _to_score(value: Any) -> float:
+    """Read a match score as a 0-1 float; accepts percentages like 85 or "85%"."""
+    try:
+        score = float(str(value).strip().rstrip("%")) if value is not None else 0.0
+    except ValueError:
+        return 0.0
+    if score > 1:
+        score /= 100
+    return min(max(score, 0.0), 1.0)
+
+def _to_str_list(value: Any) -> List[str]:
+    """Read a list of strings from whatever shape the model used."""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        value = list(value.values())
+    if not isinstance(value, list):
+        value = [value]
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = ", ".join(str(part) for part in item.values())
+        if item is not None and str(item).strip():
+            items.append(str(item))
+    return items
+
+# Define data models for the tailoring analysis. Every field has a default and
+# values are coerced, so a response with missing or oddly shaped keys still
+# validates instead of breaking the page.
+class AnalysisModel(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _coerce(cls, value: Any, info) -> Any:
+        field = cls.model_fields[info.field_name]
+        if value is None:
+            return field.get_default(call_default_factory=True)
+        if field.annotation == List[str]:
+            return _to_str_list(value)
+        if field.annotation is float:
+            return _to_score(value)
+        if field.annotation is str and not isinstance(value, str):
+            return str(value)
+        return value
+
+class SkillsAnalysis(AnalysisModel):
+    matching_skills: List[str] = Field(description="Resume skills the job asks for", default_factory=list)
+    missing_skills: List[str] = Field(description="Skills the job asks for that the resume lacks", default_factory=list)
+    match_score: float = Field(description="Share of required skills covered, 0-1", default=0.0)
+    suggestions: List[str] = Field(description="How to improve the skills section", default_factory=list)
+
+class ExperienceAnalysis(AnalysisModel):
+    relevant_experiences: List[str] = Field(description="Experiences that match the job", default_factory=list)
+    irrelevant_experiences: List[str] = Field(description="Experiences to de-emphasize", default_factory=list)
+    match_score: float = Field(description="Experience fit, 0-1", default=0.0)
+    suggestions: List[str] = Field(description="How to improve the experience section", default_factory=list)
+
+class KeywordAnalysis(AnalysisModel):
+    found_keywords: List[str] = Field(description="Job keywords present in the resume", default_factory=list)
+    missing_keywords: List[str] = Field(description="Job keywords absent from the resume", default_factory=list)
+    match_score: float = Field(description="Share of keywords covered, 0-1", default=0.0)
+    suggestions: List[str] = Field(description="Where to add keywords", default_factory=list)
+
+class TailoredResumeSuggestions(AnalysisModel):
+    summary: str = Field(description="Suggested professional summary", default="")
+    skills: List[Any] = Field(description="Suggested skills section", default_factory=list)
+    experience: List[Any] = Field(description="Suggested experience entries", default_factory=list)
+    formatting_suggestions: List[str] = Field(description="Formatting advice", default_factory=list)
+
+class ResumeAnalysis(AnalysisModel):
+    skills_analysis: SkillsAnalysis = Field(description="Skills matching and gaps", default_factory=SkillsAnalysis)
+    experience_analysis: ExperienceAnalysis = Field(description="Experience relevance", default_factory=ExperienceAnalysis)
+    keyword_analysis: KeywordAnalysis = Field(description="Keyword optimization", default_factory=KeywordAnalysis)
+    tailored_resume: TailoredResumeSuggestions = Field(description="Suggested resume content", default_factory=TailoredResumeSuggestions)
+    overall_match_score: float = Field(description="Overall fit, 0-1", default=0.0)
+    improvement_suggestions: List[str] = Field(description="Prioritized improvements", default_factory=list)
+
 # Create a prompt template for resume analysis and tailoring
 resume_analysis_template = """
 You are an expert resume consultant and career coach. Your task is to analyze the provided resume and job description, then provide specific recommendations for tailoring the resume to match the job requirements.
@@ -102,8 +184,385 @@ resume_analysis_prompt = PromptTemplate(
     template=resume_analysis_template
 )
 
-# Create the chain for resume analysis
-resume_analysis_chain = resume_analysis_prompt | llm | RunnablePassthrough()
+# JSON structure the analysis prompts ask the model to fill in
+analysis_json_structure = """{{
+    "skills_analysis": {{
+        "matching_skills": [],
+        "missing_skills": [],
+        "match_score": 0.0,
+        "suggestions": []
+    }},
+    "experience_analysis": {{
+        "relevant_experiences": [],
+        "irrelevant_experiences": [],
+        "match_score": 0.0,
+        "suggestions": []
+    }},
+    "keyword_analysis": {{
+        "found_keywords": [],
+        "missing_keywords": [],
+        "match_score": 0.0,
+        "suggestions": []
+    }},
+    "tailored_resume": {{
+        "summary": "",
+        "skills": [],
+        "experience": [],
+        "formatting_suggestions": []
+    }},
+    "overall_match_score": 0.0,
+    "improvement_suggestions": []
+}}"""
+
+# Prompt used by tailor_resume for the detailed JSON analysis
+tailor_analysis_template = """
+Analyze the resume and job description, then provide a detailed JSON response with the following structure:
+""" + analysis_json_structure + """
+
+Resume Text:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Tailoring Options:
+{options}
+
+Provide a detailed analysis focusing on:
+1. Skills matching and gaps
+2. Experience relevance
+3. Keyword optimization
+4. Specific improvements needed
+5. ATS optimization
+"""
+
+# Prompt used by generate_resume to format structured resume data
+generate_resume_template = """
+Create a professionally formatted resume using the following information:
+
+{resume_data}
+
+Format the resume following these guidelines:
+1. Use a clean, ATS-friendly layout that will pass through applicant tracking systems
+2. Include a compelling professional summary that highlights qualifications relevant to the job
+3. Emphasize experiences and skills that match the job requirements
+4. Use strong action verbs and industry-specific keywords from the job description
+5. Ensure consistent formatting throughout
+6. Prioritize and rephrase experiences to better align with the job requirements
+7. Optimize the skills section to highlight relevant technical and soft skills
+
+The final resume should be tailored specifically for the job and make the candidate stand out to recruiters.
+"""
+
+# Prompt used by generate_tailored_resume_text for the final resume. The resume comes
+# first so prompts for the same resume share a prefix across jobs (see batch_tailor).
+tailored_resume_template = """
+Generate a tailored resume based on the original resume, the job description and the analysis below.
+
+Original Resume:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Analysis Results:
+{analysis_result}
+
+Create a professionally formatted resume that:
+1. Incorporates all suggested improvements
+2. Emphasizes matching skills and experiences
+3. Uses industry-specific keywords
+4. Is optimized for ATS systems
+5. Maintains a clean, professional format
+"""
+
+# Prompt used by tailor_and_generate_resume to get the analysis and the resume in one call
+fused_tailoring_template = """
+Analyze the resume and job description, then write the tailored resume, all in a single response.
+Respond with ONLY a JSON object with exactly two keys:
+- "analysis": an object with the following structure:
+""" + analysis_json_structure + """
+- "tailored_resume_text": the complete tailored resume as plain text, with sections separated by blank lines
+
+Resume Text:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Tailoring Options:
+{options}
+
+For the analysis, focus on:
+1. Skills matching and gaps
+2. Experience relevance
+3. Keyword optimization
+4. Specific improvements needed
+5. ATS optimization
+
+For the tailored resume, create a professionally formatted resume that:
+1. Incorporates all suggested improvements from your analysis
+2. Emphasizes matching skills and experiences
+3. Uses industry-specific keywords
+4. Is optimized for ATS systems
+5. Maintains a clean, professional format
+"""
+
+# Prompt used to fix a JSON fragment the local repairs couldn't, instead of re-running the whole stage
+json_fragment_fix_template = """
+The following fragment of a larger JSON document is invalid ({error}).
+Return only the corrected fragment: same content, valid JSON syntax, no explanation and no code fences.
+The fragment may start or end in the middle of an object or array; keep it that way.
+
+Fragment:
+{fragment}
+"""
+
+# Prompt used by update_analysis_sections to rewrite only the sections an edit invalidated
+update_analysis_template = """
+The job description or the tailoring options changed since the analysis below was written.
+Update only these sections of the analysis: {sections}
+Respond with ONLY a JSON object whose keys are exactly those sections, each with the same structure as in the previous analysis.
+
+Resume Text:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Tailoring Options:
+{options}
+
+Previous Analysis:
+{previous_analysis}
+"""
+
+# Prompt used by revise_resume_sections for one section of a tailored resume. The
+# section comes last so the revisions of one resume share a prompt prefix.
+revise_section_template = """
+Revise one section of a tailored resume for the updated job description and analysis below.
+Return only the revised section: keep its header line and its format, change only what the analysis calls for, no explanation and no code fences.
+
+Job Description:
+{job_description}
+
+Updated Analysis:
+{analysis}
+
+Section:
+{section}
+"""
+
+# Prompt used by chat for one Resume Chat turn. Only the retrieved excerpts, the
+# rolling summary and the most recent messages are sent, never the full history.
+chat_template = """
+You are a career coach chatting with a job seeker about their resume.
+Answer the user's latest message using the resume excerpts below. Be specific and
+refer to their actual experience; if the excerpts don't cover something, say so.
+
+Relevant Excerpts:
+{context}
+
+Summary of Earlier Conversation:
+{summary}
+
+Recent Messages:
+{history}
+
+User: {message}
+Assistant:"""
+
+# Prompt used to fold old chat messages into the rolling summary
+chat_summary_template = """
+Update the summary of a conversation between a job seeker and a career coach.
+Keep facts about the user, their goals and the advice already given; drop small talk.
+Write at most {max_words} words.
+
+Current Summary:
+{summary}
+
+New Messages:
+{messages}
+
+Updated Summary:"""
+
+# Prompt templates are built once at import and shared by every call
+tailor_analysis_prompt = PromptTemplate(
+    input_variables=["resume_text", "job_description", "options"],
+    template=tailor_analysis_template
+)
+generate_resume_prompt = PromptTemplate(
+    input_variables=["resume_data"],
+    template=generate_resume_template
+)
+tailored_resume_prompt = PromptTemplate(
+    input_variables=["resume_text", "job_description", "analysis_result"],
+    template=tailored_resume_template
+)
+fused_tailoring_prompt = PromptTemplate(
+    input_variables=["resume_text", "job_description", "options"],
+    template=fused_tailoring_template
+)
+json_fragment_fix_prompt = PromptTemplate(
+    input_variables=["error", "fragment"],
+    template=json_fragment_fix_template
+)
+update_analysis_prompt = PromptTemplate(
+    input_variables=["sections", "resume_text", "job_description", "options", "previous_analysis"],
+    template=update_analysis_template
+)
+revise_section_prompt = PromptTemplate(
+    input_variables=["job_description", "analysis", "section"],
+    template=revise_section_template
+)
+chat_prompt = PromptTemplate(
+    input_variables=["context", "summary", "history", "message"],
+    template=chat_template
+)
+chat_summary_prompt = PromptTemplate(
+    input_variables=["summary", "messages", "max_words"],
+    template=chat_summary_template
+)
+
+# The prompt of each chain, keyed by the model router stage the chain runs on
+CHAIN_PROMPTS = {
+    "process_resume_input": resume_analysis_prompt,
+    "generate_resume": generate_resume_prompt,
+    "tailor_resume": tailor_analysis_prompt,
+    "generate_tailored_resume_text": tailored_resume_prompt,
+    "tailor_and_generate_resume": fused_tailoring_prompt,
+    "update_analysis": update_analysis_prompt,
+    "revise_resume_section": revise_section_prompt,
+    "json_repair": json_fragment_fix_prompt,
+    "chat": chat_prompt,
+    "chat_summary": chat_summary_prompt
+}
+
+def get_chain(stage: str) -> Runnable:
+    """
+    The `prompt | model` chain for a stage, compiled on first use and shared by every session.
+
+    Built lazily so importing this module creates no API client.
+
+    Args:
+        stage (str): A key of CHAIN_PROMPTS
+
+    Returns:
+        Runnable: The chain
+    """
+    return registry.get(f"chain:{stage}", lambda: CHAIN_PROMPTS[stage] | router.llm(stage))
+
+# Tailoring preferences used when the caller doesn't pass any
+DEFAULT_TAILORING_OPTIONS = {
+    "emphasize_matching_skills": True,
+    "prioritize_relevant_experience": True,
+    "add_missing_keywords": True,
+    "optimize_for_ats": True
+}
+
+def _prompt_version(template: str) -> str:
+    """Short fingerprint of a prompt template, so editing a prompt invalidates its cached responses."""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+# Persistent cache of LLM responses (None when disabled via RESPONSE_CACHE_DISABLED)
+response_cache = ResponseCache.from_env()
+
+def _cache_key(stage: str, template: str, resume_text: str, job_description: str, extra: Any) -> str:
+    """Content-addressed key over the normalized inputs, the model and the prompt version."""
+    return make_cache_key(
+        stage,
+        router.route(stage).model,
+        _prompt_version(template),
+        normalize_text(resume_text),
+        normalize_text(job_description),
+        extra
+    )
+
+def _split_resume_input(user_input: str) -> Tuple[str, str]:
+    """Split the combined "Resume: ...\nJob Description: ..." input into its two parts."""
+    parts = user_input.split("\nJob Description: ")
+    resume_text = parts[0].replace("Resume: ", "")
+    job_description = parts[1] if len(parts) > 1 else ""
+    return resume_text, job_description
+
+# Model-assisted fixes to try on a JSON response before giving up on it
+MAX_JSON_FRAGMENT_FIXES = 2
+
+def _fragment_fix_inputs(error: JSONRepairError) -> Tuple[Tuple[int, int], Dict[str, str]]:
+    span = error_fragment(error.text, error.position)
+    return span, {"error": str(error), "fragment": error.text[span[0]:span[1]]}
+
+@traced("parse_json")
+def _parse_llm_json(content: str) -> Any:
+    """
+    Parse a JSON response, repairing it locally and, failing that, having the
+    model fix only the invalid fragment rather than regenerate the response.
+    """
+    try:
+        return parse_json(content)
+    except JSONRepairError as e:
+        error = e
+    for _ in range(MAX_JSON_FRAGMENT_FIXES):
+        span, inputs = _fragment_fix_inputs(error)
+        fixed = get_chain("json_repair").invoke(inputs)
+        try:
+            return parse_json(splice_fragment(error.text, span, fixed.content))
+        except JSONRepairError as e:
+            error = e
+    raise error
+
+@traced("parse_json")
+async def _aparse_llm_json(content: str) -> Any:
+    """Async version of _parse_llm_json."""
+    try:
+        return parse_json(content)
+    except JSONRepairError as e:
+        error = e
+    for _ in range(MAX_JSON_FRAGMENT_FIXES):
+        span, inputs = _fragment_fix_inputs(error)
+        async with llm_slot():
+            fixed = await get_chain("json_repair").ainvoke(inputs)
+        try:
+            return parse_json(splice_fragment(error.text, span, fixed.content))
+        except JSONRepairError as e:
+            error = e
+    raise error
+
+def _validate_analysis(data: Any, content: str, cache_key: str) -> Dict[str, Any]:
+    """Validate parsed analysis JSON against ResumeAnalysis, caching it when valid."""
+    try:
+        analysis_result = ResumeAnalysis.model_validate(data).model_dump()
+    except ValidationError:
+        return {
+            "error": "Failed to parse analysis result",
+            "raw_response": content
+        }
+    if response_cache is not None:
+        response_cache.set(cache_key, analysis_result)
+    return analysis_result
+
+def _parse_analysis_result(content: str, cache_key: str) -> Dict[str, Any]:
+    """Parse and validate the JSON analysis returned by the LLM, caching it when valid."""
+    try:
+        data = _parse_llm_json(content)
+    except JSONRepairError:
+        # If the response can't be repaired, return a structured error
+        return {
+            "error": "Failed to parse analysis result",
+            "raw_response": content
+        }
+    return _validate_analysis(data, content, cache_key)
+
+async def _aparse_analysis_result(content: str, cache_key: str) -> Dict[str, Any]:
+    """Async version of _parse_analysis_result."""
+    try:
+        data = await _aparse_llm_json(content)
+    except JSONRepairError:
+        return {
+            "error": "Failed to parse analysis result",
+            "raw_response": content
+        }
+    return _validate_analysis(data, content, cache_key)
 
 def process_resume_input(user_input, current_resume, current_step):
     """
@@ -120,12 +579,9 @@ def process_resume_input(user_input, current_resume, current_step):
             - next_step: The next step in the process
             - updated_resume: The updated resume data
     """
-    # Split the input into resume text and job description
-    parts = user_input.split("\nJob Description: ")
-    resume_text = parts[0].replace("Resume: ", "")
-    job_description = parts[1] if len(parts) > 1 else ""
+    resume_text, job_description = _split_resume_input(user_input)
     
-    result = resume_analysis_chain.invoke({
+    result = get_chain("process_resume_input").invoke({
         "resume_text": resume_text,
         "job_description": job_description,
         "current_resume": current_resume
@@ -147,131 +603,52 @@ def generate_resume(resume_data):
     Returns:
         str: Formatted resume text optimized for the specific job
     """
-    # Create a prompt for generating the tailored resume
-    generate_template = """
-    Create a professionally formatted resume using the following information:
-    
-    {resume_data}
-    
-    Format the resume following these guidelines:
-    1. Use a clean, ATS-friendly layout that will pass through applicant tracking systems
-    2. Include a compelling professional summary that highlights qualifications relevant to the job
-    3. Emphasize experiences and skills that match the job requirements
-    4. Use strong action verbs and industry-specific keywords from the job description
-    5. Ensure consistent formatting throughout
-    6. Prioritize and rephrase experiences to better align with the job requirements
-    7. Optimize the skills section to highlight relevant technical and soft skills
-    
-    The final resume should be tailored specifically for the job and make the candidate stand out to recruiters.
-    """
-    
-    generate_prompt = PromptTemplate(
-        input_variables=["resume_data"],
-        template=generate_template
-    )
-    
-    generate_chain = generate_prompt | llm
-    
-    result = generate_chain.invoke({"resume_data": resume_data})
+    result = get_chain("generate_resume").invoke({"resume_data": resume_data})
     return result.content
 
-def tailor_resume(resume_text: str, job_description: str, options: Dict[str, bool] = None) -> Dict[str, Any]:
+@traced()
+def tailor_resume(resume_text: str, job_description: str, options: Dict[str, bool] = None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Tailor a resume to match a job description and return detailed analysis in JSON format.
+
+    The skill and keyword match scores and lists, and the overall match score,
+    are computed locally by match_scoring rather than taken from the model.
     
     Args:
         resume_text (str): The text content of the resume
         job_description (str): The job description to tailor the resume for
         options (Dict[str, bool]): Optional tailoring preferences
+        use_cache (bool): Return a previously cached analysis for identical inputs
         
     Returns:
         Dict[str, Any]: A dictionary containing the analysis and tailored resume
     """
     # Default options if none provided
     if options is None:
-        options = {
-            "emphasize_matching_skills": True,
-            "prioritize_relevant_experience": True,
-            "add_missing_keywords": True,
-            "optimize_for_ats": True
-        }
-    
-    # Create a prompt for detailed analysis
-    analysis_template = """
-    Analyze the resume and job description, then provide a detailed JSON response with the following structure:
-    {{
-        "skills_analysis": {{
-            "matching_skills": [],
-            "missing_skills": [],
-            "match_score": 0.0,
-            "suggestions": []
-        }},
-        "experience_analysis": {{
-            "relevant_experiences": [],
-            "irrelevant_experiences": [],
-            "match_score": 0.0,
-            "suggestions": []
-        }},
-        "keyword_analysis": {{
-            "found_keywords": [],
-            "missing_keywords": [],
-            "match_score": 0.0,
-            "suggestions": []
-        }},
-        "tailored_resume": {{
-            "summary": "",
-            "skills": [],
-            "experience": [],
-            "formatting_suggestions": []
-        }},
-        "overall_match_score": 0.0,
-        "improvement_suggestions": []
-    }}
-
-    Resume Text:
-    {resume_text}
-
-    Job Description:
-    {job_description}
-
-    Tailoring Options:
-    {options}
-
-    Provide a detailed analysis focusing on:
-    1. Skills matching and gaps
-    2. Experience relevance
-    3. Keyword optimization
-    4. Specific improvements needed
-    5. ATS optimization
-    """
-
-    analysis_prompt = PromptTemplate(
-        input_variables=["resume_text", "job_description", "options"],
-        template=analysis_template
-    )
+        options = dict(DEFAULT_TAILORING_OPTIONS)
 
-    # Create the chain for analysis
-    analysis_chain = analysis_prompt | llm
+    prepared = prepare_inputs(resume_text, job_description, model=router.route("tailor_resume").model)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
 
+    cache_key = _cache_key("tailor_resume", tailor_analysis_template, resume_text, job_description, options)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return apply_match_scores(cached, resume_text, job_description)
+    
+    prepared.record("tailor_resume")
     # Get the analysis
-    result = analysis_chain.invoke({
+    result = get_chain("tailor_resume").invoke({
         "resume_text": resume_text,
         "job_description": job_description,
         "options": json.dumps(options)
     })
 
-    try:
-        # Parse the JSON response
-        analysis_result = json.loads(result.content)
-        return analysis_result
-    except json.JSONDecodeError:
-        # If the response isn't valid JSON, return a structured error
-        return {
-            "error": "Failed to parse analysis result",
-            "raw_response": result.content
-        }
+    return apply_match_scores(_parse_analysis_result(result.content, cache_key), resume_text, job_description)
 
-def generate_tailored_resume_text(resume_text: str, job_description: str, analysis_result: Dict[str, Any]) -> str:
+@traced()
+def generate_tailored_resume_text(resume_text: str, job_description: str, analysis_result: Dict[str, Any], use_cache: bool = True) -> str:
     """
     Generate the final tailored resume text based on the analysis.
     
@@ -279,48 +656,565 @@ def generate_tailored_resume_text(resume_text: str, job_description: str, analys
         resume_text (str): Original resume text
         job_description (str): Job description
         analysis_result (Dict[str, Any]): Analysis results from tailor_resume
+        use_cache (bool): Return a previously cached resume for identical inputs
         
     Returns:
         str: The tailored resume text
     """
-    # Create a prompt for generating the final resume
-    generate_template = """
-    Generate a tailored resume based on the following analysis:
-    
-    Analysis Results:
-    {analysis_result}
+    prepared = prepare_inputs(resume_text, job_description, analysis_result,
+                              model=router.route("generate_tailored_resume_text").model, trim_resume=False)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
+
+    cache_key = _cache_key("generate_tailored_resume_text", tailored_resume_template, resume_text, job_description, prepared.analysis_json)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+
+    prepared.record("generate_tailored_resume_text")
+    # Generate the tailored resume
+    result = get_chain("generate_tailored_resume_text").invoke({
+        "resume_text": resume_text,
+        "job_description": job_description,
+        "analysis_result": prepared.analysis_json
+    })
+
+    if response_cache is not None:
+        response_cache.set(cache_key, result.content)
+    return result.content
+
+def stream_resume(resume_data) -> Iterator[str]:
+    """
+    Streaming version of generate_resume.
     
-    Original Resume:
-    {resume_text}
+    Args:
+        resume_data (dict): The resume data to be tailored
+        
+    Yields:
+        str: Chunks of the formatted resume text as the model produces them
+    """
+    for chunk in get_chain("generate_resume").stream({"resume_data": resume_data}):
+        yield chunk.content
+
+@traced()
+def stream_tailored_resume_text(resume_text: str, job_description: str, analysis_result: Dict[str, Any], use_cache: bool = True) -> Iterator[str]:
+    """
+    Streaming version of generate_tailored_resume_text.
     
-    Job Description:
-    {job_description}
+    A cached resume is yielded as a single chunk; otherwise chunks are yielded as
+    they arrive and the complete text is cached once the stream finishes.
     
-    Create a professionally formatted resume that:
-    1. Incorporates all suggested improvements
-    2. Emphasizes matching skills and experiences
-    3. Uses industry-specific keywords
-    4. Is optimized for ATS systems
-    5. Maintains a clean, professional format
+    Args:
+        resume_text (str): Original resume text
+        job_description (str): Job description
+        analysis_result (Dict[str, Any]): Analysis results from tailor_resume
+        use_cache (bool): Return a previously cached resume for identical inputs
+        
+    Yields:
+        str: Chunks of the tailored resume text
     """
+    prepared = prepare_inputs(resume_text, job_description, analysis_result,
+                              model=router.route("generate_tailored_resume_text").model, trim_resume=False)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
 
-    generate_prompt = PromptTemplate(
-        input_variables=["resume_text", "job_description", "analysis_result"],
-        template=generate_template
-    )
+    cache_key = _cache_key("generate_tailored_resume_text", tailored_resume_template, resume_text, job_description, prepared.analysis_json)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            yield cached
+            return
 
-    # Create the chain for generation
-    generate_chain = generate_prompt | llm
+    prepared.record("generate_tailored_resume_text")
+    chunks = []
+    for chunk in get_chain("generate_tailored_resume_text").stream({
+        "resume_text": resume_text,
+        "job_description": job_description,
+        "analysis_result": prepared.analysis_json
+    }):
+        chunks.append(chunk.content)
+        yield chunk.content
 
-    # Generate the tailored resume
-    result = generate_chain.invoke({
+    if response_cache is not None:
+        response_cache.set(cache_key, "".join(chunks))
+
+@traced()
+def tailor_and_generate_resume(resume_text: str, job_description: str, options: Dict[str, bool] = None, use_cache: bool = True) -> Tuple[Dict[str, Any], str]:
+    """
+    Analyze and tailor a resume with a single LLM call.
+
+    This is an opt-in alternative to calling tailor_resume and then
+    generate_tailored_resume_text: the resume and job description are only
+    sent once and the analysis JSON is never sent back to the model.
+
+    Args:
+        resume_text (str): The text content of the resume
+        job_description (str): The job description to tailor the resume for
+        options (Dict[str, bool]): Optional tailoring preferences
+        use_cache (bool): Return a previously cached result for identical inputs
+
+    Returns:
+        Tuple[Dict[str, Any], str]: The analysis (same shape as tailor_resume) and the tailored resume text
+    """
+    if options is None:
+        options = dict(DEFAULT_TAILORING_OPTIONS)
+
+    prepared = prepare_inputs(resume_text, job_description,
+                              model=router.route("tailor_and_generate_resume").model, trim_resume=False)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
+
+    cache_key = _cache_key("tailor_and_generate_resume", fused_tailoring_template, resume_text, job_description, options)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return apply_match_scores(cached["analysis"], resume_text, job_description), cached["tailored_resume_text"]
+
+    prepared.record("tailor_and_generate_resume")
+    result = get_chain("tailor_and_generate_resume").invoke({
         "resume_text": resume_text,
         "job_description": job_description,
-        "analysis_result": json.dumps(analysis_result)
+        "options": json.dumps(options)
     })
 
+    try:
+        fused_result = _parse_llm_json(result.content)
+        analysis_result = ResumeAnalysis.model_validate(fused_result["analysis"]).model_dump()
+        tailored_resume = fused_result["tailored_resume_text"]
+        if not isinstance(tailored_resume, str) or not tailored_resume.strip():
+            raise ValueError("Missing tailored resume text")
+    except (JSONRepairError, ValidationError, KeyError, TypeError, ValueError):
+        # Same error shape as tailor_resume, with no resume text
+        return {
+            "error": "Failed to parse analysis result",
+            "raw_response": result.content
+        }, ""
+
+    if response_cache is not None:
+        response_cache.set(cache_key, {"analysis": analysis_result, "tailored_resume_text": tailored_resume})
+    return apply_match_scores(analysis_result, resume_text, job_description), tailored_resume
+
+@traced()
+def update_analysis_sections(resume_text: str, job_description: str, options: Dict[str, bool], previous_analysis: Dict[str, Any],
+                             sections: List[str], use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Have the model rewrite some sections of a previous analysis and keep the rest.
+
+    Only the listed sections are written by the model, so the response is a
+    fraction of a full analysis. Fields a rewritten section leaves out keep
+    their previous values; match scores are recomputed locally as in tailor_resume.
+
+    Args:
+        resume_text (str): The text content of the resume
+        job_description (str): The new job description
+        options (Dict[str, bool]): The new tailoring options
+        previous_analysis (Dict[str, Any]): The analysis to update
+        sections (List[str]): Top-level analysis keys to rewrite
+        use_cache (bool): Return a previously cached update for identical inputs
+
+    Returns:
+        Optional[Dict[str, Any]]: The complete updated analysis, or None if the
+        response couldn't be parsed (callers then run the full analysis)
+    """
+    prepared = prepare_inputs(resume_text, job_description, model=router.route("update_analysis").model)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
+    # The full previous analysis is sent, so the model sees every field of the sections it rewrites
+    previous_json = json.dumps(previous_analysis, separators=(",", ":"), ensure_ascii=False)
+
+    cache_key = _cache_key("update_analysis", update_analysis_template, resume_text, job_description,
+                           {"options": options, "sections": sections, "previous": previous_json})
+    updated = None
+    if use_cache and response_cache is not None:
+        updated = response_cache.get(cache_key)
+        annotate(cache_hit=updated is not None)
+
+    if updated is None:
+        prepared.record("update_analysis")
+        result = get_chain("update_analysis").invoke({
+            "sections": ", ".join(sections),
+            "resume_text": resume_text,
+            "job_description": job_description,
+            "options": json.dumps(options),
+            "previous_analysis": previous_json
+        })
+        try:
+            data = _parse_llm_json(result.content)
+        except JSONRepairError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        updated = {name: data[name] for name in sections if name in data}
+        if not updated:
+            return None
+
+    merged = dict(previous_analysis)
+    for name, value in updated.items():
+        merged[name] = {**merged[name], **value} if isinstance(merged.get(name), dict) and isinstance(value, dict) else value
+    try:
+        analysis_result = ResumeAnalysis.model_validate(merged).model_dump()
+    except ValidationError:
+        return None
+    if response_cache is not None:
+        response_cache.set(cache_key, updated)
+    return apply_match_scores(analysis_result, resume_text, job_description)
+
+@traced()
+def revise_resume_sections(sections: List[str], job_description: str, analysis_result: Dict[str, Any],
+                           analysis_sections: List[str], use_cache: bool = True) -> List[str]:
+    """
+    Revise sections of a tailored resume for an updated analysis, one concurrent call per section.
+
+    Each call only carries the job description, the rewritten analysis sections
+    and one resume section, and only returns that section.
+
+    Args:
+        sections (List[str]): Resume sections to revise, each starting with its header
+        job_description (str): The new job description
+        analysis_result (Dict[str, Any]): The updated analysis
+        analysis_sections (List[str]): The analysis sections that were rewritten
+        use_cache (bool): Reuse previously cached revisions of identical sections
+
+    Returns:
+        List[str]: The revised sections, in order (a section the model returns empty is kept)
+    """
+    changed = {name: analysis_result[name] for name in analysis_sections if name in analysis_result}
+    prepared = prepare_inputs("\n\n".join(sections), job_description, changed, model=router.route("revise_resume_section").model)
+    job_description = prepared.job_description
+
+    revised: List[Optional[str]] = [None] * len(sections)
+    keys = [_cache_key("revise_resume_section", revise_section_template, section, job_description, prepared.analysis_json)
+            for section in sections]
+    if use_cache and response_cache is not None:
+        revised = [response_cache.get(key) for key in keys]
+        annotate(cache_hits=sum(text is not None for text in revised))
+
+    pending = [index for index, text in enumerate(revised) if text is None]
+    if pending:
+        prepared.record("revise_resume_section")
+        results = get_chain("revise_resume_section").batch([{
+            "job_description": job_description,
+            "analysis": prepared.analysis_json,
+            "section": sections[index]
+        } for index in pending])
+        for index, result in zip(pending, results):
+            text = result.content.strip()
+            revised[index] = text or sections[index]
+            if text and response_cache is not None:
+                response_cache.set(keys[index], text)
+    return revised
+
+@traced()
+def retailor_resume(previous: Dict[str, Any], resume_text: str, job_description: str, options: Dict[str, bool] = None,
+                    delta: Optional[TailoringDelta] = None, use_cache: bool = True) -> Tuple[Dict[str, Any], str]:
+    """
+    Update a previous tailoring run after an option toggle or a small job description edit.
+
+    Analysis sections the change doesn't touch are kept, the others are
+    rewritten by update_analysis_sections, and only the resume sections they
+    feed are revised (see tailoring_diff). If nothing the analysis depends on
+    changed, the previous run is reused with recomputed match scores and no
+    LLM call. Toggling ATS optimization regenerates the whole resume, and an
+    update that can't be parsed falls back to the full two-stage pipeline.
+
+    Args:
+        previous (Dict[str, Any]): The previous run, in the shape tailoring_diff.diff_inputs takes
+        resume_text (str): The text content of the resume
+        job_description (str): The new job description
+        options (Dict[str, bool]): The new tailoring options
+        delta (TailoringDelta): The diff against previous, if already computed
+        use_cache (bool): Use cached responses for identical inputs
+
+    Returns:
+        Tuple[Dict[str, Any], str]: The analysis (same shape as tailor_resume) and the tailored resume text
+
+    Raises:
+        ValueError: The previous run can't be updated for these inputs
+    """
+    if options is None:
+        options = dict(DEFAULT_TAILORING_OPTIONS)
+    if delta is None:
+        delta = diff_inputs(previous, resume_text, job_description, options)
+    if not delta.reusable:
+        raise ValueError(f"The previous run can't be updated: {delta.reason}")
+    annotate(incremental_reason=delta.reason, regenerated_sections=",".join(delta.analysis_sections),
+             job_similarity=round(delta.similarity, 3))
+
+    if not delta.analysis_sections:
+        analysis = json.loads(json.dumps(previous["analysis"]))
+        analysis = apply_match_scores(analysis, clean_extracted_text(resume_text), clean_extracted_text(job_description))
+    else:
+        analysis = update_analysis_sections(resume_text, job_description, options, previous["analysis"],
+                                            delta.analysis_sections, use_cache)
+        if analysis is None:
+            annotate(incremental_fallback=True)
+            analysis = tailor_resume(resume_text, job_description, options, use_cache)
+            return analysis, generate_tailored_resume_text(resume_text, job_description, analysis, use_cache)
+
+    if delta.unchanged:
+        return analysis, previous["tailored_resume"]
+    sections = split_resume_sections(previous["tailored_resume"])
+    affected = affected_resume_sections(sections, delta.analysis_sections)
+    annotate(revised_resume_sections=len(affected), resume_sections=len(sections))
+    if delta.rewrite_resume or not affected:
+        # Layout changes, or a resume whose sections couldn't be told apart, are generated in full
+        return analysis, generate_tailored_resume_text(resume_text, job_description, analysis, use_cache)
+    revised = revise_resume_sections([sections[index] for index in affected], job_description, analysis,
+                                     delta.analysis_sections, use_cache)
+    for index, text in zip(affected, revised):
+        sections[index] = text
+    return analysis, "\n\n".join(sections)
+
+def compare_tailoring_pipelines(resume_text: str, job_description: str, options: Dict[str, bool] = None) -> Dict[str, Any]:
+    """
+    Run the two-call and the fused pipelines on the same input and measure both.
+
+    The response cache is bypassed so both paths hit the API.
+
+    Args:
+        resume_text (str): The text content of the resume
+        job_description (str): The job description to tailor the resume for
+        options (Dict[str, bool]): Optional tailoring preferences
+
+    Returns:
+        Dict[str, Any]: Latency and token usage per pipeline, plus the savings of the fused path
+    """
+    from langchain_community.callbacks import get_openai_callback
+
+    def measure(run):
+        with get_openai_callback() as usage:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        return {
+            "latency_seconds": round(elapsed, 3),
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "llm_calls": usage.successful_requests
+        }
+
+    def run_two_calls():
+        analysis = tailor_resume(resume_text, job_description, options, use_cache=False)
+        generate_tailored_resume_text(resume_text, job_description, analysis, use_cache=False)
+
+    two_call = measure(run_two_calls)
+    fused = measure(lambda: tailor_and_generate_resume(resume_text, job_description, options, use_cache=False))
+
+    return {
+        "two_call": two_call,
+        "fused": fused,
+        "savings": {
+            "latency_seconds": round(two_call["latency_seconds"] - fused["latency_seconds"], 3),
+            "prompt_tokens": two_call["prompt_tokens"] - fused["prompt_tokens"],
+            "total_tokens": two_call["total_tokens"] - fused["total_tokens"]
+        }
+    }
+
+# Async variants: these run on the shared LLM event loop (see llm_runtime), so many
+# requests can be in flight at once over one connection pool, bounded by LLM_MAX_CONCURRENCY.
+
+@on_llm_loop
+async def aprocess_resume_input(user_input, current_resume, current_step):
+    """
+    Async version of process_resume_input.
+    
+    Args:
+        user_input (str): The combined resume text and job description
+        current_resume (dict): The current state of the resume
+        current_step (str): The current step in the process
+        
+    Returns:
+        dict: Same structure as process_resume_input
+    """
+    resume_text, job_description = _split_resume_input(user_input)
+
+    async with llm_slot():
+        result = await get_chain("process_resume_input").ainvoke({
+            "resume_text": resume_text,
+            "job_description": job_description,
+            "current_resume": current_resume
+        })
+
+    return {
+        "content": result.content,
+        "next_step": "tailor",
+        "updated_resume": current_resume
+    }
+
+@on_llm_loop
+@traced()
+async def atailor_resume(resume_text: str, job_description: str, options: Dict[str, bool] = None, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Async version of tailor_resume.
+    
+    Args:
+        resume_text (str): The text content of the resume
+        job_description (str): The job description to tailor the resume for
+        options (Dict[str, bool]): Optional tailoring preferences
+        use_cache (bool): Return a previously cached analysis for identical inputs
+        
+    Returns:
+        Dict[str, Any]: Same structure as tailor_resume
+    """
+    if options is None:
+        options = dict(DEFAULT_TAILORING_OPTIONS)
+
+    prepared = prepare_inputs(resume_text, job_description, model=router.route("tailor_resume").model)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
+
+    cache_key = _cache_key("tailor_resume", tailor_analysis_template, resume_text, job_description, options)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return apply_match_scores(cached, resume_text, job_description)
+
+    prepared.record("tailor_resume")
+    async with llm_slot():
+        result = await get_chain("tailor_resume").ainvoke({
+            "resume_text": resume_text,
+            "job_description": job_description,
+            "options": json.dumps(options)
+        })
+
+    return apply_match_scores(await _aparse_analysis_result(result.content, cache_key), resume_text, job_description)
+
+@on_llm_loop
+@traced()
+async def agenerate_tailored_resume_text(resume_text: str, job_description: str, analysis_result: Dict[str, Any], use_cache: bool = True) -> str:
+    """
+    Async version of generate_tailored_resume_text.
+    
+    Args:
+        resume_text (str): Original resume text
+        job_description (str): Job description
+        analysis_result (Dict[str, Any]): Analysis results from tailor_resume
+        use_cache (bool): Return a previously cached resume for identical inputs
+        
+    Returns:
+        str: The tailored resume text
+    """
+    prepared = prepare_inputs(resume_text, job_description, analysis_result,
+                              model=router.route("generate_tailored_resume_text").model, trim_resume=False)
+    resume_text, job_description = prepared.resume_text, prepared.job_description
+
+    cache_key = _cache_key("generate_tailored_resume_text", tailored_resume_template, resume_text, job_description, prepared.analysis_json)
+    if use_cache and response_cache is not None:
+        cached = response_cache.get(cache_key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+
+    prepared.record("generate_tailored_resume_text")
+    async with llm_slot():
+        result = await get_chain("generate_tailored_resume_text").ainvoke({
+            "resume_text": resume_text,
+            "job_description": job_description,
+            "analysis_result": prepared.analysis_json
+        })
+
+    if response_cache is not None:
+        response_cache.set(cache_key, result.content)
+    return result.content
+
+def create_chat_session(resume_text: str, include_past_runs: bool = False) -> ChatSession:
+    """
+    Index a resume for Resume Chat.
+
+    Args:
+        resume_text (str): The resume text
+        include_past_runs (bool): Also index job descriptions and suggestions from
+            earlier tailoring runs of this resume saved under Resume/
+
+    Returns:
+        ChatSession: The retrieval index and an empty conversation memory
+    """
+    chunks = chunk_text(clean_extracted_text(resume_text), "resume")
+    if include_past_runs:
+        chunks += load_past_run_chunks(resume_text)
+    return ChatSession(index=ChunkIndex(chunks))
+
+def _chat_inputs(session: ChatSession, message: str) -> Dict[str, str]:
+    """Prompt inputs for one turn: retrieved excerpts, summary and recent messages."""
+    # The last user message helps resolve follow-ups like "and for that role?"
+    previous = [m["content"] for m in session.memory.messages if m["role"] == "user"][-1:]
+    chunks = session.index.retrieve(" ".join(previous + [message]))
+    return {
+        "context": format_chunks(chunks) or "(no resume content available)",
+        "summary": session.memory.summary or "(none)",
+        "history": format_messages(session.memory.history()) or "(none)",
+        "message": message
+    }
+
+async def _afold_chat_summary(memory: ChatMemory) -> None:
+    """Fold the memory's unsummarized messages into its summary; on failure they stay as history."""
+    while memory.unsummarized:
+        batch = list(memory.unsummarized)
+        try:
+            async with llm_slot():
+                result = await get_chain("chat_summary").ainvoke({
+                    "summary": memory.summary or "(none)",
+                    "messages": format_messages(batch),
+                    "max_words": memory.summary_budget * 3 // 4
+                })
+        except Exception as e:
+            logger.warning("Chat summary update failed, retrying after the next turn: %s", e)
+            return
+        memory.summary = result.content.strip()
+        del memory.unsummarized[:len(batch)]
+
+def _record_chat_turn(session: ChatSession, message: str, reply: str) -> None:
+    """
+    Add a turn to the memory; messages over the history budget are folded
+    into the summary on the shared LLM loop, off the reply path.
+    """
+    memory = session.memory
+    memory.add("user", message)
+    memory.add("assistant", reply)
+    memory.overflow()
+    if memory.unsummarized and (memory.summarizing is None or memory.summarizing.done()):
+        memory.summarizing = submit(_afold_chat_summary(memory))
+
+def chat(session: ChatSession, message: str) -> str:
+    """
+    Answer one Resume Chat message.
+
+    The prompt holds only the resume chunks relevant to this turn, a rolling
+    summary and the newest messages, so its size stays bounded however long
+    the conversation runs.
+
+    Args:
+        session (ChatSession): Session from create_chat_session, updated in place
+        message (str): The user's message
+
+    Returns:
+        str: The assistant's reply
+    """
+    result = get_chain("chat").invoke(_chat_inputs(session, message))
+    _record_chat_turn(session, message, result.content)
     return result.content
 
+def stream_chat(session: ChatSession, message: str) -> Iterator[str]:
+    """
+    Stream the reply to one Resume Chat message token by token.
+
+    Same prompt as chat; the turn is added to the session's memory once the
+    reply is complete.
+
+    Args:
+        session (ChatSession): Session from create_chat_session, updated in place
+        message (str): The user's message
+
+    Yields:
+        str: Pieces of the reply as they arrive
+    """
+    chunks = []
+    for chunk in get_chain("chat").stream(_chat_inputs(session, message)):
+        chunks.append(chunk.content)
+        yield chunk.content
+    _record_chat_turn(session, message, "".join(chunks))
+
 # Run if this file is executed directly
 if __name__ == "__main__":
     # Example usage
@@ -369,3 +1263,16 @@ if __name__ == "__main__":
     tailored_resume = generate_tailored_resume_text(sample_resume, sample_job_description, analysis)
     print("\nTailored Resume:")
     print(tailored_resume)
+
+    # Compare the two-call pipeline against the fused single-call mode
+    comparison = compare_tailoring_pipelines(sample_resume, sample_job_description)
+    print("\nPipeline Comparison:")
+    print(json.dumps(comparison, indent=2))
+
+    # Input tokens saved by cleaning and budgeting the prompts
+    print("\nPrompt Token Savings:")
+    print(json.dumps(token_savings.report(), indent=2))
+
+    # Where the time went, per pipeline stage and model tier
+    print("\nStage Latency:")
+    print(json.dumps(router.stats.report(), indent=2))
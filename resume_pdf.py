@@ -0,0 +1,327 @@
+import copy
+import time
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from fpdf import FPDF, set_global
+from resume_storage import iter_run_folders, load_run_folder
+from tracing import span, traced
+from shared_resources import registry
+from font_bundle import FONT_DIR, FONT_FAMILY, FONT_STYLES, check_bundle, fix_ttf_paths
+
+logger = logging.getLogger(__name__)
+
+# Set professional colors
+PRIMARY_COLOR = (0, 51, 102)  # Dark blue
+SECONDARY_COLOR = (102, 102, 102)  # Gray
+
+SKILLS_HEADERS = ["SKILLS", "TECHNICAL SKILLS", "PROFESSIONAL SKILLS", "CORE SKILLS"]
+
+
+def sanitize_text(text):
+    """Sanitize text to handle problematic characters."""
+    # Replace problematic characters with their ASCII equivalents
+    replacements = {
+        '\u2013': '-',  # en-dash
+        '\u2014': '--', # em-dash
+        '\u2018': "'",  # left single quote
+        '\u2019': "'",  # right single quote
+        '\u201C': '"',  # left double quote
+        '\u201D': '"',  # right double quote
+        '\u2026': '...', # ellipsis
+        '\u2022': '-'   # bullet
+    }
+
+    for char, replacement in replacements.items():
+        text = text.replace(char, replacement)
+
+    # Core PDF fonts only cover Latin-1
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+class _SubsetList(list):
+    """
+    The list fpdf uses to track which characters of a TTF font a document uses.
+
+    fpdf checks `cid in font['subset']` for every code point in the font when it
+    writes the width table, which is a linear scan per check on a plain list.
+    This keeps a set alongside the list so those checks are O(1).
+    """
+
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._members = set(self)
+
+    def append(self, item):
+        super().append(item)
+        self._members.add(item)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._members = set(self)
+
+    def __contains__(self, item):
+        return item in self._members
+
+
+def _parse_fonts(font_dir: str) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """
+    Parse the Roboto fonts with a throwaway document running fpdf's own loader; empty if unavailable.
+
+    Fonts come only from the verified bundle in font_dir (see font_bundle), never
+    from the network. fpdf is only pointed at the .pkl metric caches when the
+    manifest vouches for them; otherwise the metrics are parsed from the TTFs
+    and nothing is written to font_dir.
+    """
+    with span("load_fonts", font_dir=font_dir):
+        status = check_bundle(font_dir)
+        if not status.usable:
+            return {}, {}
+        cache_mode = 0 if status.caches_valid else 1
+        try:
+            # 0 reads (and would write) the caches next to the TTFs, 1 disables them
+            set_global("FPDF_CACHE_MODE", cache_mode)
+            template = FPDF()
+            for style, file_name in FONT_STYLES.items():
+                template.add_font(FONT_FAMILY, style, str(Path(font_dir) / file_name), uni=True)
+            fix_ttf_paths(template.fonts, template.font_files)
+            return template.fonts, template.font_files
+        except Exception as e:
+            logger.error("Failed to load font: %s", e)
+            return {}, {}
+        finally:
+            set_global("FPDF_CACHE_MODE", 0)
+
+
+class ResumePDFRenderer:
+    """
+    Renders tailored resume text to PDF bytes.
+
+    The Roboto fonts are parsed once per process and kept in the shared
+    registry: their metrics (the large character width tables from the .pkl
+    caches in fonts/) are shared read-only by every renderer and document
+    instead of being reloaded per request. Only the per-document state,
+    i.e. the character subset, is copied.
+    """
+
+    def __init__(self, font_dir: str = FONT_DIR):
+        self.font_dir = font_dir
+        self._fonts: Optional[Dict[str, dict]] = None
+        self._font_files: Optional[Dict[str, dict]] = None
+
+    def _load_fonts(self) -> None:
+        if self._fonts is None:
+            fonts, font_files = registry.get(f"font_metrics:{self.font_dir}", lambda: _parse_fonts(self.font_dir))
+            self._font_files = font_files
+            self._fonts = fonts
+
+    @property
+    def has_unicode_fonts(self) -> bool:
+        self._load_fonts()
+        return bool(self._fonts)
+
+    def new_document(self) -> FPDF:
+        """
+        Create an empty document with the shared fonts already registered.
+
+        Returns:
+            FPDF: A document with one page and the body font selected
+        """
+        self._load_fonts()
+        pdf = FPDF()
+        for fontkey, font in self._fonts.items():
+            entry = dict(font)
+            entry["i"] = len(pdf.fonts) + 1
+            entry["subset"] = _SubsetList(font["subset"])
+            pdf.fonts[fontkey] = entry
+        pdf.font_files.update(copy.deepcopy(self._font_files))
+        pdf.add_page()
+        self._set_font(pdf, "", 12)
+        return pdf
+
+    def _set_font(self, pdf: FPDF, style: str, size: int) -> None:
+        if self._fonts:
+            pdf.set_font(FONT_FAMILY, style, size)
+        else:
+            pdf.set_font("Arial", style, size)
+
+    def _text(self, text: str) -> str:
+        return text if self._fonts else sanitize_text(text)
+
+    def _experience_entry(self, pdf: FPDF, entry: List[str]) -> None:
+        """Helper function to process and format an experience entry"""
+        if not entry:
+            return
+
+        # Extract title and company
+        title_company = entry[0].split("|")
+        title = title_company[0].strip()
+        company = title_company[1].strip() if len(title_company) > 1 else ""
+
+        # Print title and company
+        self._set_font(pdf, 'B', 11)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(0, 8, txt=self._text(f"{title} | {company}"), ln=True)
+
+        # Print dates and location if available
+        if len(entry) > 1:
+            self._set_font(pdf, 'I', 10)
+            pdf.set_text_color(*SECONDARY_COLOR)
+            pdf.cell(0, 6, txt=self._text(entry[1]), ln=True)
+
+        # Print bullet points
+        self._set_font(pdf, '', 11)
+        pdf.set_text_color(0, 0, 0)
+        for bullet in entry[2:]:
+            pdf.cell(5)
+            pdf.cell(5, 8, txt=self._text("•"), ln=0)
+            pdf.multi_cell(0, 8, txt=self._text(bullet.lstrip("-•*").strip()))
+
+        pdf.ln(5)
+
+    def render(self, resume_text: str) -> bytes:
+        """
+        Lay out the tailored resume text and return the PDF file contents.
+
+        Sections are separated by blank lines and start with a header line.
+        Skills sections are left out; experience sections get entry formatting.
+
+        Args:
+            resume_text (str): The tailored resume text
+
+        Returns:
+            bytes: The PDF document
+        """
+        pdf = self.new_document()
+
+        # Split into sections
+        sections = [s.strip() for s in resume_text.split("\n\n") if s.strip()]
+
+        # Process each section
+        for section in sections:
+            # Extract section header and content
+            lines = section.split("\n")
+            header = lines[0].strip()
+            content = "\n".join(lines[1:]).strip()
+
+            # Skip Skills section
+            if any(skill_keyword in header.upper() for skill_keyword in SKILLS_HEADERS):
+                continue
+
+            # Format section header
+            self._set_font(pdf, 'B', 14)
+            pdf.set_text_color(*PRIMARY_COLOR)
+            pdf.cell(0, 10, txt=self._text(header), ln=True)
+            pdf.ln(2)
+
+            # Process content based on section type
+            if "EXPERIENCE" in header.upper():
+                # Process experience entries
+                current_entry = []
+
+                for line in content.split("\n"):
+                    if line.strip():
+                        if line.strip().startswith(("-", "•", "*")):
+                            # Process previous entry if exists
+                            if current_entry:
+                                self._experience_entry(pdf, current_entry)
+                                current_entry = []
+                        current_entry.append(line)
+
+                # Process last entry
+                if current_entry:
+                    self._experience_entry(pdf, current_entry)
+
+            else:
+                # Process other sections
+                self._set_font(pdf, '', 11)
+                pdf.set_text_color(0, 0, 0)
+                for line in content.split("\n"):
+                    if line.strip():
+                        pdf.multi_cell(0, 8, txt=self._text(line.strip()))
+                pdf.ln(5)
+
+        # Add subtle footer
+        pdf.ln(10)
+        self._set_font(pdf, 'I', 8)
+        pdf.set_text_color(*SECONDARY_COLOR)
+        pdf.cell(0, 5, txt=f"Generated on {datetime.now().strftime('%B %d, %Y')}", ln=True, align="C")
+
+        output = pdf.output(dest="S")
+        # fpdf 1.7.2 returns the document as a latin-1 str
+        return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+# Process-wide renderer shared by every request
+_renderer = ResumePDFRenderer()
+
+
+@traced("render_pdf")
+def render_resume_pdf(resume_text: str) -> bytes:
+    """
+    Render tailored resume text to PDF using the shared renderer.
+
+    Args:
+        resume_text (str): The tailored resume text
+
+    Returns:
+        bytes: The PDF document
+    """
+    return _renderer.render(resume_text)
+
+
+class _PerRequestFontRenderer(ResumePDFRenderer):
+    """The previous path, kept for benchmarking: every document registers and loads the fonts itself."""
+
+    def new_document(self) -> FPDF:
+        self._load_fonts()
+        pdf = FPDF()
+        if self._fonts:
+            for style, file_name in FONT_STYLES.items():
+                pdf.add_font(FONT_FAMILY, style, str(Path(self.font_dir) / file_name), uni=True)
+            fix_ttf_paths(pdf.fonts, pdf.font_files)
+        pdf.add_page()
+        self._set_font(pdf, "", 12)
+        return pdf
+
+
+def benchmark(texts: List[str], runs: int = 5) -> Dict[str, Tuple[float, float]]:
+    """
+    Compare per-PDF render time of the shared renderer against loading fonts per document.
+
+    Args:
+        texts (List[str]): Resume texts to render
+        runs (int): Number of passes over the texts
+
+    Returns:
+        Dict[str, Tuple[float, float]]: Mean and best milliseconds per PDF for each path
+    """
+    results = {}
+    render_resume_pdf(texts[0])  # warm up the shared fonts
+    per_request = _PerRequestFontRenderer()
+    for name, render in (("per-request fonts", per_request.render), ("shared renderer", render_resume_pdf)):
+        timings = []
+        for _ in range(runs):
+            for text in texts:
+                start = time.perf_counter()
+                render(text)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (sum(timings) / len(timings), min(timings))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tailored resume PDF rendering.")
+    parser.add_argument("--runs", type=int, default=5, help="Passes over the sample resumes")
+    args = parser.parse_args()
+
+    # Use the tailored resumes saved under Resume/ as samples
+    sample_texts = [run.get("tailored_resume") for run in map(load_run_folder, iter_run_folders())]
+    sample_texts = [text for text in sample_texts if text]
+    if not sample_texts:
+        raise SystemExit("No saved runs found under Resume/")
+
+    for name, (mean_ms, best_ms) in benchmark(sample_texts, args.runs).items():
+        print(f"{name:>20}: {mean_ms:8.1f} ms/pdf (best {best_ms:.1f} ms)")
@@ -0,0 +1,632 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from response_cache import normalize_text
+from tracing import traced
+from shared_resources import load_environment
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# Root folder for saved tailoring runs: Resume/<YYYYMMDD_HHMMSS>_<user>/
+RESUME_FOLDER = "Resume"
+
+# How persist_resume_run writes artifacts: "background" (default), "sync" or "off"
+RESUME_PERSIST_MODE = os.getenv("RESUME_PERSIST_MODE", "background").lower()
+
+# SQLite index over every run in RESUME_FOLDER
+CATALOG_PATH = os.path.join(RESUME_FOLDER, "catalog.sqlite3")
+
+# Content-addressed, compressed texts shared by all runs: Resume/blobs/<ab>/<sha256>.<zst|gz>
+BLOB_FOLDER = os.path.join(RESUME_FOLDER, "blobs")
+
+# Per-run files: the compact record written now, and the full JSON written by older versions
+RUN_RECORD_FILE = "run.json"
+LEGACY_RUN_FILE = "resume_data.json"
+
+# Run fields stored as blobs rather than inline in the run record
+BLOB_FIELDS = ("original_resume", "job_description", "tailored_resume", "analysis")
+
+# A single writer thread keeps disk writes ordered and off the request path
+_writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="resume-writer")
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash of normalized text, used to find runs for the same resume or job description.
+
+    Args:
+        text (str): Resume text or job description
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store for the large texts of a run.
+
+    Each distinct text is written once, compressed with zstd when the zstandard
+    package is installed and gzip otherwise, so a resume tailored to fifty jobs
+    is stored once instead of fifty times.
+    """
+
+    def __init__(self, root: str = BLOB_FOLDER):
+        self.root = root
+
+    def _path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{extension}")
+
+    def put(self, text: str) -> str:
+        """
+        Store a text if it isn't stored yet.
+
+        Args:
+            text (str): The text to store
+
+        Returns:
+            str: The blob id (hex SHA-256 of the UTF-8 text)
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if any(os.path.exists(self._path(digest, extension)) for extension in ("zst", "gz")):
+            return digest
+
+        if zstandard is not None:
+            path, compressed = self._path(digest, "zst"), zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            path, compressed = self._path(digest, "gz"), gzip.compress(data, compresslevel=9)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """
+        Load a stored text.
+
+        Args:
+            digest (str): Blob id returned by put
+
+        Returns:
+            str: The text
+        """
+        path = self._path(digest, "zst")
+        if os.path.exists(path):
+            if zstandard is None:
+                raise RuntimeError(f"Blob {digest} is zstd-compressed; install the zstandard package to read it")
+            with open(path, "rb") as f:
+                return zstandard.ZstdDecompressor().decompressobj().decompress(f.read()).decode("utf-8")
+        with open(self._path(digest, "gz"), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+
+def load_run_folder(folder: str, blobs: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """
+    Load a run folder in either storage format.
+
+    Args:
+        folder (str): Path of a Resume/<timestamp>_<user> folder
+        blobs (BlobStore): Blob store the run record refers to
+
+    Returns:
+        Dict[str, Any]: The run with the same fields as a legacy resume_data.json
+    """
+    record_path = os.path.join(folder, RUN_RECORD_FILE)
+    if not os.path.exists(record_path):
+        with open(os.path.join(folder, LEGACY_RUN_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    blobs = blobs or BlobStore()
+    with open(record_path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+    refs = record.pop("blobs")
+    for field, digest in refs.items():
+        value = blobs.get(digest)
+        record[field] = json.loads(value) if field == "analysis" else value
+    return record
+
+
+def _store_blobs(resume_data: Dict[str, Any], blobs: BlobStore) -> Dict[str, str]:
+    """Put the large fields of a run into the blob store and return their ids."""
+    refs = {}
+    for field in BLOB_FIELDS:
+        value = resume_data.get(field)
+        if field == "analysis":
+            value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        refs[field] = blobs.put(value or "")
+    return refs
+
+
+def _write_run_record(folder: str, resume_data: Dict[str, Any], refs: Dict[str, str]) -> None:
+    """Write the compact run.json: small fields inline, blob ids for the rest."""
+    record = {key: value for key, value in resume_data.items() if key not in BLOB_FIELDS}
+    record["blobs"] = refs
+    with open(os.path.join(folder, RUN_RECORD_FILE), "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class RunCatalog:
+    """
+    SQLite index of tailoring runs.
+
+    Each row points at a Resume/<timestamp>_<user> folder holding the JSON and
+    PDF, keyed by user, timestamp, resume hash and job hash, so lookups use
+    indexes instead of walking and parsing every resume_data.json.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH, root: str = RESUME_FOLDER, blobs: Optional[BlobStore] = None):
+        self.path = path
+        self.root = root
+        self.blobs = blobs or BlobStore(os.path.join(root, "blobs"))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        # Worker processes and the background writer add runs while the app reads:
+        # wait for locks instead of failing, and let readers run alongside a writer
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    folder TEXT NOT NULL UNIQUE,
+                    user_name TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    resume_hash TEXT NOT NULL,
+                    job_hash TEXT NOT NULL,
+                    job_id TEXT,
+                    overall_match_score REAL,
+                    has_pdf INTEGER NOT NULL DEFAULT 0,
+                    resume_blob TEXT,
+                    job_blob TEXT,
+                    tailored_blob TEXT,
+                    analysis_blob TEXT
+                );
+                CREATE INDEX IF NOT EXISTS runs_user_time ON runs (user_name, timestamp);
+                CREATE INDEX IF NOT EXISTS runs_time ON runs (timestamp);
+                CREATE INDEX IF NOT EXISTS runs_pair ON runs (resume_hash, job_hash);
+                CREATE INDEX IF NOT EXISTS runs_job ON runs (job_hash);
+            """)
+            # Catalogs created before blob storage lack the blob columns
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+            for column in ("resume_blob", "job_blob", "tailored_blob", "analysis_blob"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE runs ADD COLUMN {column} TEXT")
+            self._conn.commit()
+
+    def add_run(self, folder: str, resume_data: Dict[str, Any], refs: Optional[Dict[str, str]] = None) -> int:
+        """
+        Index a run folder. Re-adding the same folder updates its row.
+
+        Args:
+            folder (str): Path of the run folder
+            resume_data (Dict[str, Any]): The full run, as returned by load_run_folder
+            refs (Dict[str, str]): Blob ids of the run's large fields, if stored as blobs
+
+        Returns:
+            int: The run id
+        """
+        refs = refs or {}
+        analysis = resume_data.get("analysis") or {}
+        score = analysis.get("overall_match_score") if isinstance(analysis, dict) else None
+        row = (
+            os.path.basename(os.path.normpath(folder)),
+            resume_data.get("user_name", "Anonymous"),
+            resume_data.get("timestamp", ""),
+            content_hash(resume_data.get("original_resume", "")),
+            content_hash(resume_data.get("job_description", "")),
+            resume_data.get("job_id"),
+            score if isinstance(score, (int, float)) else None,
+            int(os.path.exists(os.path.join(folder, "tailored_resume.pdf"))),
+            refs.get("original_resume"),
+            refs.get("job_description"),
+            refs.get("tailored_resume"),
+            refs.get("analysis")
+        )
+        with self._lock:
+            run_id = self._conn.execute("""
+                INSERT INTO runs (folder, user_name, timestamp, resume_hash, job_hash, job_id, overall_match_score, has_pdf,
+                                  resume_blob, job_blob, tailored_blob, analysis_blob)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (folder) DO UPDATE SET
+                    user_name = excluded.user_name, timestamp = excluded.timestamp,
+                    resume_hash = excluded.resume_hash, job_hash = excluded.job_hash,
+                    job_id = excluded.job_id, overall_match_score = excluded.overall_match_score,
+                    has_pdf = excluded.has_pdf, resume_blob = excluded.resume_blob, job_blob = excluded.job_blob,
+                    tailored_blob = excluded.tailored_blob, analysis_blob = excluded.analysis_blob
+                RETURNING id
+            """, row).fetchone()[0]
+            self._conn.commit()
+        return run_id
+
+    def _query(self, where: List[str], params: List[Any], limit: Optional[int], offset: int) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        run = dict(row)
+        run["has_pdf"] = bool(run["has_pdf"])
+        run["path"] = os.path.join(self.root, run["folder"])
+        return run
+
+    def list_runs(self, user_name: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                  limit: Optional[int] = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List runs, newest first.
+
+        Args:
+            user_name (str): Only runs of this user
+            since (str): Only runs with timestamp >= since (YYYYMMDD_HHMMSS, prefixes like "20250426" work)
+            until (str): Only runs with timestamp < until
+            limit (int): Maximum number of runs, None for all
+            offset (int): Number of runs to skip, for paging
+
+        Returns:
+            List[Dict[str, Any]]: Catalog rows, each with the folder "path"
+        """
+        where, params = [], []
+        if user_name is not None:
+            where.append("user_name = ?")
+            params.append(user_name)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        return self._query(where, params, limit, offset)
+
+    def find_runs(self, resume_text: Optional[str] = None, job_description: Optional[str] = None,
+                  user_name: Optional[str] = None, limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """
+        Find runs for a resume, a job description, or a resume/job pair, newest first.
+
+        Args:
+            resume_text (str): Resume text to match (compared by normalized hash)
+            job_description (str): Job description to match (compared by normalized hash)
+            user_name (str): Only runs of this user
+            limit (int): Maximum number of runs, None for all
+
+        Returns:
+            List[Dict[str, Any]]: Matching catalog rows
+        """
+        where, params = [], []
+        if resume_text is not None:
+            where.append("resume_hash = ?")
+            params.append(content_hash(resume_text))
+        if job_description is not None:
+            where.append("job_hash = ?")
+            params.append(content_hash(job_description))
+        if user_name is not None:
+            where.append("user_name = ?")
+            params.append(user_name)
+        return self._query(where, params, limit, 0)
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Load a run: its catalog row plus the stored run fields (texts and analysis).
+
+        Args:
+            run_id (int): Id from list_runs/find_runs
+
+        Returns:
+            Optional[Dict[str, Any]]: The run, or None if the id is unknown
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = self._row_to_dict(row)
+        run.update(load_run_folder(run["path"], self.blobs))
+        return run
+
+    def import_folders(self) -> int:
+        """
+        Index existing Resume/<timestamp>_<user> folders that aren't in the catalog yet.
+
+        Returns:
+            int: Number of runs imported
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT folder FROM runs")}
+        imported = 0
+        for folder in iter_run_folders(self.root):
+            if os.path.basename(folder) in known:
+                continue
+            try:
+                resume_data = load_run_folder(folder, self.blobs)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping %s: %s", folder, e)
+                continue
+            refs = None
+            if os.path.exists(os.path.join(folder, RUN_RECORD_FILE)):
+                with open(os.path.join(folder, RUN_RECORD_FILE), "r", encoding="utf-8") as f:
+                    refs = json.load(f).get("blobs")
+            self.add_run(folder, resume_data, refs)
+            imported += 1
+        return imported
+
+    def compact(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Move legacy resume_data.json runs into blob storage.
+
+        Each run's texts go into the blob store (deduplicated), a compact run.json
+        replaces resume_data.json, and the catalog row is updated with the blob ids.
+
+        Args:
+            dry_run (bool): Only report what would be compacted
+
+        Returns:
+            Dict[str, int]: Runs compacted and bytes of legacy JSON removed
+        """
+        compacted, legacy_bytes = 0, 0
+        for folder in iter_run_folders(self.root):
+            legacy_path = os.path.join(folder, LEGACY_RUN_FILE)
+            if not os.path.exists(legacy_path) or os.path.exists(os.path.join(folder, RUN_RECORD_FILE)):
+                continue
+            compacted += 1
+            legacy_bytes += os.path.getsize(legacy_path)
+            if dry_run:
+                continue
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                resume_data = json.load(f)
+            refs = _store_blobs(resume_data, self.blobs)
+            _write_run_record(folder, resume_data, refs)
+            self.add_run(folder, resume_data, refs)
+            os.remove(legacy_path)
+        return {"runs": compacted, "legacy_bytes": legacy_bytes}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def iter_run_folders(root: str = RESUME_FOLDER) -> List[str]:
+    """
+    List the run folders under root, in either storage format, oldest first.
+
+    Args:
+        root (str): The Resume/ folder
+
+    Returns:
+        List[str]: Paths of folders containing a run.json or resume_data.json
+    """
+    folders = set()
+    for file_name in (RUN_RECORD_FILE, LEGACY_RUN_FILE):
+        folders.update(os.path.dirname(path) for path in glob.glob(os.path.join(root, "*", file_name)))
+    return sorted(folders)
+
+
+def folder_size(root: str = RESUME_FOLDER) -> int:
+    """Total size in bytes of every file under root."""
+    total = 0
+    for directory, _, files in os.walk(root):
+        total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return total
+
+
+_catalog: Optional[RunCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> RunCatalog:
+    """Return the process-wide run catalog, creating it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RunCatalog()
+    return _catalog
+
+
+def create_run_folder(user_name: str = "Anonymous", timestamp: Optional[str] = None) -> str:
+    """
+    Create a new Resume/<timestamp>_<user> folder for a tailoring run.
+
+    Runs started in the same second (e.g. from a batch) get a numeric suffix
+    so they never overwrite each other.
+
+    Args:
+        user_name (str): Name of the user the run belongs to
+        timestamp (str): Timestamp in YYYYMMDD_HHMMSS format, defaults to now
+
+    Returns:
+        str: Path of the created folder
+    """
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(RESUME_FOLDER, f"{timestamp}_{user_name}")
+    folder = base
+    suffix = 2
+    while True:
+        try:
+            os.makedirs(folder)
+            return folder
+        except FileExistsError:
+            folder = f"{base}-{suffix}"
+            suffix += 1
+
+
+@traced()
+def save_resume_run(original_resume: str, job_description: str, tailored_resume: str, analysis: Dict[str, Any],
+                    user_name: str = "Anonymous", extra: Optional[Dict[str, Any]] = None,
+                    pdf_bytes: Optional[bytes] = None, timestamp: Optional[str] = None) -> str:
+    """
+    Save a tailoring run as Resume/<timestamp>_<user>/run.json (and tailored_resume.pdf).
+
+    The resume, job description, tailored resume and analysis are stored once
+    each in the compressed blob store and referenced from run.json.
+
+    Args:
+        original_resume (str): The resume text that was tailored
+        job_description (str): The job description it was tailored for
+        tailored_resume (str): The generated resume text
+        analysis (Dict[str, Any]): The analysis returned by tailor_resume
+        user_name (str): Name of the user the run belongs to
+        extra (Dict[str, Any]): Optional additional fields to store with the run
+        pdf_bytes (bytes): Rendered PDF to store next to the JSON, if any
+        timestamp (str): Timestamp of the run in YYYYMMDD_HHMMSS format, defaults to now
+
+    Returns:
+        str: Path of the run folder
+    """
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    resume_folder = create_run_folder(user_name, timestamp)
+
+    resume_data = {
+        "original_resume": original_resume,
+        "job_description": job_description,
+        "tailored_resume": tailored_resume,
+        "analysis": analysis,
+        "timestamp": timestamp,
+        "user_name": user_name
+    }
+    if extra:
+        resume_data.update(extra)
+
+    # The texts go to the shared blob store; the folder only gets a small record
+    catalog = get_catalog()
+    refs = _store_blobs(resume_data, catalog.blobs)
+    _write_run_record(resume_folder, resume_data, refs)
+
+    if pdf_bytes is not None:
+        with open(os.path.join(resume_folder, "tailored_resume.pdf"), "wb") as f:
+            f.write(pdf_bytes)
+
+    catalog.add_run(resume_folder, resume_data, refs)
+    return resume_folder
+
+
+def _log_write_failure(future: "concurrent.futures.Future[str]") -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error("Failed to save tailoring run: %s", error)
+
+
+@traced()
+def persist_resume_run(original_resume: str, job_description: str, tailored_resume: str, analysis: Dict[str, Any],
+                       user_name: str = "Anonymous", extra: Optional[Dict[str, Any]] = None,
+                       pdf_bytes: Optional[bytes] = None, mode: Optional[str] = None) -> Optional["concurrent.futures.Future[str]"]:
+    """
+    Save a tailoring run without blocking the caller on disk I/O.
+
+    The caller keeps serving the in-memory PDF (e.g. to st.download_button) while
+    the JSON and PDF are written by a background thread. The timestamp is taken
+    now, so the folder name reflects when the run finished, not when it was written.
+
+    Args:
+        original_resume (str): The resume text that was tailored
+        job_description (str): The job description it was tailored for
+        tailored_resume (str): The generated resume text
+        analysis (Dict[str, Any]): The analysis returned by tailor_resume
+        user_name (str): Name of the user the run belongs to
+        extra (Dict[str, Any]): Optional additional fields to store with the run
+        pdf_bytes (bytes): Rendered PDF to store next to the JSON, if any
+        mode (str): "background", "sync" or "off"; defaults to RESUME_PERSIST_MODE
+
+    Returns:
+        Optional[Future[str]]: Future resolving to the run folder, or None when persistence is off
+    """
+    mode = (mode or RESUME_PERSIST_MODE).lower()
+    if mode == "off":
+        return None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    args = (original_resume, job_description, tailored_resume, analysis, user_name, extra, pdf_bytes, timestamp)
+
+    if mode == "sync":
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(save_resume_run(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    future = _writer.submit(save_resume_run, *args)
+    future.add_done_callback(_log_write_failure)
+    return future
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the index of saved tailoring runs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Index existing Resume/ folders")
+    compact_parser = subparsers.add_parser("compact", help="Move legacy resume_data.json runs into blob storage")
+    compact_parser.add_argument("--dry-run", action="store_true", help="Only report what would be compacted")
+    list_parser = subparsers.add_parser("list", help="List runs, newest first")
+    list_parser.add_argument("--user", help="Only runs of this user")
+    list_parser.add_argument("--since", help="Only runs at or after this timestamp prefix")
+    list_parser.add_argument("--limit", type=int, default=20)
+    find_parser = subparsers.add_parser("find", help="Find runs for a resume and/or job description")
+    find_parser.add_argument("--resume", help="Text file with the resume")
+    find_parser.add_argument("--job", help="Text file with the job description")
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    if args.command == "migrate":
+        imported = catalog.import_folders()
+        print(f"Imported {imported} runs ({len(catalog)} indexed)")
+        return 0
+
+    if args.command == "compact":
+        catalog.import_folders()
+        before = folder_size(catalog.root)
+        result = catalog.compact(dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"Would compact {result['runs']} runs holding {result['legacy_bytes']} bytes of JSON")
+        else:
+            after = folder_size(catalog.root)
+            print(f"Compacted {result['runs']} runs: {before} -> {after} bytes")
+        return 0
+
+    if args.command == "list":
+        runs = catalog.list_runs(user_name=args.user, since=args.since, limit=args.limit)
+    else:
+        def read(path):
+            if path is None:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        runs = catalog.find_runs(resume_text=read(args.resume), job_description=read(args.job))
+    for run in runs:
+        print(json.dumps(run, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ResourceRegistry:
+    """
+    Process-wide objects built once and shared by every Streamlit session.
+
+    Streamlit reruns the page scripts for every session and interaction, but
+    the Python process (and so this registry) lives for the whole server.
+    Anything expensive to set up and safe to share, such as prompt templates,
+    compiled chains, HTTP connection pools and parsed font metrics, is
+    registered here under a name and built by the first caller that needs it.
+
+    Lookups of a built resource take no lock. Each name has its own build
+    lock, so building a slow resource doesn't hold up unrelated ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resources: Dict[str, Any] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._build_seconds: Dict[str, float] = {}
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """
+        The resource registered under a name, built with factory on first use.
+
+        Args:
+            name (str): Resource name, e.g. "chain:tailor_resume"
+            factory (Callable[[], T]): Builds the resource; called at most once per process
+
+        Returns:
+            T: The shared resource
+        """
+        try:
+            return self._resources[name]
+        except KeyError:
+            pass
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            if name not in self._resources:
+                start = time.perf_counter()
+                resource = factory()
+                self._build_seconds[name] = time.perf_counter() - start
+                self._resources[name] = resource
+                logger.debug("Built shared resource %s in %.1f ms", name, self._build_seconds[name] * 1000)
+        return self._resources[name]
+
+    def peek(self, name: str) -> Optional[Any]:
+        """The resource registered under a name, or None if it hasn't been built."""
+        return self._resources.get(name)
+
+    def discard(self, name: str) -> None:
+        """Forget a resource so the next get() builds it again, e.g. after its files changed."""
+        with self._lock:
+            self._resources.pop(name, None)
+            self._build_seconds.pop(name, None)
+
+    def report(self) -> Dict[str, float]:
+        """
+        What has been built so far.
+
+        Returns:
+            Dict[str, float]: Resource name -> milliseconds its one-time build took
+        """
+        return {name: round(seconds * 1000, 2) for name, seconds in sorted(self._build_seconds.items())}
+
+
+# The registry shared by the whole process
+registry = ResourceRegistry()
+
+
+def load_environment() -> None:
+    """Load .env into the environment once per process, however many pages and sessions call it."""
+    def load() -> bool:
+        from dotenv import load_dotenv
+        return load_dotenv()
+
+    registry.get("dotenv", load)
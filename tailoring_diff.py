@@ -0,0 +1,308 @@
+import os
+import re
+import difflib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from match_scoring import score_match
+from response_cache import normalize_text
+from text_search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Minimum similarity (0-1, over the job descriptions' word sequences) for an edited
+# job description to count as the same job, so the previous run can be updated
+INCREMENTAL_MIN_SIMILARITY = float(os.getenv("INCREMENTAL_MIN_SIMILARITY", 0.85))
+# Spelling similarity (0-1) above which an added and a removed keyword are one word with a typo fixed
+TYPO_SIMILARITY = 0.8
+# Recent runs of the same resume in Resume/ considered as the base of an update
+INCREMENTAL_CANDIDATE_RUNS = int(os.getenv("INCREMENTAL_CANDIDATE_RUNS", 5))
+
+# Model-written analysis sections, in the order of the analysis JSON
+ANALYSIS_SECTIONS = ["skills_analysis", "experience_analysis", "keyword_analysis", "tailored_resume", "improvement_suggestions"]
+
+# Analysis sections each tailoring option steers
+OPTION_SECTIONS = {
+    "emphasize_matching_skills": ["skills_analysis"],
+    "prioritize_relevant_experience": ["experience_analysis"],
+    "add_missing_keywords": ["keyword_analysis"],
+    "optimize_for_ats": ["tailored_resume"]
+}
+# Options that change the layout of the whole resume rather than some sections
+FULL_REWRITE_OPTIONS = {"optimize_for_ats"}
+
+# Words in a resume section header that tie the section to an analysis section
+RESUME_SECTION_KEYWORDS = {
+    "skills_analysis": ("SKILL", "COMPETENC", "TECHNOLOG"),
+    "experience_analysis": ("EXPERIENCE", "EMPLOYMENT", "WORK HISTORY", "PROJECT"),
+    "keyword_analysis": ("SUMMARY", "PROFILE", "OBJECTIVE", "SKILL"),
+    "tailored_resume": ("SUMMARY", "PROFILE", "OBJECTIVE")
+}
+_ALL_SECTION_KEYWORDS = {keyword for keywords in RESUME_SECTION_KEYWORDS.values() for keyword in keywords}
+_HEADER_DECORATION = re.compile(r"^[#*_\s]+|[#*_:\s]+$")
+
+
+@dataclass
+class TailoringDelta:
+    """What changed between a previous tailoring run and new inputs."""
+    reusable: bool
+    reason: str
+    similarity: float = 0.0
+    changed_options: List[str] = field(default_factory=list)
+    added_skills: List[str] = field(default_factory=list)
+    removed_skills: List[str] = field(default_factory=list)
+    added_keywords: List[str] = field(default_factory=list)
+    removed_keywords: List[str] = field(default_factory=list)
+    # Analysis sections the model has to write again; the rest are kept
+    analysis_sections: List[str] = field(default_factory=list)
+    # Regenerate the whole resume instead of revising the affected sections
+    rewrite_resume: bool = False
+
+    @property
+    def unchanged(self) -> bool:
+        """The previous analysis and resume can be reused as they are (only scores are recomputed)."""
+        return self.reusable and not self.analysis_sections and not self.rewrite_resume
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact description for traces and logs."""
+        return {
+            "reusable": self.reusable,
+            "reason": self.reason,
+            "similarity": round(self.similarity, 3),
+            "changed_options": self.changed_options,
+            "analysis_sections": self.analysis_sections,
+            "rewrite_resume": self.rewrite_resume
+        }
+
+
+def job_similarity(old_description: str, new_description: str) -> float:
+    """
+    Similarity of two job descriptions, 0-1, over their lowercase word sequences.
+
+    Whitespace, case and punctuation don't count; a fixed typo costs one word.
+    """
+    old_words = tokenize(old_description, keep_stopwords=True)
+    new_words = tokenize(new_description, keep_stopwords=True)
+    if not old_words and not new_words:
+        return 1.0
+    return difflib.SequenceMatcher(None, old_words, new_words, autojunk=False).ratio()
+
+
+def _job_terms(resume_text: str, job_description: str) -> Tuple[set, set]:
+    """The taxonomy skills and top keywords of a job description, as match_scoring sees them."""
+    scores = score_match(resume_text, job_description)
+    skills = scores["skills_analysis"]
+    keywords = scores["keyword_analysis"]
+    return (set(skills["matching_skills"]) | set(skills["missing_skills"]),
+            set(keywords["found_keywords"]) | set(keywords["missing_keywords"]))
+
+
+def _changed_keywords(old_keywords: set, new_keywords: set, old_description: str, new_description: str) -> Tuple[List[str], List[str]]:
+    """
+    Top keywords the edit added and removed.
+
+    A keyword only counts if the other description doesn't contain it at all,
+    so one moving in or out of the top list doesn't, and an added/removed pair
+    spelled alike is a fixed typo and doesn't either.
+    """
+    old_tokens, new_tokens = set(tokenize(old_description)), set(tokenize(new_description))
+    added = {keyword for keyword in new_keywords if keyword not in old_tokens}
+    removed = {keyword for keyword in old_keywords if keyword not in new_tokens}
+    for keyword in list(added):
+        typo = difflib.get_close_matches(keyword, removed, n=1, cutoff=TYPO_SIMILARITY)
+        if typo:
+            added.discard(keyword)
+            removed.discard(typo[0])
+    return sorted(added), sorted(removed)
+
+
+def diff_inputs(previous: Dict[str, Any], resume_text: str, job_description: str, options: Dict[str, bool]) -> TailoringDelta:
+    """
+    Work out which parts of a previous run new inputs invalidate.
+
+    The previous run can only be updated if it was for the same resume and a
+    job description at least INCREMENTAL_MIN_SIMILARITY alike. Then: a toggled
+    option invalidates the analysis sections it steers; skills the job now asks
+    for (or no longer does) invalidate the skills and experience analysis; top
+    keywords new to (or gone from) the job description invalidate the keyword
+    analysis. Any of these also invalidates the suggested content and the
+    improvement list. Edits that change none of them (a typo, reworded
+    sentences) keep the whole analysis; match_scoring recomputes its scores
+    either way.
+
+    Args:
+        previous (Dict[str, Any]): The previous run: "resume_text", "job_description",
+            "options", "analysis" and "tailored_resume"
+        resume_text (str): The new resume
+        job_description (str): The new job description
+        options (Dict[str, bool]): The new tailoring options
+
+    Returns:
+        TailoringDelta: Whether the run is reusable and what has to be regenerated
+    """
+    analysis = previous.get("analysis")
+    if not isinstance(analysis, dict) or "error" in analysis or not previous.get("tailored_resume"):
+        return TailoringDelta(False, "previous run has no usable result")
+    if previous.get("options") is None:
+        return TailoringDelta(False, "previous run didn't record its options")
+    if normalize_text(previous["resume_text"]) != normalize_text(resume_text):
+        return TailoringDelta(False, "resume changed")
+
+    similarity = job_similarity(previous["job_description"], job_description)
+    if similarity < INCREMENTAL_MIN_SIMILARITY:
+        return TailoringDelta(False, "job description changed too much", similarity)
+
+    delta = TailoringDelta(True, "", similarity)
+    delta.changed_options = sorted(name for name in set(options) | set(previous["options"])
+                                   if bool(options.get(name)) != bool(previous["options"].get(name)))
+    sections = set()
+    for name in delta.changed_options:
+        sections.update(OPTION_SECTIONS.get(name, ANALYSIS_SECTIONS))
+    delta.rewrite_resume = bool(FULL_REWRITE_OPTIONS & set(delta.changed_options))
+
+    if normalize_text(previous["job_description"]) != normalize_text(job_description):
+        old_skills, old_keywords = _job_terms(resume_text, previous["job_description"])
+        new_skills, new_keywords = _job_terms(resume_text, job_description)
+        delta.added_skills, delta.removed_skills = sorted(new_skills - old_skills), sorted(old_skills - new_skills)
+        delta.added_keywords, delta.removed_keywords = _changed_keywords(old_keywords, new_keywords,
+                                                                         previous["job_description"], job_description)
+        if delta.added_skills or delta.removed_skills:
+            sections.update(["skills_analysis", "experience_analysis"])
+        if delta.added_keywords or delta.removed_keywords:
+            sections.add("keyword_analysis")
+
+    if sections:
+        sections.update(["tailored_resume", "improvement_suggestions"])
+    delta.analysis_sections = [name for name in ANALYSIS_SECTIONS if name in sections]
+    if delta.rewrite_resume:
+        delta.reason = "layout options changed"
+    elif delta.analysis_sections:
+        delta.reason = "options or job requirements changed"
+    else:
+        delta.reason = "no change affects the analysis"
+    return delta
+
+
+def choose_previous_run(candidates: List[Dict[str, Any]], resume_text: str, job_description: str,
+                        options: Dict[str, bool]) -> Tuple[Optional[Dict[str, Any]], Optional[TailoringDelta]]:
+    """
+    Pick the previous run that is cheapest to update, if any can be.
+
+    Runs needing fewer regenerated sections win, then the most similar job description.
+
+    Args:
+        candidates (List[Dict[str, Any]]): Previous runs, in the shape diff_inputs takes
+        resume_text (str): The new resume
+        job_description (str): The new job description
+        options (Dict[str, bool]): The new tailoring options
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[TailoringDelta]]: The run and its delta,
+        or (None, delta of the last candidate tried) if none is reusable
+    """
+    best, best_delta, last_delta = None, None, None
+    for candidate in candidates:
+        delta = diff_inputs(candidate, resume_text, job_description, options)
+        last_delta = delta
+        if not delta.reusable:
+            continue
+        rank = (delta.rewrite_resume, len(delta.analysis_sections), -delta.similarity)
+        if best_delta is None or rank < (best_delta.rewrite_resume, len(best_delta.analysis_sections), -best_delta.similarity):
+            best, best_delta = candidate, delta
+    return (best, best_delta) if best is not None else (None, last_delta)
+
+
+def find_previous_runs(resume_text: str, user_name: Optional[str] = None,
+                       limit: int = INCREMENTAL_CANDIDATE_RUNS) -> List[Dict[str, Any]]:
+    """
+    Recent runs of this resume saved in Resume/, in the shape diff_inputs takes.
+
+    Runs saved before options were recorded with each run are skipped.
+
+    Args:
+        resume_text (str): The resume (matched by normalized hash)
+        user_name (str): Only this user's runs
+        limit (int): Maximum number of runs to load
+
+    Returns:
+        List[Dict[str, Any]]: The runs, newest first
+    """
+    from resume_storage import get_catalog
+
+    catalog = get_catalog()
+    runs = []
+    for row in catalog.find_runs(resume_text=resume_text, user_name=user_name, limit=limit):
+        try:
+            run = catalog.get_run(row["id"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Skipping unreadable run %s: %s", row.get("path"), e)
+            continue
+        if run is None or run.get("options") is None:
+            continue
+        runs.append({
+            "resume_text": run.get("original_resume", ""),
+            "job_description": run.get("job_description", ""),
+            "options": run["options"],
+            "analysis": run.get("analysis"),
+            "tailored_resume": run.get("tailored_resume", "")
+        })
+    return runs
+
+
+def _section_header(line: str) -> Optional[str]:
+    """The upper-cased header if a line looks like a resume section header, e.g. "SKILLS" or "## Experience:"."""
+    text = _HEADER_DECORATION.sub("", line.strip())
+    if not text or len(text.split()) > 5 or not any(c.isalpha() for c in text):
+        return None
+    upper = text.upper()
+    if text == upper or any(keyword in upper for keyword in _ALL_SECTION_KEYWORDS):
+        return upper
+    return None
+
+
+def split_resume_sections(resume_text: str) -> List[str]:
+    """
+    Split a resume into its sections, each starting with its header line.
+
+    Blocks are separated by blank lines, as resume_pdf lays them out; a block
+    whose first line isn't a header (e.g. a second experience entry) belongs
+    to the section before it. Whatever comes before the first header (name
+    and contacts) is the first element.
+
+    Args:
+        resume_text (str): The tailored resume
+
+    Returns:
+        List[str]: The sections; "\\n\\n".join(sections) rebuilds the resume
+    """
+    blocks = [block.strip("\n") for block in re.split(r"\n\s*\n", resume_text.strip()) if block.strip()]
+    sections: List[str] = []
+    for index, block in enumerate(blocks):
+        header = _section_header(block.split("\n", 1)[0])
+        # An all-caps first block is the candidate's name, not a header
+        starts_section = header is not None and (index > 0 or any(keyword in header for keyword in _ALL_SECTION_KEYWORDS))
+        if starts_section or not sections:
+            sections.append(block)
+        else:
+            sections[-1] += "\n\n" + block
+    return sections
+
+
+def affected_resume_sections(sections: List[str], analysis_sections: List[str]) -> List[int]:
+    """
+    Indexes of the resume sections that regenerated analysis sections feed.
+
+    Args:
+        sections (List[str]): Output of split_resume_sections
+        analysis_sections (List[str]): Regenerated analysis sections
+
+    Returns:
+        List[int]: Section indexes, in order
+    """
+    keywords = {keyword for name in analysis_sections for keyword in RESUME_SECTION_KEYWORDS.get(name, ())}
+    affected = []
+    for index, section in enumerate(sections):
+        header = _section_header(section.split("\n", 1)[0])
+        if header is not None and any(keyword in header for keyword in keywords):
+            affected.append(index)
+    return affected
@@ -0,0 +1,11 @@
+from prompt_budget import clean_extracted_text
+
+
+def test_repeated_body_lines_are_kept():
+    text = "Jane Doe\nSoftware Engineer\nAlpha\nSoftware Engineer\nBeta\nSoftware Engineer\nGamma"
+    assert clean_extracted_text(text) == text
+
+
+def test_running_headers_and_page_numbers_are_dropped():
+    text = "Jane Doe\nExperience\nConfidential\n1\n\f\nJane Doe\nEducation\nConfidential\n2"
+    assert clean_extracted_text(text) == "Jane Doe\nExperience\nConfidential\nEducation"
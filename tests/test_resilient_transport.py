@@ -0,0 +1,51 @@
+import time
+import httpx
+import pytest
+from resilient_transport import CircuitBreaker, CircuitOpenError, ResilientTransport, TransportMetrics, _RetryPolicy
+
+
+def make_client(statuses, breaker):
+    """A client whose upstream answers with the given status codes in order."""
+    replies = iter(statuses)
+    upstream = httpx.MockTransport(lambda request: httpx.Response(next(replies), headers={"retry-after": "0"}))
+    policy = _RetryPolicy(3, 0, 0, 30, breaker, TransportMetrics())
+    return httpx.Client(transport=ResilientTransport(upstream, policy))
+
+
+def test_rate_limited_probe_recovers_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    client = make_client([503, 429, 200, 200], breaker)
+    # The 503 opens the breaker and its retry fails fast
+    with pytest.raises(CircuitOpenError):
+        client.get("https://llm.test/v1")
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    # The probe gets a 429, which means the upstream is alive: it retries and closes the circuit
+    assert client.get("https://llm.test/v1").status_code == 200
+    assert breaker.state == "closed"
+    assert client.get("https://llm.test/v1").status_code == 200
+
+
+def test_probe_is_released_when_it_raises():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    probe = breaker.before_request()
+    assert probe is not None
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.release_probe(probe)
+    assert breaker.before_request() is not None
+
+
+def test_non_retryable_errors_do_not_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+
+    def fail(request):
+        raise httpx.ReadTimeout("slow model", request=request)
+
+    policy = _RetryPolicy(3, 0, 0, 30, breaker, TransportMetrics())
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(fail), policy))
+    with pytest.raises(httpx.ReadTimeout):
+        client.get("https://llm.test/v1")
+    assert breaker.state == "closed"
@@ -0,0 +1,10 @@
+from tolerant_json import parse_json
+
+
+def test_smart_quotes_inside_value_are_kept():
+    content = '{"s": "Rephrase as “Led a team”", "b": [1,],}'
+    assert parse_json(content) == {"s": "Rephrase as “Led a team”", "b": [1]}
+
+
+def test_smart_quotes_as_delimiters_are_converted():
+    assert parse_json('{“s”: “say "hi" now”, “t”: True}') == {"s": 'say "hi" now', "t": True}
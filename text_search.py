@@ -0,0 +1,208 @@
+import re
+import math
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Keeps tokens like "c++", "c#", "node.js" and "ci/cd" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each etc few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out over
+own per same she should so some such than that the their them then there these they this those through to too under
+until up us very via was we were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    """
+    Split text into lowercase search tokens.
+
+    Args:
+        text (str): Any text (resume, job posting, query)
+        keep_stopwords (bool): Keep common English words
+
+    Returns:
+        List[str]: Tokens in document order
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if keep_stopwords:
+        return tokens
+    return [token for token in tokens if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index stored as NumPy arrays.
+
+    Postings are kept in CSR layout (one contiguous slice of document ids and term
+    frequencies per term), so scoring a query is one vectorized update per query
+    term over its posting list, which stays in milliseconds at millions of documents.
+    Build with add() and finalize(), or restore with from_arrays().
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        # Build buffers; compact typed arrays keep memory low during ingestion
+        self._doc_ids = array("I")
+        self._term_ids = array("I")
+        self._term_freqs = array("H")
+        self._doc_lengths = array("I")
+        self._finalized = False
+
+    def add(self, tokens: Iterable[str]) -> int:
+        """
+        Add a document.
+
+        Args:
+            tokens (Iterable[str]): The document's tokens
+
+        Returns:
+            int: The document id (0-based, in insertion order)
+        """
+        if self._finalized:
+            raise RuntimeError("Cannot add documents to a finalized index")
+        doc_id = len(self._doc_lengths)
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+            self._doc_ids.append(doc_id)
+            self._term_ids.append(term_id)
+            self._term_freqs.append(min(count, 65535))
+        self._doc_lengths.append(sum(counts.values()))
+        return doc_id
+
+    def finalize(self) -> "BM25Index":
+        """Convert the build buffers into the CSR search arrays."""
+        term_ids = np.frombuffer(self._term_ids, dtype=np.uint32)
+        order = np.argsort(term_ids, kind="stable")
+        self._set_arrays(
+            doc_ids=np.frombuffer(self._doc_ids, dtype=np.uint32)[order],
+            term_freqs=np.frombuffer(self._term_freqs, dtype=np.uint16)[order],
+            indptr=np.concatenate(([0], np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary))))),
+            doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.uint32).copy()
+        )
+        self._doc_ids, self._term_ids, self._term_freqs, self._doc_lengths = array("I"), array("I"), array("H"), array("I")
+        return self
+
+    def _set_arrays(self, doc_ids: np.ndarray, term_freqs: np.ndarray, indptr: np.ndarray, doc_lengths: np.ndarray) -> None:
+        self.postings_doc_ids = doc_ids
+        self.postings_term_freqs = term_freqs
+        self.indptr = indptr.astype(np.int64)
+        self.doc_lengths = doc_lengths
+        self.doc_count = len(doc_lengths)
+        average_length = float(doc_lengths.mean()) if self.doc_count else 1.0
+        # Per-document length normalization, precomputed once
+        self._length_norm = (self.k1 * (1 - self.b + self.b * doc_lengths / max(average_length, 1.0))).astype(np.float32)
+        document_freqs = np.diff(self.indptr)
+        self.idf = np.log(1 + (self.doc_count - document_freqs + 0.5) / (document_freqs + 0.5)).astype(np.float32)
+        self._finalized = True
+
+    @classmethod
+    def from_arrays(cls, vocabulary: Dict[str, int], arrays: Dict[str, np.ndarray], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Restore an index saved with to_arrays().
+
+        Args:
+            vocabulary (Dict[str, int]): Term to term id mapping
+            arrays (Dict[str, np.ndarray]): The arrays from to_arrays()
+
+        Returns:
+            BM25Index: A finalized index
+        """
+        index = cls(k1=k1, b=b)
+        index.vocabulary = vocabulary
+        index._set_arrays(arrays["doc_ids"], arrays["term_freqs"], arrays["indptr"], arrays["doc_lengths"])
+        return index
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays needed to restore the index with from_arrays()."""
+        return {
+            "doc_ids": self.postings_doc_ids,
+            "term_freqs": self.postings_term_freqs,
+            "indptr": self.indptr,
+            "doc_lengths": self.doc_lengths
+        }
+
+    def postings(self, term: str) -> np.ndarray:
+        """
+        Document ids containing a term.
+
+        Args:
+            term (str): The term
+
+        Returns:
+            np.ndarray: Sorted document ids (empty if the term is unknown)
+        """
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.uint32)
+        return self.postings_doc_ids[self.indptr[term_id]:self.indptr[term_id + 1]]
+
+    def query_weights(self, tokens: Iterable[str], max_terms: Optional[int] = None) -> Dict[str, float]:
+        """
+        Turn query tokens into term weights, keeping the most informative terms.
+
+        Long queries such as a whole resume are cut to the `max_terms` terms with
+        the highest idf times (capped) query frequency.
+
+        Args:
+            tokens (Iterable[str]): Query tokens
+            max_terms (int): Maximum number of terms to keep
+
+        Returns:
+            Dict[str, float]: Term to query weight
+        """
+        counts = Counter(token for token in tokens if token in self.vocabulary)
+        weights = {term: 1 + math.log(count) for term, count in counts.items()}
+        if max_terms is not None and len(weights) > max_terms:
+            ranked = sorted(weights, key=lambda term: weights[term] * self.idf[self.vocabulary[term]], reverse=True)
+            weights = {term: weights[term] for term in ranked[:max_terms]}
+        return weights
+
+    def score(self, weights: Dict[str, float]) -> np.ndarray:
+        """
+        BM25 scores of every document for a weighted query.
+
+        Args:
+            weights (Dict[str, float]): Term to query weight, e.g. from query_weights()
+
+        Returns:
+            np.ndarray: float32 score per document id
+        """
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term, weight in weights.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, stop = self.indptr[term_id], self.indptr[term_id + 1]
+            doc_ids = self.postings_doc_ids[start:stop]
+            term_freqs = self.postings_term_freqs[start:stop].astype(np.float32)
+            scores[doc_ids] += (weight * self.idf[term_id]) * term_freqs * (self.k1 + 1) / (term_freqs + self._length_norm[doc_ids])
+        return scores
+
+    def search(self, weights: Dict[str, float], top_k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top documents for a weighted query.
+
+        Args:
+            weights (Dict[str, float]): Term to query weight
+            top_k (int): Number of results
+            mask (np.ndarray): Optional boolean array; only documents where it is True are returned
+
+        Returns:
+            List[Tuple[int, float]]: (document id, score) pairs, best first, scores > 0 only
+        """
+        scores = self.score(weights)
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in ranked]
@@ -0,0 +1,219 @@
+import re
+import json
+from typing import Any, List, Tuple
+
+# ```json ... ``` (or a bare ``` fence) around the payload
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+# Typographic quotes models sometimes emit around keys and strings
+_SMART_QUOTES = "“”"
+# Python/JavaScript literals outside strings
+_LITERALS = {"True": "true", "False": "false", "None": "null", "undefined": "null", "NaN": "null"}
+
+# Characters of context on each side of an error sent for a fragment fix
+FRAGMENT_CONTEXT_CHARS = 300
+
+
+class JSONRepairError(ValueError):
+    """Raised when text can't be turned into JSON even after local repairs."""
+
+    def __init__(self, message: str, text: str, position: int):
+        super().__init__(message)
+        self.text = text
+        self.position = position
+
+
+def extract_json_text(content: str) -> str:
+    """
+    Cut the JSON payload out of a model response.
+
+    Handles ```json fences (closed or not) and prose before or after the
+    object; the payload starts at the first '{' or '['.
+
+    Args:
+        content (str): Raw model output
+
+    Returns:
+        str: The text from the first bracket onwards, without fences
+    """
+    fenced = _FENCE.search(content)
+    if fenced and ("{" in fenced.group(1) or "[" in fenced.group(1)):
+        content = fenced.group(1)
+    starts = [index for index in (content.find("{"), content.find("[")) if index != -1]
+    return content[min(starts):].strip() if starts else content.strip()
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the usual defects of model-written JSON in a single pass.
+
+    Removes comments and trailing commas, converts Python literals and smart
+    quotes used as string delimiters (smart quotes inside a string are kept), escapes raw newlines inside strings, drops anything after the
+    top-level value, and completes truncated output by closing open strings,
+    arrays and objects (a dangling key gets a null value).
+
+    Args:
+        text (str): JSON-like text starting at its first bracket
+
+    Returns:
+        str: Repaired text (still to be validated with json.loads)
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    # The string's opening delimiter: '"' or a smart quote
+    quote = '"'
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote or (quote in _SMART_QUOTES and char in _SMART_QUOTES):
+                in_string = False
+                char = '"'
+            elif char == '"':
+                char = '\\"'
+            elif char == "\n":
+                char = "\\n"
+            out.append(char)
+            i += 1
+            continue
+
+        if char == '"' or char in _SMART_QUOTES:
+            in_string = True
+            quote = char
+            char = '"'
+        elif char == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif char == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end == -1 else end + 2
+            continue
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if not stack:
+                break
+            # Close whatever is open up to the matching bracket
+            while stack and stack[-1] != char:
+                out.append(stack.pop())
+            if stack:
+                stack.pop()
+            out.append(char)
+            i += 1
+            if not stack:
+                break
+            continue
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group(0)
+            out.append(_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        out.append(char)
+        i += 1
+
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    if stack:
+        _complete_dangling_value(out, stack[-1])
+    while stack:
+        _strip_trailing_comma(out)
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    """Remove a comma (and whitespace) at the end of the output."""
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index:]
+
+
+def _complete_dangling_value(out: List[str], closer: str) -> None:
+    """Give a truncated "key": or "key" at the end of an object a null value."""
+    tail = "".join(out).rstrip()
+    if tail.endswith(":"):
+        out.append(" null")
+    elif closer == "}" and tail.endswith('"'):
+        # A string right after '{' or ',' is a key without a value
+        before = tail[:_string_start(tail)].rstrip()
+        if before.endswith(("{", ",")):
+            out.append(": null")
+
+
+def _string_start(text: str) -> int:
+    """Index of the opening quote of the string that ends `text`."""
+    index = len(text) - 2
+    while index >= 0:
+        if text[index] == '"':
+            backslashes = 0
+            while index - 1 - backslashes >= 0 and text[index - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return index
+        index -= 1
+    return 0
+
+
+def parse_json(content: str) -> Any:
+    """
+    Parse model output as JSON, repairing it locally if needed.
+
+    Args:
+        content (str): Raw model output
+
+    Returns:
+        Any: The parsed value
+
+    Raises:
+        JSONRepairError: If the text is still invalid after repair; carries the
+        repaired text and the error position for a targeted fix
+    """
+    text = extract_json_text(content)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    repaired = repair_json(text)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise JSONRepairError(str(e), repaired, e.pos) from e
+
+
+def error_fragment(text: str, position: int, context: int = FRAGMENT_CONTEXT_CHARS) -> Tuple[int, int]:
+    """
+    The span of text around a parse error to send for repair.
+
+    The span is widened to whole lines so the fragment is easier to fix in isolation.
+
+    Args:
+        text (str): Text that failed to parse
+        position (int): Error position from JSONRepairError
+        context (int): Characters to include on each side
+
+    Returns:
+        Tuple[int, int]: Start and end offsets of the fragment
+    """
+    start = max(text.rfind("\n", 0, max(position - context, 0)) + 1, 0)
+    end = text.find("\n", min(position + context, len(text)))
+    return start, len(text) if end == -1 else end
+
+
+def splice_fragment(text: str, span: Tuple[int, int], replacement: str) -> str:
+    """Put a fixed fragment back in place of the span it replaces."""
+    replacement = replacement.strip()
+    fenced = _FENCE.search(replacement)
+    if fenced and replacement.startswith("```"):
+        replacement = fenced.group(1).strip()
+    return text[:span[0]] + replacement + text[span[1]:]
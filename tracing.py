@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import uuid
+import logging
+import inspect
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from shared_resources import load_environment
+
+logger = logging.getLogger(__name__)
+
+# The settings below may come from .env, so load it before reading them
+load_environment()
+
+# Where finished traces go: comma-separated "json" (log lines / TRACE_LOG_FILE) and/or "otel"
+TRACE_EXPORT = {name.strip() for name in os.getenv("TRACE_EXPORT", "").lower().split(",") if name.strip()}
+# JSONL file that receives one line per trace when "json" export is on (logging only if unset)
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE", "")
+# Finished traces kept in memory for the developer panel
+RECENT_TRACES = int(os.getenv("TRACE_RECENT_TRACES", 50))
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return ((self.end if self.end is not None else time.time()) - self.start)
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes, e.g. span.set(cache_hit=True, sent_tokens=812)."""
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.end is None:
+            self.end = time.time()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round(self.duration * 1000, 2),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error
+        }
+
+
+class Trace:
+    """All spans recorded for one request, rooted at a single span."""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.root = self.start_span(name, None, attributes)
+
+    def start_span(self, name: str, parent: Optional[Span], attributes: Optional[Dict[str, Any]] = None) -> Span:
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent is not None else None,
+            start=time.time(),
+            attributes=dict(attributes or {})
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Trace":
+        """
+        Rebuild a finished trace from to_dict(), e.g. one recorded in another process.
+
+        Args:
+            data (Dict[str, Any]): Output of to_dict
+
+        Returns:
+            Trace: The trace, with its root span first
+        """
+        restored = cls.__new__(cls)
+        restored.trace_id = data["trace_id"]
+        restored._lock = threading.Lock()
+        restored.spans = [Span(
+            name=fields["name"],
+            trace_id=fields["trace_id"],
+            span_id=fields["span_id"],
+            parent_id=fields["parent_id"],
+            start=fields["start"],
+            end=fields["end"],
+            attributes=dict(fields["attributes"]),
+            error=fields["error"]
+        ) for fields in data["spans"]]
+        restored.root = next(s for s in restored.spans if s.parent_id is None)
+        return restored
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": self.root.start,
+            "duration_ms": round(self.root.duration * 1000, 2),
+            "spans": spans
+        }
+
+    def waterfall(self) -> List[Dict[str, Any]]:
+        """
+        Spans in tree order with their offset from the start of the request.
+
+        Returns:
+            List[Dict[str, Any]]: Per span "name", "depth", "offset_ms",
+            "duration_ms", "status" and "attributes"
+        """
+        with self._lock:
+            spans = list(self.spans)
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in sorted(spans, key=lambda s: s.start):
+            children.setdefault(span.parent_id, []).append(span)
+
+        rows = []
+
+        def visit(span: Span, depth: int) -> None:
+            rows.append({
+                "name": span.name,
+                "depth": depth,
+                "offset_ms": round((span.start - self.root.start) * 1000, 2),
+                "duration_ms": round(span.duration * 1000, 2),
+                "status": "error" if span.error else "ok",
+                "attributes": span.attributes
+            })
+            for child in children.get(span.span_id, []):
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return rows
+
+    def totals(self) -> Dict[str, int]:
+        """Token counts and cache hits summed over the spans' attributes."""
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "cache_hits": 0, "cache_misses": 0, "llm_calls": 0}
+        with self._lock:
+            for span in self.spans:
+                attributes = span.attributes
+                totals["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+                totals["completion_tokens"] += attributes.get("completion_tokens", 0)
+                totals["llm_calls"] += int("llm_model" in attributes)
+                if "cache_hit" in attributes:
+                    totals["cache_hits" if attributes["cache_hit"] else "cache_misses"] += 1
+        return totals
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+# Finished traces, newest last
+recent_traces: Deque[Trace] = deque(maxlen=RECENT_TRACES)
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """
+    Record a request: every span opened inside the block (in this context) joins the trace.
+
+    The trace is exported when the block exits.
+
+    Args:
+        name (str): Name of the root span, e.g. "tailor_request"
+        **attributes: Attributes of the root span
+
+    Yields:
+        Trace: The trace being recorded
+    """
+    current = Trace(name, attributes)
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(current.root)
+    try:
+        yield current
+    except BaseException as e:
+        current.root.finish(e)
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        current.root.finish()
+        recent_traces.append(current)
+        export_trace(current)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a child of the current span.
+
+    Outside of a trace nothing is recorded and None is yielded.
+
+    Args:
+        name (str): Span name, e.g. "render_pdf"
+        **attributes: Span attributes
+
+    Yields:
+        Optional[Span]: The span, to attach more attributes
+    """
+    current = _current_trace.get()
+    if current is None:
+        yield None
+        return
+    child = current.start_span(name, _current_span.get(), attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace being recorded in this context, if any."""
+    return _current_trace.get()
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, if a trace is being recorded."""
+    return _current_span.get() if _current_trace.get() is not None else None
+
+
+def annotate(**attributes: Any) -> None:
+    """Attach attributes to the current span, if a trace is being recorded."""
+    current = _current_span.get()
+    if current is not None and _current_trace.get() is not None:
+        current.set(**attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function, coroutine function or generator function to run in a span.
+
+    A generator's span lasts until it is exhausted or closed.
+
+    Args:
+        name (str): Span name; defaults to the function's name
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                current = _current_trace.get()
+                if current is None:
+                    yield from func(*args, **kwargs)
+                    return
+                child = current.start_span(span_name, _current_span.get())
+                generator = func(*args, **kwargs)
+                try:
+                    while True:
+                        # The span is only current while the generator body runs
+                        token = _current_span.set(child)
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            _current_span.reset(token)
+                        yield item
+                except BaseException as e:
+                    generator.close()
+                    child.finish(None if isinstance(e, GeneratorExit) else e)
+                    raise
+                finally:
+                    child.finish()
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export_trace(finished: Trace) -> None:
+    """
+    Send a finished trace to the exporters selected by TRACE_EXPORT.
+
+    "json" writes the trace as one JSON line to the log (and to TRACE_LOG_FILE
+    if set); "otel" replays its spans through the OpenTelemetry tracer
+    provider configured by the application, if opentelemetry is installed.
+
+    Args:
+        finished (Trace): The trace to export
+    """
+    if "json" in TRACE_EXPORT:
+        line = json.dumps(finished.to_dict(), default=str)
+        logger.info(line)
+        if TRACE_LOG_FILE:
+            try:
+                with open(TRACE_LOG_FILE, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning("Failed to write trace to %s: %s", TRACE_LOG_FILE, e)
+    if "otel" in TRACE_EXPORT:
+        _export_otel(finished)
+
+
+def _export_otel(finished: Trace) -> None:
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:
+        logger.warning("TRACE_EXPORT includes 'otel' but opentelemetry is not installed")
+        return
+    tracer = otel_trace.get_tracer("resume_tailor")
+    contexts: Dict[str, Any] = {}
+    with finished._lock:
+        spans = sorted(finished.spans, key=lambda s: s.start)
+    for recorded in spans:
+        otel_span = tracer.start_span(
+            recorded.name,
+            context=contexts.get(recorded.parent_id),
+            attributes={key: value if isinstance(value, (str, bool, int, float)) else str(value)
+                        for key, value in recorded.attributes.items() if value is not None},
+            start_time=int(recorded.start * 1e9)
+        )
+        if recorded.error:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, recorded.error))
+        contexts[recorded.span_id] = otel_trace.set_span_in_context(otel_span)
+        otel_span.end(end_time=int((recorded.end or recorded.start) * 1e9))